@@ -0,0 +1,110 @@
+import asyncio
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from core.state import PipelineState
+from core.providers import providers
+
+# Messages kept verbatim in the response prompt; older ones are folded into
+# `summary`. 0 keeps the full history (previous behaviour).
+CONTEXT_MESSAGES = int(os.getenv("CONTEXT_MESSAGES", "12"))
+
+# Fold in batches so the summary is refreshed every few turns, not on every turn
+FOLD_BATCH = max(2, CONTEXT_MESSAGES // 2)
+
+SUMMARY_MODEL = "gemini-2.5-flash"
+
+SUMMARY_PROMPT = """
+    You maintain the running summary of a live 911 call between a dispatcher trainee and a caller (the victim).
+
+    **Current Summary:**
+    {{summary}}
+
+    **New Exchanges:**
+    {{transcript}}
+
+    Update the summary with the new exchanges. Keep every fact the caller has revealed (name, address, injuries, hazards, people involved), what the dispatcher has asked or instructed, and how the caller's stress level has changed. Write at most 120 words of plain prose. Output only the updated summary.
+    """
+
+def format_transcript(messages: List[BaseMessage]) -> str:
+    return "\n".join(
+        f"{'victim' if isinstance(msg, AIMessage) else 'dispatcher'}: {msg.content}" for msg in messages
+    )
+
+def recent_messages(state: PipelineState) -> List[BaseMessage]:
+    """Messages that go into the prompt verbatim (everything not yet summarized)."""
+    return state.get("messages", [])[state.get("summarized_count") or 0:]
+
+def messages_to_fold(state: PipelineState) -> Tuple[List[BaseMessage], int]:
+    messages = state.get("messages", [])
+    summarized_count = state.get("summarized_count") or 0
+    if CONTEXT_MESSAGES <= 0 or len(messages) - summarized_count <= CONTEXT_MESSAGES + FOLD_BATCH:
+        return [], summarized_count
+
+    cut = len(messages) - CONTEXT_MESSAGES
+    return messages[summarized_count:cut], cut
+
+def build_summary_prompt(state: PipelineState, messages: List[BaseMessage]) -> str:
+    return SUMMARY_PROMPT.replace("{{summary}}", state.get("summary") or "(call just started)").replace("{{transcript}}", format_transcript(messages))
+
+def update_context(state: PipelineState):
+    """
+    Folds messages that fell out of the verbatim window into the running summary.
+    Returns the state update (empty when nothing needs folding).
+    """
+    to_fold, cut = messages_to_fold(state)
+    if not to_fold:
+        return {}
+
+    print(f"DEBUG: Folding {len(to_fold)} messages into call summary")
+    model = providers.gemini_model(SUMMARY_MODEL)
+    response = model.generate_content(build_summary_prompt(state, to_fold))
+    return {"summary": response.text.strip(), "summarized_count": cut}
+
+async def aupdate_context(state: PipelineState):
+    to_fold, cut = messages_to_fold(state)
+    if not to_fold:
+        return {}
+
+    print(f"DEBUG: Folding {len(to_fold)} messages into call summary (async)")
+    model = providers.gemini_model(SUMMARY_MODEL)
+    response = await model.generate_content_async(build_summary_prompt(state, to_fold))
+    return {"summary": response.text.strip(), "summarized_count": cut}
+
+# Sync folds run here, next to the reply being generated on the calling thread
+_fold_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="context-fold")
+
+def _update_context_or_skip(state: PipelineState):
+    try:
+        return update_context(state)
+    except Exception as e:
+        # Not folding only makes the next prompt longer; it is retried next turn
+        print(f"WARNING: Call summary not updated: {e}")
+        return {}
+
+async def _aupdate_context_or_skip(state: PipelineState):
+    try:
+        return await aupdate_context(state)
+    except Exception as e:
+        print(f"WARNING: Call summary not updated: {e}")
+        return {}
+
+def start_context_update(state: PipelineState) -> Future:
+    """
+    Starts the fold in the background so the summary call runs alongside the
+    reply rather than before it. The reply is written from `state` as it is
+    (current summary plus every unsummarized message); the update from
+    `.result()` goes into the same node update and takes effect next turn.
+    """
+    if not messages_to_fold(state)[0]:
+        done = Future()
+        done.set_result({})
+        return done
+    return _fold_executor.submit(_update_context_or_skip, state)
+
+def astart_context_update(state: PipelineState) -> asyncio.Task:
+    """Async counterpart of start_context_update; await the task for the update."""
+    return asyncio.create_task(_aupdate_context_or_skip(state))
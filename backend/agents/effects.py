@@ -1,6 +1,132 @@
+import asyncio
+import io
+import os
+import shutil
+from typing import Any, AsyncIterator, Tuple
+
+from core.blobs import blob_store
 from core.state import PipelineState
 
+# Set AUDIO_EFFECTS=1 to pass replies through the telephone line (needs ffmpeg on
+# the PATH); by default clients get the clean TTS audio
+AUDIO_EFFECTS = os.getenv("AUDIO_EFFECTS", "0") == "1"
+
+def ffmpeg_available() -> bool:
+    """Whether the ffmpeg (or avconv) binary the effects run through can be found."""
+    from pydub.utils import get_encoder_name
+    return shutil.which(get_encoder_name()) is not None
+
+def apply_phone_effects(mp3_bytes: bytes) -> bytes:
+    """Makes a clean TTS line sound like it came in over a 911 call."""
+    # pydub and numpy are only loaded once effects are actually applied
+    from pydub import AudioSegment
+    from core.dsp import EFFECTS_SAMPLE_RATE, TelephoneLine
+
+    segment = AudioSegment.from_file(io.BytesIO(mp3_bytes), format="mp3")
+    segment = segment.set_channels(1).set_frame_rate(EFFECTS_SAMPLE_RATE).set_sample_width(2)
+
+    pcm = TelephoneLine(EFFECTS_SAMPLE_RATE).process_pcm16(segment.raw_data)
+
+    output = io.BytesIO()
+    AudioSegment(pcm, frame_rate=EFFECTS_SAMPLE_RATE, sample_width=2, channels=1).export(output, format="mp3")
+    return output.getvalue()
+
+# Bytes read per pipe read: about a quarter second of 8 kHz PCM
+STREAM_READ_BYTES = 4096
+
+async def aphone_line(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    The same telephone line as apply_phone_effects, applied to a reply while it
+    streams: ("audio", mp3_chunk) events go through an ffmpeg decoder,
+    TelephoneLine.process() and an ffmpeg encoder, and come out as processed
+    MP3 chunks; every other event is passed through as it arrives.
+    """
+    from pydub.utils import get_encoder_name
+    from core.dsp import EFFECTS_SAMPLE_RATE, TelephoneLine
+
+    ffmpeg = get_encoder_name()
+    rate = str(EFFECTS_SAMPLE_RATE)
+    # ffmpeg otherwise buffers its input for probing before producing anything:
+    # ~20 KB of MP3 in the decoder, seconds of PCM in the encoder
+    try:
+        decoder = await asyncio.create_subprocess_exec(
+            ffmpeg, "-loglevel", "error", "-probesize", "32", "-f", "mp3", "-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", rate, "pipe:1",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+        )
+        encoder = await asyncio.create_subprocess_exec(
+            ffmpeg, "-loglevel", "error", "-probesize", "32", "-f", "s16le", "-ar", rate, "-ac", "1", "-i", "pipe:0",
+            "-f", "mp3", "-flush_packets", "1", "pipe:1",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+        )
+    except OSError as e:
+        print(f"WARNING: Audio effects skipped: {e}")
+        async for event in events:
+            yield event
+        return
+
+    line = TelephoneLine(EFFECTS_SAMPLE_RATE)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def feed():
+        try:
+            async for kind, payload in events:
+                if kind == "audio":
+                    decoder.stdin.write(payload)
+                    await decoder.stdin.drain()
+                else:
+                    queue.put_nowait((kind, payload))
+        finally:
+            decoder.stdin.close()
+
+    async def filter_line():
+        remainder = b""
+        while data := await decoder.stdout.read(STREAM_READ_BYTES):
+            data = remainder + data
+            # A read can end mid-sample
+            usable = len(data) - len(data) % 2
+            remainder = data[usable:]
+            encoder.stdin.write(await asyncio.to_thread(line.process_pcm16, data[:usable]))
+            await encoder.stdin.drain()
+        encoder.stdin.close()
+
+    async def collect():
+        while chunk := await encoder.stdout.read(STREAM_READ_BYTES):
+            queue.put_nowait(("audio", chunk))
+
+    tasks = [asyncio.create_task(stage()) for stage in (feed, filter_line, collect)]
+    finished = asyncio.gather(*tasks)
+    finished.add_done_callback(lambda _: queue.put_nowait(None))
+    try:
+        while (event := await queue.get()) is not None:
+            yield event
+        await finished
+        for process in (decoder, encoder):
+            if await process.wait() != 0:
+                raise RuntimeError(f"Audio effects: ffmpeg exited with code {process.returncode}")
+    finally:
+        # Also reached when the consumer stops early: stop the stages and both ffmpeg processes
+        finished.cancel()
+        await asyncio.gather(finished, return_exceptions=True)
+        for process in (decoder, encoder):
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+
 def audio_effects_node(state: PipelineState):
-    # TODO: Implement Audio Effects
     print("DEBUG: Applying Audio Effects")
-    return {"final_audio": state.get("final_audio")}
+    final_audio = state.get("final_audio")
+    if not AUDIO_EFFECTS or not final_audio:
+        return {"final_audio": final_audio}
+
+    try:
+        clean = blob_store.resolve(final_audio)
+        if clean is None:
+            raise LookupError(f"blob {final_audio['blob_id']} is no longer stored")
+        return {"final_audio": blob_store.put(apply_phone_effects(clean))}
+    except Exception as e:
+        print(f"WARNING: Audio effects skipped: {e}")
+        return {"final_audio": final_audio}
+
+async def aaudio_effects_node(state: PipelineState):
+    # Decoding, filtering and encoding are CPU-bound; keep them off the event loop
+    return await asyncio.to_thread(audio_effects_node, state)
@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator, List, Tuple
+
+from langchain_core.messages import AIMessage
+
+from core.metrics import provider_call
+from core.state import PipelineState
+from agents.scenario import aget_response_model, build_response_history, get_response_model
+from agents.context import astart_context_update, start_context_update
+from agents import tts
+
+# Cut after ".", "!", "?" or "..." once whitespace follows, so a boundary at the
+# very end of the buffer is only taken when the next token confirms it.
+SENTENCE_BOUNDARY = re.compile(r'(\.\.\.|[.!?]+["\')\]]*)(\s+)')
+
+# Fragments such as "I..." are merged into the next segment; tiny TTS requests
+# sound choppy and cost a round trip each.
+MIN_SEGMENT_CHARS = 12
+
+def split_sentences(buffer: str) -> Tuple[List[str], str]:
+    """Returns the complete segments in `buffer` and the unfinished remainder."""
+    sentences = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(buffer):
+        candidate = buffer[start:match.end(1)].strip()
+        if len(candidate) < MIN_SEGMENT_CHARS:
+            continue
+        sentences.append(candidate)
+        start = match.end()
+    return sentences, buffer[start:]
+
+def _chunk_text(chunk) -> str:
+    try:
+        return chunk.text
+    except Exception:
+        # Chunks without text parts (e.g. a trailing finish_reason) raise on .text
+        return ""
+
+def stream_reply(state: PipelineState) -> Iterator[Tuple[str, bytes]]:
+    """
+    Streams the victim reply from Gemini and synthesizes each sentence as soon as
+    it is complete, while later sentences are still being generated.
+    Yields (sentence, mp3_bytes) in spoken order.
+    """
+    voice_id = state["voice_definition"]["voice_id"]
+    model = get_response_model(state)
+    with provider_call("gemini"):
+        response = model.generate_content(build_response_history(state), stream=True, generation_config={"response_mime_type": "text/plain"})
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pending = []
+        spoken = []
+        buffer = ""
+
+        def schedule(sentence: str):
+            # In the caller's context, so a failed request is attributed to the tracked step
+            context = contextvars.copy_context()
+            pending.append((sentence, executor.submit(context.run, tts.synthesize, voice_id, sentence, " ".join(spoken))))
+            spoken.append(sentence)
+
+        try:
+            with provider_call("gemini"):
+                for chunk in response:
+                    buffer += _chunk_text(chunk)
+                    sentences, buffer = split_sentences(buffer)
+                    for sentence in sentences:
+                        schedule(sentence)
+                    while pending and pending[0][1].done():
+                        sentence, future = pending.pop(0)
+                        yield sentence, future.result()
+
+            if buffer.strip():
+                schedule(buffer.strip())
+
+            while pending:
+                sentence, future = pending.pop(0)
+                yield sentence, future.result()
+        finally:
+            # Closed early: don't start synthesis nobody will hear (running calls finish)
+            for _, future in pending:
+                future.cancel()
+
+async def astream_reply(state: PipelineState) -> AsyncIterator[Tuple[str, bytes]]:
+    voice_id = state["voice_definition"]["voice_id"]
+    model = await aget_response_model(state)
+    queue: asyncio.Queue = asyncio.Queue()
+    scheduled: List[asyncio.Task] = []
+
+    async def produce():
+        spoken = []
+        buffer = ""
+
+        def schedule(sentence: str):
+            task = asyncio.create_task(tts.asynthesize(voice_id, sentence, " ".join(spoken)))
+            scheduled.append(task)
+            queue.put_nowait((sentence, task))
+            spoken.append(sentence)
+
+        try:
+            with provider_call("gemini"):
+                response = await model.generate_content_async(build_response_history(state), stream=True, generation_config={"response_mime_type": "text/plain"})
+                async for chunk in response:
+                    buffer += _chunk_text(chunk)
+                    sentences, buffer = split_sentences(buffer)
+                    for sentence in sentences:
+                        schedule(sentence)
+
+            if buffer.strip():
+                schedule(buffer.strip())
+        finally:
+            queue.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (item := await queue.get()) is not None:
+            sentence, task = item
+            yield sentence, await task
+        await producer
+    finally:
+        # When the consumer stops early (client disconnect, aclose) the sentences
+        # already scheduled would otherwise keep spending TTS quota
+        producer.cancel()
+        for task in scheduled:
+            task.cancel()
+        await asyncio.gather(producer, *scheduled, return_exceptions=True)
+
+def reply_text_update(sentences: List[str]):
+    response_text = " ".join(sentences)
+    print(f"DEBUG: Generated Response: {response_text[:50]}...")
+    return {"current_text": response_text, "messages": [AIMessage(content=response_text)]}
+
+def build_reply_update(state: PipelineState, sentences: List[str], audio_segments: List[bytes]):
+    return {**reply_text_update(sentences), **tts.build_tts_update(state, b"".join(audio_segments))}
+
+async def abuild_reply_update(state: PipelineState, sentences: List[str], audio_segments: List[bytes]):
+    return {**reply_text_update(sentences), **await tts.abuild_tts_update(state, b"".join(audio_segments))}
+
+def pipelined_response_node(state: PipelineState):
+    print("DEBUG: Generating Response + TTS (pipelined)...")
+    # The summary fold runs alongside the reply; its result is used from the next turn
+    context_fold = start_context_update(state)
+
+    sentences, audio_segments = [], []
+    try:
+        for sentence, audio_bytes in stream_reply(state):
+            sentences.append(sentence)
+            audio_segments.append(audio_bytes)
+    except BaseException:
+        context_fold.cancel()
+        raise
+    return {**build_reply_update(state, sentences, audio_segments), **context_fold.result()}
+
+async def apipelined_response_node(state: PipelineState):
+    print("DEBUG: Generating Response + TTS (pipelined, async)...")
+    context_fold = astart_context_update(state)
+
+    sentences, audio_segments = [], []
+    try:
+        async for sentence, audio_bytes in astream_reply(state):
+            sentences.append(sentence)
+            audio_segments.append(audio_bytes)
+    except BaseException:
+        context_fold.cancel()
+        raise
+    return {**await abuild_reply_update(state, sentences, audio_segments), **await context_fold}
@@ -0,0 +1,144 @@
+import asyncio
+import datetime
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from core.providers import providers
+
+logger = logging.getLogger(__name__)
+
+# Gemini rejects explicit caches below a per-model minimum prompt size, so
+# shorter prefixes skip the provider call and go straight to local reuse. The
+# default is the smallest minimum Gemini has (1024); a model with a higher one
+# rejects the upload, and prefixes that short are not offered to it again.
+PROVIDER_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+PROVIDER_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))
+
+class _Entry:
+    def __init__(self, model, cached_content=None):
+        self.model = model
+        self.cached_content = cached_content
+        self.created = time.monotonic()
+
+class PromptPrefixCache:
+    """
+    Reuses the static part of a prompt (roleplay instructions + persona) across turns.
+
+    Entries are keyed by the hash of (model, system prompt). On a miss, a prefix
+    the model can cache is uploaded as Gemini cached content, and later turns
+    send only the history tail, referencing it. Shorter prefixes (the usual
+    persona prompt is ~750 tokens) and failed uploads keep a local model with
+    the prefix as `system_instruction`: that saves rebuilding the model each
+    turn, but the prefix is still sent with every request.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: int = PROVIDER_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.provider_cached = 0
+        self.local_fallbacks = 0
+        # model name -> prefix size (tokens) the provider refused to cache
+        self._too_short: Dict[str, int] = {}
+
+    @staticmethod
+    def key(model_name: str, system_prompt: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{system_prompt}".encode("utf-8")).hexdigest()
+
+    def _create(self, model_name: str, system_prompt: str) -> _Entry:
+        """Builds an entry; uploading the cache is a network call, keep it off the event loop."""
+        genai = providers.genai()
+        # ~4 characters per token for English prose
+        tokens = len(system_prompt) // 4
+        if tokens >= PROVIDER_CACHE_MIN_TOKENS and tokens > self._too_short.get(model_name, 0):
+            try:
+                cached_content = genai.caching.CachedContent.create(
+                    model=model_name,
+                    system_instruction=system_prompt,
+                    ttl=datetime.timedelta(seconds=self.ttl_seconds)
+                )
+                self.provider_cached += 1
+                return _Entry(genai.GenerativeModel.from_cached_content(cached_content), cached_content)
+            except Exception as e:
+                logger.info(f"Prompt cache: provider caching unavailable, reusing prefix locally ({e})")
+                if "too small" in str(e):
+                    with self._lock:
+                        self._too_short[model_name] = max(tokens, self._too_short.get(model_name, 0))
+
+        self.local_fallbacks += 1
+        return _Entry(genai.GenerativeModel(model_name, system_instruction=system_prompt))
+
+    def _drop(self, entries: List[Optional[_Entry]]):
+        """Deletes the provider caches of entries that left the LRU (a network call per cache)."""
+        for entry in entries:
+            if entry is not None and entry.cached_content is not None:
+                try:
+                    entry.cached_content.delete()
+                except Exception:
+                    pass
+
+    def _lookup(self, key: str) -> Tuple[Optional[_Entry], Optional[_Entry]]:
+        """(live entry, None) on a hit; (None, expired entry or None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            # Provider caches expire after the TTL; rebuild rather than hit a dead handle
+            if entry is not None and time.monotonic() - entry.created < self.ttl_seconds - 60:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, None
+            self.misses += 1
+            if entry is not None:
+                del self._entries[key]
+            return None, entry
+
+    def _store(self, key: str, entry: _Entry) -> List[_Entry]:
+        """Adds `entry`; returns the entries it displaced, whose provider caches must be dropped."""
+        with self._lock:
+            # A concurrent miss on the same prefix may have stored its own entry meanwhile
+            displaced = [self._entries.pop(key)] if key in self._entries else []
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                displaced.append(self._entries.popitem(last=False)[1])
+        return displaced
+
+    def get_model(self, model_name: str, system_prompt: str):
+        key = self.key(model_name, system_prompt)
+        entry, expired = self._lookup(key)
+        if entry is not None:
+            return entry.model
+
+        entry = self._create(model_name, system_prompt)
+        self._drop([expired, *self._store(key, entry)])
+        return entry.model
+
+    async def aget_model(self, model_name: str, system_prompt: str):
+        """get_model for async nodes: a miss uploads and deletes caches in a worker thread."""
+        key = self.key(model_name, system_prompt)
+        entry, expired = self._lookup(key)
+        if entry is not None:
+            return entry.model
+
+        entry = await asyncio.to_thread(self._create, model_name, system_prompt)
+        stale = [expired, *self._store(key, entry)]
+        if any(e is not None and e.cached_content is not None for e in stale):
+            await asyncio.to_thread(self._drop, stale)
+        return entry.model
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "provider_cached": self.provider_cached,
+            "local_fallbacks": self.local_fallbacks
+        }
+
+response_prompt_cache = PromptPrefixCache()
@@ -1,26 +1,31 @@
 import os
 import json
-import google.generativeai as genai
 from dotenv import load_dotenv
 from core.state import PipelineState
 from langchain_core.messages import AIMessage, HumanMessage
+from agents.context import astart_context_update, recent_messages, start_context_update
+from agents.prompt_cache import response_prompt_cache
+from core.metrics import provider_call
+from core.providers import providers
+from core.types import DEMOGRAPHICS, SCENARIO_TYPES
 
 from pprint import pprint
 
 load_dotenv()
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+SCENARIO_MODEL = "gemini-3-pro-preview"
 
-def generate_scenario_node(state: PipelineState):
-    prompt = """
+SCENARIO_PROMPT = """
     You are the "Scenario Engine" for a high-fidelity 911 dispatcher training simulator. Your goal is to generate unique, realistic, and high-stress emergency scenarios.
 
-    You must output a single valid JSON object containing four distinct fields:
+    You must output a single valid JSON object containing six distinct fields:
 
     1.  `voice_name`: A first name for the caller.
     2.  `elevenlabs_voice_prompt`: A concise, physical description of the speaker's voice for the ElevenLabs Voice Design API. Focus on age, gender, accent, and pitch. Do NOT include emotional states (like "scared") here; describe the vocal cords, not the mood.
     3.  `generated_voice_sample_text`: A sample monologue for this character to say during voice generation. It must be **at least 100 characters long**. It should reflect their vocabulary and accent (e.g., slang, sentence structure) but should be relatively neutral or conversational, not screaming. This is used to "bake" the accent into the voice ID.
     4.  `victim_persona`: A detailed system prompt for the LLM that will play the victim during the live call. This must include their situation, location, current stress level (1-10), and specific instructions on how to behave (e.g., "be incoherent at first," "refuse to leave the house without your cat").
+    5.  `scenario_type`: Exactly one of: home_invasion, medical, fire, car_crash, lost_child, other.
+    6.  `demographic`: Exactly one of: child, teenager, adult, elderly, tourist, other.
 
     **Constraints:**
     * Vary the scenarios (Home invasion, medical emergency, fire, car crash, lost child).
@@ -33,41 +38,16 @@ def generate_scenario_node(state: PipelineState):
     "voice_name": "Arthur",
     "elevenlabs_voice_prompt": "An elderly male voice, deep, raspy, and breathy, with a heavy Scottish accent.",
     "generated_voice_sample_text": "I've been living in this old house for nearly forty years now, and I've never seen the winters get quite this cold. The pipes rattle something fierce in the night, and the draft comes right through the floorboards like a ghost visiting for tea. It takes me a good five minutes just to get up the stairs these days.",
-    "victim_persona": "You are Arthur, 82 years old. You have fallen in your kitchen and cannot get up. You smell smoke. You are terrified. Speak in short, breathless sentences. Do not give your address immediately; make the dispatcher work to calm you down first. If they ask about the smoke, say it's getting thicker."
+    "victim_persona": "You are Arthur, 82 years old. You have fallen in your kitchen and cannot get up. You smell smoke. You are terrified. Speak in short, breathless sentences. Do not give your address immediately; make the dispatcher work to calm you down first. If they ask about the smoke, say it's getting thicker.",
+    "scenario_type": "fire",
+    "demographic": "elderly"
     }
     """
 
-    if state.get("scenario"):
-        print("DEBUG: Skipping Scenario Generation (already exists)")
-        return {}
+RESPONSE_MODEL = "gemini-3-pro-preview"
 
-    print("DEBUG: Generating Scenario with Gemini...")
-    model = genai.GenerativeModel("gemini-3-pro-preview")
-    try:
-        response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-        scenario_data = json.loads(response.text)
-        
-        # Normalize keys if needed, but the prompt asks for specific keys. 
-        # Map them to the keys expected by pipeline/graph if they differ.
-        # Graph expects: 'voice_name', 'voice_prompt' (mapped from elevenlabs_voice_prompt), 'example_dialogue' (mapped from generated_voice_sample_text)
-        
-        normalized_scenario = {
-            "description": f"Generated Scenario: {scenario_data.get('voice_name')}",
-            "voice_name": scenario_data.get("voice_name"),
-            "voice_prompt": scenario_data.get("elevenlabs_voice_prompt"),
-            "example_dialogue": scenario_data.get("generated_voice_sample_text"),
-            "victim_persona": scenario_data.get("victim_persona")
-        }
-        
-        print(f"DEBUG: Generated Scenario: {normalized_scenario['voice_name']}")
-        return {"scenario": normalized_scenario}
-        
-    except Exception as e:
-        print(f"ERROR: Failed to generate scenario with Gemini: {e}")
-        raise e
-
-def generate_response_node(state: PipelineState):
-    prompt = """
+# Static per scenario (instructions + persona), so it is cached across turns
+RESPONSE_SYSTEM_PROMPT = """
     You are a roleplay actor in a high-fidelity 911 dispatcher training simulation. You are currently simulating a live emergency call.
 
     **Your Role & Scenario:**
@@ -95,17 +75,86 @@ def generate_response_node(state: PipelineState):
 
     **Output:**
     Generate *only* the spoken response. Do not include actions in asterisks like *coughing* or *hangs up*, as these cannot be spoken by the TTS engine.
+    """
+
+# The part of the prompt that changes every turn; sent after the cached prefix above
+RESPONSE_HISTORY_PROMPT = """
+    **Earlier in the Call (summary):**
+    {{call_summary}}
 
     **Chat History:**
     {{chat_history}}
     """
 
-    messages = state.get("messages", [])
-    
+def normalize_label(value, allowed) -> str:
+    label = str(value or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return label if label in allowed else "other"
+
+def normalize_scenario(response_text: str):
+    scenario_data = json.loads(response_text)
+
+    # Normalize keys if needed, but the prompt asks for specific keys. 
+    # Map them to the keys expected by pipeline/graph if they differ.
+    # Graph expects: 'voice_name', 'voice_prompt' (mapped from elevenlabs_voice_prompt), 'example_dialogue' (mapped from generated_voice_sample_text)
+
+    return {
+        "description": f"Generated Scenario: {scenario_data.get('voice_name')}",
+        "voice_name": scenario_data.get("voice_name"),
+        "voice_prompt": scenario_data.get("elevenlabs_voice_prompt"),
+        "example_dialogue": scenario_data.get("generated_voice_sample_text"),
+        "victim_persona": scenario_data.get("victim_persona"),
+        # Indexed columns of the Scenario table, for listing and filtering the library
+        "scenario_type": normalize_label(scenario_data.get("scenario_type"), SCENARIO_TYPES),
+        "demographic": normalize_label(scenario_data.get("demographic"), DEMOGRAPHICS)
+    }
+
+def generate_scenario_node(state: PipelineState):
+    if state.get("scenario"):
+        print("DEBUG: Skipping Scenario Generation (already exists)")
+        return {}
+
+    print("DEBUG: Generating Scenario with Gemini...")
+    model = providers.gemini_model(SCENARIO_MODEL)
+    try:
+        with provider_call("gemini"):
+            response = model.generate_content(SCENARIO_PROMPT, generation_config={"response_mime_type": "application/json"})
+        normalized_scenario = normalize_scenario(response.text)
+        
+        print(f"DEBUG: Generated Scenario: {normalized_scenario['voice_name']}")
+        return {"scenario": normalized_scenario}
+        
+    except Exception as e:
+        print(f"ERROR: Failed to generate scenario with Gemini: {e}")
+        raise e
+
+async def agenerate_scenario_node(state: PipelineState):
+    if state.get("scenario"):
+        print("DEBUG: Skipping Scenario Generation (already exists)")
+        return {}
+
+    print("DEBUG: Generating Scenario with Gemini (async)...")
+    model = providers.gemini_model(SCENARIO_MODEL)
+    try:
+        with provider_call("gemini"):
+            response = await model.generate_content_async(SCENARIO_PROMPT, generation_config={"response_mime_type": "application/json"})
+        normalized_scenario = normalize_scenario(response.text)
+
+        print(f"DEBUG: Generated Scenario: {normalized_scenario['voice_name']}")
+        return {"scenario": normalized_scenario}
+
+    except Exception as e:
+        print(f"ERROR: Failed to generate scenario with Gemini: {e}")
+        raise e
+
+def build_response_system_prompt(state: PipelineState) -> str:
     # Inject persona into prompt
     scenario = state.get("scenario", {})
     victim_persona = scenario.get("victim_persona", "You are a victim in an emergency.")
-    formatted_prompt = prompt.replace("{{victim_persona}}", victim_persona)
+    return RESPONSE_SYSTEM_PROMPT.replace("{{victim_persona}}", victim_persona)
+
+def build_response_history(state: PipelineState) -> str:
+    # Only the unsummarized tail goes in verbatim; older turns are in `summary`
+    messages = recent_messages(state)
 
     chat_history = []
     # If there are messages, convert them
@@ -113,35 +162,78 @@ def generate_response_node(state: PipelineState):
         role = "victim" if isinstance(msg, AIMessage) else "dispatcher"
         chat_history.append({"role": role, "parts": [msg.content]})
 
-    formatted_prompt = formatted_prompt.replace("{{chat_history}}", json.dumps(chat_history))
+    formatted_prompt = RESPONSE_HISTORY_PROMPT.replace("{{call_summary}}", state.get("summary") or "(none)")
+    return formatted_prompt.replace("{{chat_history}}", json.dumps(chat_history))
+
+def get_response_model(state: PipelineState):
+    """Model with this scenario's instructions + persona as a reused (cached) prefix."""
+    return response_prompt_cache.get_model(RESPONSE_MODEL, build_response_system_prompt(state))
+
+async def aget_response_model(state: PipelineState):
+    return await response_prompt_cache.aget_model(RESPONSE_MODEL, build_response_system_prompt(state))
+
+def parse_response_text(response) -> str:
+    response_obj = json.loads(response.text)
+    # response_text = response_obj["response"]
+    try:
+        if (response_obj.get("spoken_response") is not None):
+            response_text = response_obj["spoken_response"]
+        elif (response_obj.get("response") is not None):
+            response_text = response_obj["response"]
+        else:
+            response_text = response.text
+    except Exception as e:
+        response_text = response.text
+    return response_text
+
+def generate_response_node(state: PipelineState):
+    # The summary fold runs alongside the reply; its result is used from the next turn
+    context_fold = start_context_update(state)
+    history_prompt = build_response_history(state)
 
     print("DEBUG: Generating Response with Gemini...")
-    model = genai.GenerativeModel("gemini-3-pro-preview")
-    # model = genai.GenerativeModel("gemini-2.5-flash")
+    model = get_response_model(state)
 
     try:
-        response = model.generate_content(formatted_prompt, generation_config={"response_mime_type": "application/json"})
+        with provider_call("gemini"):
+            response = model.generate_content(history_prompt, generation_config={"response_mime_type": "application/json"})
 
         # pprint(response)
         
-        response_obj = json.loads(response.text)
-        # response_text = response_obj["response"]
-        try:
-            if (response_obj.get("spoken_response") is not None):
-                response_text = response_obj["spoken_response"]
-            elif (response_obj.get("response") is not None):
-                response_text = response_obj["response"]
-            else:
-                response_text = response.text
-        except Exception as e:
-            response_text = response.text
+        response_text = parse_response_text(response)
         
         print(f"DEBUG: Generated Response: {response_text[:50]}...")
         
         return {
             "current_text": response_text,
-            "messages": [AIMessage(content=response_text)]
+            "messages": [AIMessage(content=response_text)],
+            **context_fold.result()
+        }
+    except Exception as e:
+        context_fold.cancel()
+        print(f"ERROR: Failed to generate response with Gemini: {e}")
+        raise e
+
+async def agenerate_response_node(state: PipelineState):
+    context_fold = astart_context_update(state)
+    history_prompt = build_response_history(state)
+
+    print("DEBUG: Generating Response with Gemini (async)...")
+    model = await aget_response_model(state)
+
+    try:
+        with provider_call("gemini"):
+            response = await model.generate_content_async(history_prompt, generation_config={"response_mime_type": "application/json"})
+        response_text = parse_response_text(response)
+
+        print(f"DEBUG: Generated Response: {response_text[:50]}...")
+
+        return {
+            "current_text": response_text,
+            "messages": [AIMessage(content=response_text)],
+            **await context_fold
         }
     except Exception as e:
+        context_fold.cancel()
         print(f"ERROR: Failed to generate response with Gemini: {e}")
         raise e
@@ -1,27 +1,91 @@
-import base64
+import asyncio
+from typing import AsyncIterator, Iterator, Optional
+from core.blobs import blob_store
+from core.metrics import provider_call
 from core.state import PipelineState
-from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
-import os
+from core.tts_cache import tts_cache
+from core.providers import providers
 
-load_dotenv()
+TTS_MODEL_ID = "eleven_turbo_v2_5"
 
-elevenlabs = ElevenLabs(
-  api_key=os.getenv("ELEVENLABS_API_KEY"),
-)
+def stream_tts(voice_id: str, text: str) -> Iterator[bytes]:
+    """Yields MP3 chunks as ElevenLabs produces them (one chunk on a cache hit)."""
+    cached = tts_cache.get(voice_id, TTS_MODEL_ID, text)
+    if cached is not None:
+        yield cached
+        return
 
-def tts_node(state: PipelineState):
-    print("DEBUG: Generating TTS")
-    audio_generator = elevenlabs.text_to_speech.convert(
-        voice_id=state["voice_definition"]["voice_id"],
-        text=state["current_text"],
-        model_id="eleven_turbo_v2_5"
-    )
-    
-    audio_bytes = b"".join(audio_generator)
-    audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+    chunks = []
+    with provider_call("elevenlabs"):
+        for chunk in providers.elevenlabs().text_to_speech.stream(voice_id=voice_id, text=text, model_id=TTS_MODEL_ID):
+            chunks.append(chunk)
+            yield chunk
+    tts_cache.put(voice_id, TTS_MODEL_ID, text, b"".join(chunks))
+
+async def astream_tts(voice_id: str, text: str) -> AsyncIterator[bytes]:
+    cached = await asyncio.to_thread(tts_cache.get, voice_id, TTS_MODEL_ID, text)
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    with provider_call("elevenlabs"):
+        async for chunk in providers.async_elevenlabs().text_to_speech.stream(voice_id=voice_id, text=text, model_id=TTS_MODEL_ID):
+            chunks.append(chunk)
+            yield chunk
+    await asyncio.to_thread(tts_cache.put, voice_id, TTS_MODEL_ID, text, b"".join(chunks))
+
+def synthesize(voice_id: str, text: str, previous_text: Optional[str] = None) -> bytes:
+    # previous_text only nudges prosody, so it is not part of the cache key
+    cached = tts_cache.get(voice_id, TTS_MODEL_ID, text)
+    if cached is not None:
+        return cached
+
+    with provider_call("elevenlabs"):
+        audio_bytes = b"".join(providers.elevenlabs().text_to_speech.convert(
+            voice_id=voice_id,
+            text=text,
+            model_id=TTS_MODEL_ID,
+            previous_text=previous_text or None
+        ))
+    tts_cache.put(voice_id, TTS_MODEL_ID, text, audio_bytes)
+    return audio_bytes
+
+async def asynthesize(voice_id: str, text: str, previous_text: Optional[str] = None) -> bytes:
+    cached = await asyncio.to_thread(tts_cache.get, voice_id, TTS_MODEL_ID, text)
+    if cached is not None:
+        return cached
+
+    with provider_call("elevenlabs"):
+        audio_generator = providers.async_elevenlabs().text_to_speech.convert(
+            voice_id=voice_id,
+            text=text,
+            model_id=TTS_MODEL_ID,
+            previous_text=previous_text or None
+        )
+        audio_bytes = b"".join([chunk async for chunk in audio_generator])
+    await asyncio.to_thread(tts_cache.put, voice_id, TTS_MODEL_ID, text, audio_bytes)
+    return audio_bytes
 
+def build_tts_update(state: PipelineState, audio_bytes: bytes):
+    """State update recorded once the full utterance has been synthesized; the audio itself goes to the blob store."""
     return {
-        "final_audio": audio_base64,
+        "final_audio": blob_store.put(audio_bytes),
         "audio_history": state["audio_history"]
     }
+
+async def abuild_tts_update(state: PipelineState, audio_bytes: bytes):
+    return {
+        "final_audio": await blob_store.aput(audio_bytes),
+        "audio_history": state["audio_history"]
+    }
+
+def tts_node(state: PipelineState):
+    print("DEBUG: Generating TTS")
+    audio_bytes = synthesize(state["voice_definition"]["voice_id"], state["current_text"])
+    return build_tts_update(state, audio_bytes)
+
+async def atts_node(state: PipelineState):
+    print("DEBUG: Generating TTS (async)")
+    audio_bytes = await asynthesize(state["voice_definition"]["voice_id"], state["current_text"])
+    return await abuild_tts_update(state, audio_bytes)
@@ -1,35 +1,56 @@
 from core.state import PipelineState
-from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
-from elevenlabs.play import play
+from core.metrics import provider_call
+from core.providers import providers
 import base64
-import os
 
-load_dotenv()
-
-elevenlabs = ElevenLabs(
-  api_key=os.getenv("ELEVENLABS_API_KEY"),
-)
+def build_voice_definition(voice_id: str, previews):
+    # The remaining previews come from the same design call; keep them as spares
+    return {
+        "voice_id": voice_id,
+        "spare_generated_voice_ids": [preview.generated_voice_id for preview in previews[1:]]
+    }
 
 def voice_design_node(state: PipelineState):
     if state.get("voice_definition"):
         print("DEBUG: Skipping Voice Design (already exists)")
         return {}
         
-    voices = elevenlabs.text_to_voice.design(
-        model_id="eleven_multilingual_ttv_v2",
-        voice_description=state["scenario"]["voice_prompt"],
-        text=state["scenario"]["example_dialogue"],
-    )
+    elevenlabs = providers.elevenlabs()
+    with provider_call("elevenlabs"):
+        voices = elevenlabs.text_to_voice.design(
+            model_id="eleven_multilingual_ttv_v2",
+            voice_description=state["scenario"]["voice_prompt"],
+            text=state["scenario"]["example_dialogue"],
+        )
+
+        # for preview in voices.previews:
+        #     audio_buffer = base64.b64decode(preview.audio_base_64)
+        #     print(f"Playing preview: {preview.generated_voice_id}")
+        #     play(audio_buffer)
+
+        voice = elevenlabs.text_to_voice.create(
+            voice_name=state["scenario"]["voice_name"],
+            voice_description=state["scenario"]["voice_prompt"],
+            generated_voice_id=voices.previews[0].generated_voice_id
+        )
+    return {"voice_definition": build_voice_definition(voice.voice_id, voices.previews)}
+
+async def avoice_design_node(state: PipelineState):
+    if state.get("voice_definition"):
+        print("DEBUG: Skipping Voice Design (already exists)")
+        return {}
 
-    # for preview in voices.previews:
-    #     audio_buffer = base64.b64decode(preview.audio_base_64)
-    #     print(f"Playing preview: {preview.generated_voice_id}")
-    #     play(audio_buffer)
+    async_elevenlabs = providers.async_elevenlabs()
+    with provider_call("elevenlabs"):
+        voices = await async_elevenlabs.text_to_voice.design(
+            model_id="eleven_multilingual_ttv_v2",
+            voice_description=state["scenario"]["voice_prompt"],
+            text=state["scenario"]["example_dialogue"],
+        )
 
-    voice = elevenlabs.text_to_voice.create(
-        voice_name=state["scenario"]["voice_name"],
-        voice_description=state["scenario"]["voice_prompt"],
-        generated_voice_id=voices.previews[0].generated_voice_id
-    )
-    return {"voice_definition": {"voice_id": voice.voice_id}}
+        voice = await async_elevenlabs.text_to_voice.create(
+            voice_name=state["scenario"]["voice_name"],
+            voice_description=state["scenario"]["voice_prompt"],
+            generated_voice_id=voices.previews[0].generated_voice_id
+        )
+    return {"voice_definition": build_voice_definition(voice.voice_id, voices.previews)}
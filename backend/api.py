@@ -1,25 +1,38 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
 import uvicorn
 import os
+import json
+import asyncio
+import time
+import base64
 import logging
-import google.generativeai as genai
-from langchain_core.messages import HumanMessage
+import uuid
+from datetime import datetime
+from urllib.parse import quote
 from dotenv import load_dotenv
 import sys
 import os
 
-from pprint import pprint
-
 # Add current directory to sys.path to allow imports from core, agents, etc.
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from core.graph import build_graph
-from langgraph.checkpoint.memory import MemorySaver
+# The graph, the agents, LangGraph/LangChain and SQLModel are imported by warm_up(), not here
+from core.pool import ScenarioPool
+from core.providers import providers
+from agents.prompt_cache import response_prompt_cache
+from core.tts_cache import tts_cache
+from core.blobs import blob_store
+from core.metrics import metrics, payload_size, record_checkpoint_stats, server_timing, start_turn, track
+from core.transcription import get_stt_engine
+from core.vad import Endpointer
 
-from core.db import create_db_and_tables, upsert_scenario, get_scenario, Scenario
+if TYPE_CHECKING:
+    from core.db import Scenario
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,7 +40,83 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-app = FastAPI()
+# Number of fully prepared scenarios (with designed voices) to keep ready; 0 disables the pool
+SCENARIO_POOL_SIZE = int(os.getenv("SCENARIO_POOL_SIZE", "0"))
+scenario_pool = ScenarioPool(SCENARIO_POOL_SIZE, interval=float(os.getenv("SCENARIO_POOL_INTERVAL", "30")))
+
+# Stream the victim reply sentence by sentence into TTS instead of waiting for the full text
+PIPELINED_RESPONSE = os.getenv("PIPELINED_RESPONSE", "0") == "1"
+
+# Set by warm_up(): disk-backed graph state (idle threads expire after CHECKPOINT_TTL_SECONDS) and the compiled graph
+memory = None
+graph = None
+warm_up_seconds: Optional[float] = None
+_warm_up_task: Optional[asyncio.Task] = None
+
+async def warm_up():
+    """
+    Imports the pipeline, opens the checkpoint and scenario databases, compiles
+    the graph and connects to the providers, the last concurrently with the rest.
+    """
+    global memory, graph, warm_up_seconds
+    started = time.perf_counter()
+
+    def build():
+        from core.checkpoint import TTLSqliteSaver
+        from core.db import create_db_and_tables
+        from core.graph import build_graph
+
+        from agents import effects
+
+        if effects.AUDIO_EFFECTS and not effects.ffmpeg_available():
+            # Each reply would otherwise just log a warning and go out unprocessed
+            logger.error("AUDIO_EFFECTS=1 but ffmpeg is not on the PATH: replies will be sent without the telephone line effect")
+
+        create_db_and_tables()
+        saver = TTLSqliteSaver.from_path(
+            os.getenv("CHECKPOINT_DB", "checkpoints.db"),
+            ttl_seconds=float(os.getenv("CHECKPOINT_TTL_SECONDS", str(6 * 3600))),
+            hot_cache_size=int(os.getenv("CHECKPOINT_HOT_CACHE_SIZE", "256"))
+        )
+        return saver, build_graph(is_cli=False, checkpointer=saver, pipelined=PIPELINED_RESPONSE)
+
+    (saver, compiled), _ = await asyncio.gather(asyncio.to_thread(build), providers.awarm_up())
+    saver.start_maintenance(interval=float(os.getenv("CHECKPOINT_MAINTENANCE_INTERVAL", "300")))
+    if SCENARIO_POOL_SIZE > 0:
+        scenario_pool.start()
+    memory, graph = saver, compiled
+    warm_up_seconds = time.perf_counter() - started
+    logger.info(f"Warm-up finished in {warm_up_seconds:.2f}s")
+
+def start_warm_up() -> asyncio.Task:
+    """Starts warm_up() once; a failed warm-up is retried by the next caller."""
+    global _warm_up_task
+    task = _warm_up_task
+    if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+        task = _warm_up_task = asyncio.create_task(warm_up())
+    return task
+
+async def wait_until_ready():
+    """Waits for warm-up; also starts it when the app is served without its lifespan (e.g. ASGITransport)."""
+    if graph is None:
+        await asyncio.shield(start_warm_up())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve right away (/healthz); /readyz and the endpoints wait for warm-up
+    def log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Warm-up failed: {task.exception()}")
+
+    start_warm_up().add_done_callback(log_failure)
+    yield
+    if _warm_up_task is not None and not _warm_up_task.done():
+        _warm_up_task.cancel()
+    if memory is not None:
+        memory.stop_maintenance()
+    scenario_pool.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,48 +124,100 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Read by clients that ask /api/chat for raw audio
+    expose_headers=["X-Victim-Text", "X-Thread-Id", "X-Audio-Duration-Ms", "Server-Timing"],
 )
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-# In-memory storage for graph state
-memory = MemorySaver()
-graph = build_graph(is_cli=False, checkpointer=memory)
+# Dispatcher speech is transcribed by the engine named in STT_ENGINE (Gemini by default)
+stt_engine = get_stt_engine(default="gemini")
 
 class ChatResponse(BaseModel):
     text: Optional[str]
     audio: Optional[str] # Base64 encoded audio
     thread_id: str
 
-@app.post("/api/chat/{thread_id}", response_model=ChatResponse)
-async def chat_endpoint(thread_id: str, audio: UploadFile = File(None), text: Optional[str] = Form(None)):
-    config = {"configurable": {"thread_id": thread_id}}
-    
+# Representations of a chat turn, by media type; JSON stays the default
+CHAT_FORMATS = {"application/json": "json", "audio/mpeg": "audio", "multipart/mixed": "multipart"}
+
+def chat_format(accept: Optional[str]) -> str:
+    """Picks the /api/chat representation from the Accept header (highest q wins, earlier entries break ties)."""
+    best, best_q = "json", 0.0
+    for item in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type.lower() in CHAT_FORMATS and q > best_q:
+            best, best_q = CHAT_FORMATS[media_type.lower()], q
+    return best
+
+def render_chat_response(response_format: str, thread_id: str, text: Optional[str], audio_ref: Optional[dict], audio_bytes: Optional[bytes]):
+    """
+    json:      ChatResponse with base64 audio
+    audio:     the MP3 as the body, victim text URL-encoded in X-Victim-Text (204 if there is no audio)
+    multipart: multipart/mixed with an application/json part ({text, thread_id}) and the MP3 part
+    """
+    if response_format == "json":
+        return ChatResponse(
+            text=text,
+            audio=base64.b64encode(audio_bytes).decode("utf-8") if audio_bytes else None,
+            thread_id=thread_id
+        )
+
+    mime = (audio_ref or {}).get("mime") or "audio/mpeg"
+    if response_format == "audio":
+        headers = {"X-Victim-Text": quote(text or ""), "X-Thread-Id": thread_id}
+        if audio_ref and audio_ref.get("duration_ms") is not None:
+            headers["X-Audio-Duration-Ms"] = str(audio_ref["duration_ms"])
+        if not audio_bytes:
+            return Response(status_code=204, headers=headers)
+        return Response(content=audio_bytes, media_type=mime, headers=headers)
+
+    boundary = uuid.uuid4().hex
+    parts = [
+        f"--{boundary}\r\nContent-Type: application/json\r\n\r\n".encode("utf-8")
+        + json.dumps({"text": text, "thread_id": thread_id}).encode("utf-8")
+    ]
+    if audio_bytes:
+        parts.append(f"--{boundary}\r\nContent-Type: {mime}\r\nContent-Length: {len(audio_bytes)}\r\n\r\n".encode("utf-8") + audio_bytes)
+    body = b"\r\n".join(parts) + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    return Response(content=body, media_type=f"multipart/mixed; boundary={boundary}")
+
+def scenario_input(scenario_record: "Scenario"):
+    """Initial graph input for a session that starts from a saved scenario."""
+    return {
+        "scenario": {
+            "description": scenario_record.description,
+            "voice_name": scenario_record.voice_name,
+            "voice_prompt": scenario_record.voice_prompt,
+            "victim_persona": scenario_record.victim_persona,
+            "example_dialogue": scenario_record.example_dialogue or "",
+            "scenario_type": scenario_record.scenario_type,
+            "demographic": scenario_record.demographic
+        },
+        "voice_definition": {"voice_id": scenario_record.voice_id},
+        "current_text": None,
+        "audio_history": [],
+        "final_audio": None,
+        "messages": []
+    }
+
+async def prepare_turn_input(thread_id: str, config: dict, audio: Optional[UploadFile], text: Optional[str]):
+    """Transcribes/records the dispatcher input and returns the graph input for this turn."""
     input_text = None
     
-    # 1. Handle User Input
     if audio:
         try:
             logger.info(f"Received audio for thread {thread_id}")
             audio_bytes = await audio.read()
             
-            # STT using Gemini
-            model = genai.GenerativeModel("gemini-2.5-flash")
-            
-            prompt = "Transcribe the following audio accurately. Output ONLY the transcription."
-            
-            response = model.generate_content([
-                prompt,
-                {
-                    "mime_type": audio.content_type or "audio/mp3",
-                    "data": audio_bytes
-                }
-            ])
-
-            pprint(response)
-            
-            input_text = response.text.strip()
+            with track("stt", len(audio_bytes)) as step:
+                input_text = await stt_engine.atranscribe(audio_bytes, audio.content_type or "audio/mp3")
+                step.bytes_out = len(input_text or "")
             logger.info(f"Transcribed text: {input_text}")
             
         except Exception as e:
@@ -86,14 +227,24 @@ async def chat_endpoint(thread_id: str, audio: UploadFile = File(None), text: Op
         input_text = text
         logger.info(f"Received text for thread {thread_id}: {input_text}")
 
+    return await record_turn_input(thread_id, config, input_text, started=not audio and not text)
+
+async def record_turn_input(thread_id: str, config: dict, input_text: Optional[str], started: bool = False):
+    """Adds the dispatcher line to the thread (or builds the session start input) and returns the graph input."""
+    await wait_until_ready()
     if input_text:
+        from langchain_core.messages import HumanMessage
+
+
         # Update state with user message
         logger.info(f"Updating state for thread {thread_id} with text: {input_text}")
-        graph.update_state(config, {"messages": [HumanMessage(content=input_text)]})
+        # As if the previous turn finished, so the graph starts a new turn from the top
+        # (with parallel nodes the last writer cannot always be inferred)
+        await graph.aupdate_state(config, {"messages": [HumanMessage(content=input_text)]}, as_node="audio_effects")
         input_data = None
     else:
         # First call (Start of scenario) or no input
-        if not audio and not text:
+        if started:
             logger.info(f"Starting new session for thread {thread_id}")
 
             # load_voice_id = "1vv1HaZbEdPUqiY6W98r"
@@ -101,26 +252,17 @@ async def chat_endpoint(thread_id: str, audio: UploadFile = File(None), text: Op
             load_voice_id = None
 
             if load_voice_id:
+                from core.db import get_scenario
                 scenario_record = get_scenario(load_voice_id)
                 if not scenario_record:
                     logger.info(f"Error: No scenario found for Voice ID: {load_voice_id}")
-                    return
+                    raise HTTPException(status_code=404, detail=f"No scenario found for Voice ID: {load_voice_id}")
             
-                input_data = {
-                    "scenario": {
-                        "description": scenario_record.description,
-                        "voice_name": scenario_record.voice_name,
-                        "voice_prompt": scenario_record.voice_prompt,
-                        "victim_persona": scenario_record.victim_persona,
-                        "example_dialogue": ""
-                    },
-                    "voice_definition": {"voice_id": scenario_record.voice_id},
-                    "current_text": None,
-                    "audio_history": [],
-                    "final_audio": None,
-                    "messages": []
-                }
+                input_data = scenario_input(scenario_record)
                 logger.info(f"Loaded scenario for Voice ID: {load_voice_id}")
+            elif SCENARIO_POOL_SIZE > 0 and (scenario_record := await asyncio.to_thread(scenario_pool.claim)):
+                input_data = scenario_input(scenario_record)
+                logger.info(f"Claimed pre-warmed scenario {scenario_record.voice_name} ({scenario_record.voice_id})")
             else:
                 input_data = {
                     "scenario": None,
@@ -143,26 +285,393 @@ async def chat_endpoint(thread_id: str, audio: UploadFile = File(None), text: Op
             # Should not happen if logic is correct
             input_data = None
 
+    return input_data
+
+@app.post(
+    "/api/chat/{thread_id}",
+    response_model=ChatResponse,
+    responses={200: {"content": {"audio/mpeg": {}, "multipart/mixed": {}}}}
+)
+async def chat_endpoint(http_response: Response, thread_id: str, audio: UploadFile = File(None), text: Optional[str] = Form(None), accept: Optional[str] = Header(None)):
+    """
+    Runs one turn. The reply format follows the Accept header: JSON with
+    base64 audio (default), `audio/mpeg` (raw MP3, text in X-Victim-Text) or
+    `multipart/mixed` (JSON part + MP3 part). Server-Timing breaks the turn
+    down by step (stt, each graph node, checkpoint I/O).
+    """
+    turn_started = time.perf_counter()
+    timings = start_turn()
+    config = {"configurable": {"thread_id": thread_id}}
+
+    # 1. Handle User Input
+    input_data = await prepare_turn_input(thread_id, config, audio, text)
+
     # 2. Run Graph
     try:
         logger.info("Running graph")
         final_state = None
-        for event in graph.stream(input_data, config=config, stream_mode="values"):
+        async for event in graph.astream(input_data, config=config, stream_mode="values"):
             # pprint(event)
             final_state = event
             
         if not final_state:
              raise HTTPException(status_code=500, detail="Graph execution failed to produce state")
              
-        return ChatResponse(
-            text=final_state.get("current_text"),
-            audio=final_state.get("final_audio"),
-            thread_id=thread_id
+        # The state only holds a blob reference; resolve it off the event loop before rendering
+        audio_ref = final_state.get("final_audio")
+        audio_bytes = await blob_store.aresolve(audio_ref)
+        result = render_chat_response(chat_format(accept), thread_id, final_state.get("current_text"), audio_ref, audio_bytes)
+        target = result if isinstance(result, Response) else http_response
+        target.headers["Server-Timing"] = server_timing(timings, time.perf_counter() - turn_started)
+        return result
+
+    except Exception as e:
+        logger.error(f"Error running graph: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving, warm or not."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 503 until warm-up has compiled the graph and connected to the providers."""
+    if graph is None:
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    return {"status": "ready", "warm_up_seconds": round(warm_up_seconds, 3)}
+
+class ScenarioSummary(BaseModel):
+    voice_id: str
+    voice_name: str
+    description: Optional[str]
+    scenario_type: Optional[str]
+    demographic: Optional[str]
+    pool_status: Optional[str]
+    created_at: datetime
+
+class ScenarioDetail(ScenarioSummary):
+    voice_prompt: str
+    victim_persona: str
+    example_dialogue: Optional[str]
+
+class ScenarioPage(BaseModel):
+    scenarios: List[ScenarioSummary]
+    # Pass back as `cursor` for the next page; null on the last page
+    next_cursor: Optional[str]
+
+@app.get("/api/scenarios", response_model=ScenarioPage)
+async def list_scenarios_endpoint(
+    scenario_type: Optional[str] = None,
+    demographic: Optional[str] = None,
+    pool_status: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
+):
+    """The scenario library, newest first, filtered by type, demographic, pool status and creation time."""
+    await wait_until_ready()
+    from core.db import list_scenarios
+
+    try:
+        rows, next_cursor = await asyncio.to_thread(
+            list_scenarios, scenario_type, demographic, pool_status, created_after, created_before, limit, cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ScenarioPage(
+        scenarios=[ScenarioSummary.model_validate(row, from_attributes=True) for row in rows],
+        next_cursor=next_cursor
+    )
+
+@app.get("/api/scenarios/{voice_id}", response_model=ScenarioDetail)
+async def get_scenario_endpoint(voice_id: str):
+    await wait_until_ready()
+    from core.db import get_scenario
+
+    scenario_record = await asyncio.to_thread(get_scenario, voice_id)
+    if scenario_record is None:
+        raise HTTPException(status_code=404, detail=f"No scenario found for Voice ID: {voice_id}")
+    return ScenarioDetail.model_validate(scenario_record, from_attributes=True)
+
+@app.get("/api/stats")
+async def stats():
+    await wait_until_ready()
+    from core.db import scenario_cache
+
+    return {
+        "checkpoints": await asyncio.to_thread(memory.stats),
+        "prompt_cache": response_prompt_cache.stats(),
+        "tts_cache": tts_cache.stats(),
+        "blobs": blob_store.stats(),
+        "scenario_cache": scenario_cache.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Per-step duration and payload histograms and checkpoint store gauges in the Prometheus text format."""
+    if memory is not None:
+        record_checkpoint_stats(await asyncio.to_thread(memory.stats))
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# The node whose output streams to the client; turns are run up to it and it is replayed as audio goes out
+AUDIO_NODE = "generate_response" if PIPELINED_RESPONSE else "tts_generator"
+
+async def run_until_audio(config: dict, input_data):
+    """Runs the turn up to the audio-producing node and returns the state at that point."""
+    async for _ in graph.astream(input_data, config=config, stream_mode="values", interrupt_before=[AUDIO_NODE]):
+        pass
+    return (await graph.aget_state(config)).values
+
+async def astream_turn_audio(config: dict, state: dict):
+    """
+    Yields ("text", sentence) and ("audio", mp3_chunk) for the victim reply as it
+    is produced, with the telephone line applied on the way out when AUDIO_EFFECTS
+    is on, then records the completed turn in the graph.
+    """
+    from agents import effects
+    from agents.context import astart_context_update
+    from agents.pipelined_response import abuild_reply_update, astream_reply
+    from agents.tts import abuild_tts_update, astream_tts
+
+    sentences = []
+    # The summary fold runs alongside the reply; its result is used from the next turn
+    context_fold = astart_context_update(state) if PIPELINED_RESPONSE else None
+
+    async def reply_events():
+        if PIPELINED_RESPONSE:
+            async for sentence, audio_bytes in astream_reply(state):
+                sentences.append(sentence)
+                yield "text", sentence
+                yield "audio", audio_bytes
+        else:
+            yield "text", state.get("current_text")
+            async for chunk in astream_tts(state["voice_definition"]["voice_id"], state.get("current_text")):
+                if chunk:
+                    yield "audio", chunk
+
+    chunks = []
+    # The audio node is replayed here rather than run by the graph, so it is timed here
+    # (streamed effects run interleaved with it and are included)
+    with track(AUDIO_NODE, payload_size(state)) as step:
+        events = effects.aphone_line(reply_events()) if effects.AUDIO_EFFECTS else reply_events()
+        try:
+            async for kind, payload in events:
+                if kind == "audio":
+                    chunks.append(payload)
+                yield kind, payload
+        except BaseException:
+            if context_fold is not None:
+                context_fold.cancel()
+            raise
+        step.bytes_out = sum(len(chunk) for chunk in chunks)
+
+    # The stored audio is what the client heard (through the telephone line if effects are on)
+    if PIPELINED_RESPONSE:
+        update = {**await abuild_reply_update(state, sentences, chunks), **await context_fold}
+    else:
+        update = await abuild_tts_update(state, b"".join(chunks))
+    # Record the completed turn as if the audio node and then audio_effects had run;
+    # the effects node itself is skipped, its work is already in the stream
+    await graph.aupdate_state(config, update, as_node=AUDIO_NODE)
+    await graph.aupdate_state(config, {}, as_node="audio_effects")
 
+@app.post("/api/chat/{thread_id}/stream")
+async def chat_stream_endpoint(thread_id: str, audio: UploadFile = File(None), text: Optional[str] = Form(None)):
+    """
+    Same turn as /api/chat, but answers with Server-Sent Events:
+    `text` (victim line), `audio` (base64 MP3 chunks, through the telephone line, as ElevenLabs produces them),
+    then `done` with first-byte / last-byte latency for the turn.
+    In pipelined mode one `text` event is sent per sentence, ahead of its audio.
+    Server-Timing covers the steps before the stream starts; `done` carries all of them.
+    """
+    turn_started = time.perf_counter()
+    timings = start_turn()
+    config = {"configurable": {"thread_id": thread_id}}
+
+    input_data = await prepare_turn_input(thread_id, config, audio, text)
+
+    try:
+        logger.info("Running graph (streaming)")
+        state = await run_until_audio(config, input_data)
     except Exception as e:
         logger.error(f"Error running graph: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def event_stream():
+        audio_bytes = 0
+        first_byte_ms = None
+        try:
+            async for kind, payload in astream_turn_audio(config, state):
+                if kind == "text":
+                    yield sse_event("text", {"text": payload, "thread_id": thread_id})
+                    continue
+                if first_byte_ms is None:
+                    first_byte_ms = (time.perf_counter() - turn_started) * 1000
+                audio_bytes += len(payload)
+                yield sse_event("audio", {"chunk": base64.b64encode(payload).decode("utf-8")})
+            last_byte_ms = (time.perf_counter() - turn_started) * 1000
+        except Exception as e:
+            logger.error(f"Error streaming turn: {e}")
+            yield sse_event("error", {"detail": str(e)})
+            return
+
+        logger.info(f"Turn latency for thread {thread_id}: first byte {first_byte_ms:.0f}ms, last byte {last_byte_ms:.0f}ms")
+        yield sse_event("done", {
+            "thread_id": thread_id,
+            "first_byte_ms": round(first_byte_ms, 1) if first_byte_ms is not None else None,
+            "last_byte_ms": round(last_byte_ms, 1),
+            "audio_bytes": audio_bytes,
+            "timings_ms": {step: round(seconds * 1000, 1) for step, seconds in timings.items()}
+        })
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Server-Timing": server_timing(timings)})
+
+@app.websocket("/api/call/{thread_id}")
+async def call_endpoint(websocket: WebSocket, thread_id: str):
+    """
+    Full-duplex call on a single connection.
+
+    Client -> server:
+      binary frames: dispatcher mic audio, 16 kHz 16-bit mono PCM
+      {"type": "start"}        start the session (victim opening line)
+      {"type": "end_of_turn"}  the dispatcher stopped talking (optional: the
+                               server also ends the turn after a pause)
+      {"type": "text", "text"} typed dispatcher line
+      {"type": "hangup"}
+    Server -> client:
+      binary frames: victim MP3 audio as it is synthesized
+      {"type": "partial" | "transcript", "text"}  dispatcher STT
+      {"type": "text", "text"}                    victim line
+      {"type": "turn_done", "first_byte_ms", "last_byte_ms", "audio_bytes", "timings_ms"}
+      {"type": "error", "detail"}
+
+    Receiving, turn processing and sending run as separate tasks, so mic audio
+    keeps flowing (and is transcribed as it arrives) while the victim is speaking.
+    """
+    await websocket.accept()
+    config = {"configurable": {"thread_id": thread_id}}
+    outbox: asyncio.Queue = asyncio.Queue()
+    # ("start", None), ("text", str) or ("audio", transcription task of the utterance)
+    turns: asyncio.Queue = asyncio.Queue()
+    transcriptions = set()
+
+    async def send():
+        while (message := await outbox.get()) is not None:
+            if isinstance(message, bytes):
+                await websocket.send_bytes(message)
+            else:
+                await websocket.send_json(message)
+
+    async def transcribe(frames: asyncio.Queue) -> Tuple[str, Dict[str, float]]:
+        """Started when the utterance starts, so STT runs alongside any turn still in progress."""
+        async def chunks():
+            while (chunk := await frames.get()) is not None:
+                yield chunk
+
+        # The turn this utterance becomes picks these timings up
+        timings = start_turn()
+        input_text = ""
+        with track("stt") as step:
+            async for transcript in stt_engine.astream(chunks()):
+                outbox.put_nowait({"type": "transcript" if transcript.is_final else "partial", "text": transcript.text})
+                input_text = transcript.text
+            step.bytes_out = len(input_text)
+        return input_text.strip(), timings
+
+    async def run_turns():
+        while True:
+            kind, payload = await turns.get()
+            try:
+                turn_started = time.perf_counter()
+                timings = start_turn()
+                if kind == "audio":
+                    input_text, stt_timings = await payload
+                    timings.update(stt_timings)
+                    if not input_text:
+                        continue
+                    input_data = await record_turn_input(thread_id, config, input_text)
+                elif kind == "text":
+                    input_data = await record_turn_input(thread_id, config, payload)
+                else:
+                    input_data = await record_turn_input(thread_id, config, None, started=True)
+
+                state = await run_until_audio(config, input_data)
+                audio_bytes = 0
+                first_byte_ms = None
+                async for event, data in astream_turn_audio(config, state):
+                    if event == "text":
+                        outbox.put_nowait({"type": "text", "text": data})
+                        continue
+                    if first_byte_ms is None:
+                        first_byte_ms = (time.perf_counter() - turn_started) * 1000
+                    audio_bytes += len(data)
+                    outbox.put_nowait(data)
+                outbox.put_nowait({
+                    "type": "turn_done",
+                    "first_byte_ms": round(first_byte_ms, 1) if first_byte_ms is not None else None,
+                    "last_byte_ms": round((time.perf_counter() - turn_started) * 1000, 1),
+                    "audio_bytes": audio_bytes,
+                    "timings_ms": {step: round(seconds * 1000, 1) for step, seconds in timings.items()}
+                })
+            except Exception as e:
+                logger.error(f"Error in call turn for thread {thread_id}: {e}")
+                outbox.put_nowait({"type": "error", "detail": str(e)})
+
+    sender = asyncio.create_task(send())
+    worker = asyncio.create_task(run_turns())
+    utterance: Optional[asyncio.Queue] = None
+    endpointer = Endpointer()
+    disconnected = False
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                disconnected = True
+                break
+            if message.get("bytes") is not None:
+                # Only speech goes to STT; the endpointer closes the turn after a pause
+                speech, ended = endpointer.push(message["bytes"])
+                if speech and utterance is None:
+                    utterance = asyncio.Queue()
+                    transcription = asyncio.create_task(transcribe(utterance))
+                    transcriptions.add(transcription)
+                    transcription.add_done_callback(transcriptions.discard)
+                    turns.put_nowait(("audio", transcription))
+                if speech:
+                    utterance.put_nowait(speech)
+                if ended and utterance is not None:
+                    utterance.put_nowait(None)
+                    utterance = None
+                continue
+
+            control = json.loads(message.get("text") or "{}")
+            if control.get("type") == "end_of_turn":
+                endpointer.reset()
+                if utterance is not None:
+                    utterance.put_nowait(None)
+                    utterance = None
+            elif control.get("type") == "text" and control.get("text"):
+                turns.put_nowait(("text", control["text"]))
+            elif control.get("type") == "start":
+                turns.put_nowait(("start", None))
+            elif control.get("type") == "hangup":
+                break
+    except WebSocketDisconnect:
+        disconnected = True
+    finally:
+        logger.info(f"Call ended for thread {thread_id}")
+        worker.cancel()
+        for transcription in transcriptions:
+            transcription.cancel()
+        outbox.put_nowait(None)
+        await asyncio.gather(worker, sender, *transcriptions, return_exceptions=True)
+        if not disconnected:
+            await websocket.close()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,103 @@
+"""
+Compares dispatcher turns sent as one multipart POST per turn (/api/chat, base64
+MP3 in JSON) with the same turns over the full-duplex WebSocket (/api/call),
+using stub providers.
+
+    cd backend && python -m benchmarks.call --turns 5 --utterance-seconds 3
+"""
+import os
+import time
+import uuid
+
+import click
+
+from benchmarks.stubs import install_stub_providers, synthetic_speech
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+
+def post_turns(client, turns: int, wav: bytes):
+    thread_id = str(uuid.uuid4())
+    client.post(f"/api/chat/{thread_id}").raise_for_status()
+
+    latencies, first_audio, sent, received = [], [], 0, 0
+    for _ in range(turns):
+        # The whole utterance is uploaded after the dispatcher stops talking
+        started = time.perf_counter()
+        response = client.post(f"/api/chat/{thread_id}", files={"audio": ("turn.wav", wav, "audio/wav")})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        # Nothing can play before the JSON body is complete
+        first_audio.append(latencies[-1])
+        sent += len(response.request.content)
+        received += len(response.content)
+    return latencies, first_audio, sent, received
+
+
+def websocket_turns(client, turns: int, pcm: bytes):
+    thread_id = str(uuid.uuid4())
+    frame_bytes = SAMPLE_RATE * 2 * FRAME_MS // 1000
+
+    latencies, first_audio, sent, received = [], [], 0, 0
+    with client.websocket_connect(f"/api/call/{thread_id}") as ws:
+        def drain(started: float = None) -> int:
+            size = 0
+            audio_seen = False
+            while True:
+                message = ws.receive()
+                if message.get("bytes") is not None:
+                    if started is not None and not audio_seen:
+                        first_audio.append(time.perf_counter() - started)
+                        audio_seen = True
+                    size += len(message["bytes"])
+                    continue
+                size += len(message["text"])
+                if '"turn_done"' in message["text"] or '"error"' in message["text"]:
+                    return size
+
+        ws.send_json({"type": "start"})
+        drain()
+        for _ in range(turns):
+            # Frames go out while the dispatcher is still talking; the turn starts when they stop
+            for i in range(0, len(pcm), frame_bytes):
+                ws.send_bytes(pcm[i:i + frame_bytes])
+            started = time.perf_counter()
+            ws.send_json({"type": "end_of_turn"})
+            received += drain(started)
+            latencies.append(time.perf_counter() - started)
+            sent += len(pcm)
+        ws.send_json({"type": "hangup"})
+    return latencies, first_audio, sent, received
+
+
+def report(name: str, latencies, first_audio, sent: int, received: int):
+    turns = len(latencies)
+    click.echo(
+        f"{name:<10} end of speech -> first audio {sum(first_audio) / turns * 1000:6.1f}ms, "
+        f"turn done {sum(latencies) / turns * 1000:6.1f}ms avg, "
+        f"sent {sent / turns / 1024:7.1f} KiB/turn, received {received / turns / 1024:6.1f} KiB/turn"
+    )
+
+
+@click.command()
+@click.option("--turns", default=5, help="Dispatcher turns per call after the opening line.")
+@click.option("--utterance-seconds", default=3.0, help="Length of each dispatcher utterance.")
+@click.option("--llm-latency", default=0.2, help="Stub Gemini latency in seconds.")
+@click.option("--tts-latency", default=0.2, help="Stub ElevenLabs TTS latency in seconds.")
+def main(turns, utterance_seconds, llm_latency, tts_latency):
+    install_stub_providers(llm_latency, tts_latency, voice_latency=0.1)
+    # Keep benchmark threads out of the on-disk checkpoint store
+    os.environ.setdefault("CHECKPOINT_DB", ":memory:")
+    import api
+    from core.transcription import pcm_to_wav
+    from fastapi.testclient import TestClient
+
+    pcm = synthetic_speech(utterance_seconds, SAMPLE_RATE)
+    with TestClient(api.app) as client:
+        report("post", *post_turns(client, turns, pcm_to_wav(pcm)))
+        report("websocket", *websocket_turns(client, turns, pcm))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Checkpoint size and update_state latency over a long call, with each turn's
+audio inlined in graph state as base64 (previous behaviour) versus stored in
+the blob store with only a reference in state. Stub providers, no latency.
+
+    cd backend && python -m benchmarks.checkpoints --turns 100 --audio-kb 60
+
+Checkpoints are not compacted during the run, as between maintenance passes.
+"""
+import base64
+import os
+import tempfile
+import time
+
+import click
+from langchain_core.messages import HumanMessage
+
+from benchmarks.stubs import install_stub_providers
+
+
+def inline_tts_update(state, audio_bytes: bytes):
+    return {
+        "final_audio": base64.b64encode(audio_bytes).decode("utf-8"),
+        "audio_history": state["audio_history"]
+    }
+
+
+def run_call(turns: int, audio_kb: int, tts_update, name: str, directory: str):
+    import agents.tts
+    from core.blobs import BlobStore
+    from core.checkpoint import TTLSqliteSaver
+    from core.graph import build_graph
+
+    store = BlobStore(os.path.join(directory, "blobs"))
+    agents.tts.blob_store = store
+    agents.tts.build_tts_update = tts_update
+
+    # Distinct audio per turn, so the blob store cannot deduplicate it
+    agents.tts.synthesize = lambda voice_id, text, previous_text=None: os.urandom(audio_kb * 1024)
+
+    memory = TTLSqliteSaver.from_path(os.path.join(directory, f"{name}.db"))
+    graph = build_graph(is_cli=False, checkpointer=memory)
+    config = {"configurable": {"thread_id": "benchmark"}}
+
+    graph.invoke({"scenario": None, "voice_definition": None, "current_text": None, "audio_history": [], "final_audio": None, "messages": []}, config)
+    rows = []
+    for turn in range(1, turns + 1):
+        started = time.perf_counter()
+        graph.update_state(config, {"messages": [HumanMessage(content=f"Stay with me, help is on the way. ({turn})")]})
+        update_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        graph.invoke(None, config)
+        turn_ms = (time.perf_counter() - started) * 1000
+
+        stats = memory.stats()
+        rows.append((turn, update_ms, turn_ms, stats["checkpoint_bytes"] + stats["write_bytes"]))
+    memory.conn.close()
+    return rows
+
+
+@click.command()
+@click.option("--turns", default=100, help="Dispatcher turns in the simulated call.")
+@click.option("--audio-kb", default=60, help="MP3 size per victim line (60 KiB is about 4s at 128 kbps).")
+def main(turns, audio_kb):
+    install_stub_providers(llm_latency=0, tts_latency=0, voice_latency=0)
+    from agents.tts import build_tts_update
+
+    with tempfile.TemporaryDirectory() as directory:
+        inline = run_call(turns, audio_kb, inline_tts_update, "inline", directory)
+        blobs = run_call(turns, audio_kb, build_tts_update, "blobs", directory)
+
+    click.echo(f"{'turn':>4} | {'inline MiB':>10} {'update ms':>9} {'turn ms':>8} | {'blobs MiB':>9} {'update ms':>9} {'turn ms':>8}")
+    for (turn, i_update, i_turn, i_bytes), (_, b_update, b_turn, b_bytes) in zip(inline, blobs):
+        if turn == 1 or turn % 10 == 0:
+            click.echo(f"{turn:>4} | {i_bytes / 2**20:>10.2f} {i_update:>9.2f} {i_turn:>8.2f} | {b_bytes / 2**20:>9.2f} {b_update:>9.2f} {b_turn:>8.2f}")
+
+    def mean(rows, column):
+        return sum(r[column] for r in rows) / len(rows)
+
+    click.echo(f"mean update_state: inline {mean(inline, 1):.2f}ms, blobs {mean(blobs, 1):.2f}ms")
+    click.echo(f"mean turn: inline {mean(inline, 2):.2f}ms, blobs {mean(blobs, 2):.2f}ms")
+    click.echo(f"checkpoint store after {turns} turns: inline {inline[-1][3] / 2**20:.2f} MiB, blobs {blobs[-1][3] / 2**20:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
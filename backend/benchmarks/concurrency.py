@@ -0,0 +1,73 @@
+"""
+Runs N simulated training calls in parallel against one API worker with stub
+providers and checks that they overlap instead of serializing on the event loop.
+
+    cd backend && python -m benchmarks.concurrency --sessions 20 --turns 3
+"""
+import asyncio
+import os
+import time
+import uuid
+
+import click
+import httpx
+
+from benchmarks.stubs import install_stub_providers
+
+
+async def run_session(client: httpx.AsyncClient, turns: int) -> float:
+    thread_id = str(uuid.uuid4())
+    started = time.perf_counter()
+
+    response = await client.post(f"/api/chat/{thread_id}")
+    response.raise_for_status()
+    for i in range(turns):
+        response = await client.post(f"/api/chat/{thread_id}", data={"text": f"Where are you? ({i})"})
+        response.raise_for_status()
+
+    return time.perf_counter() - started
+
+
+async def run(sessions: int, turns: int):
+    # Keep benchmark threads out of the on-disk checkpoint store
+    os.environ.setdefault("CHECKPOINT_DB", ":memory:")
+    import api
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # One session alone gives the serialized cost per session
+        single = await run_session(client, turns)
+
+        started = time.perf_counter()
+        durations = await asyncio.gather(*(run_session(client, turns) for _ in range(sessions)))
+        wall = time.perf_counter() - started
+
+    return single, wall, durations
+
+
+@click.command()
+@click.option("--sessions", default=20, help="Number of concurrent training calls.")
+@click.option("--turns", default=3, help="Dispatcher turns per call after the opening line.")
+@click.option("--llm-latency", default=0.5, help="Stub Gemini latency in seconds.")
+@click.option("--tts-latency", default=0.3, help="Stub ElevenLabs TTS latency in seconds.")
+@click.option("--voice-latency", default=1.0, help="Stub voice design/create latency in seconds.")
+def main(sessions, turns, llm_latency, tts_latency, voice_latency):
+    install_stub_providers(llm_latency, tts_latency, voice_latency)
+
+    single, wall, durations = asyncio.run(run(sessions, turns))
+    serialized = single * sessions
+    speedup = serialized / wall
+
+    click.echo(f"sessions={sessions} turns={turns}")
+    click.echo(f"single session: {single:.2f}s")
+    click.echo(f"concurrent wall time: {wall:.2f}s (serialized would be {serialized:.2f}s, speedup {speedup:.1f}x)")
+    click.echo(f"slowest session: {max(durations):.2f}s")
+
+    # Sessions only overlap if no node blocks the event loop
+    if sessions > 1 and wall > serialized / 2:
+        raise click.ClickException("Sessions were serialized: a node is blocking the event loop")
+    click.echo("OK")
+
+
+if __name__ == "__main__":
+    main()
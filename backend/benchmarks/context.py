@@ -0,0 +1,66 @@
+"""
+Prompt size and response latency per turn over a long call, with the full
+history in every prompt versus the bounded window + rolling summary.
+Stub Gemini latency grows with prompt tokens (--ms-per-1k-tokens).
+
+    cd backend && python -m benchmarks.context --turns 50
+"""
+import time
+
+import click
+from langchain_core.messages import HumanMessage
+
+from benchmarks.stubs import StubGenerativeModel, install_stub_providers
+
+SCENARIO = {"victim_persona": "You are Arthur, 82 years old. You have fallen in your kitchen and cannot get up. You smell smoke."}
+
+
+def run_call(turns: int, context_messages: int):
+    import agents.context
+    from agents.scenario import generate_response_node
+
+    agents.context.CONTEXT_MESSAGES = context_messages
+    agents.context.FOLD_BATCH = max(2, context_messages // 2)
+
+    state = {"scenario": SCENARIO, "messages": [], "summary": None, "summarized_count": 0}
+    rows = []
+    for turn in range(1, turns + 1):
+        state["messages"] = state["messages"] + [HumanMessage(content=f"Okay sir, stay with me. Can you tell me what you see around you right now? ({turn})")]
+
+        StubGenerativeModel.calls.clear()
+        started = time.perf_counter()
+        update = generate_response_node(state)
+        latency = time.perf_counter() - started
+
+        prompt_tokens = sum(tokens for _, tokens in StubGenerativeModel.calls)
+        rows.append((turn, prompt_tokens, latency))
+
+        state["messages"] = state["messages"] + update["messages"]
+        state["summary"] = update.get("summary", state["summary"])
+        state["summarized_count"] = update.get("summarized_count", state["summarized_count"])
+    return rows
+
+
+@click.command()
+@click.option("--turns", default=50, help="Dispatcher turns in the simulated call.")
+@click.option("--context-messages", default=12, help="Verbatim window for the bounded run.")
+@click.option("--latency", default=0.2, help="Stub Gemini base latency in seconds.")
+@click.option("--ms-per-1k-tokens", default=40.0, help="Stub Gemini latency per 1k prompt tokens.")
+def main(turns, context_messages, latency, ms_per_1k_tokens):
+    install_stub_providers(llm_latency=latency)
+    StubGenerativeModel.latency_per_1k_tokens = ms_per_1k_tokens / 1000
+
+    full = run_call(turns, 0)
+    bounded = run_call(turns, context_messages)
+
+    click.echo(f"{'turn':>4} | {'full tokens':>11} {'full s':>7} | {'bounded tokens':>14} {'bounded s':>9}")
+    for (turn, full_tokens, full_latency), (_, bounded_tokens, bounded_latency) in zip(full, bounded):
+        if turn == 1 or turn % 5 == 0:
+            click.echo(f"{turn:>4} | {full_tokens:>11} {full_latency:>7.3f} | {bounded_tokens:>14} {bounded_latency:>9.3f}")
+
+    click.echo(f"total prompt tokens: full {sum(r[1] for r in full)}, bounded {sum(r[1] for r in bounded)}")
+    click.echo(f"total response time: full {sum(r[2] for r in full):.2f}s, bounded {sum(r[2] for r in bounded):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
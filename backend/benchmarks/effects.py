@@ -0,0 +1,45 @@
+"""
+Throughput of the telephone effects chain (core/dsp.py) on one core, fed in
+the block sizes a streamed TTS response arrives in.
+
+    cd backend && python -m benchmarks.effects --seconds 120 --min-speedup 20
+
+Reports audio-seconds processed per CPU-second; fails if any block size is
+below --min-speedup.
+"""
+import time
+
+import click
+import numpy as np
+
+from benchmarks.stubs import synthetic_speech
+from core.dsp import EFFECTS_SAMPLE_RATE, TelephoneLine
+
+
+@click.command()
+@click.option("--seconds", default=120.0, help="Audio to process per block size.")
+@click.option("--block-ms", "block_sizes", multiple=True, type=int, default=(20, 100, 500, 2000), help="Block sizes to test.")
+@click.option("--min-speedup", default=20.0, help="Required audio-seconds per CPU-second.")
+def main(seconds, block_sizes, min_speedup):
+    samples = np.frombuffer(synthetic_speech(seconds, EFFECTS_SAMPLE_RATE), dtype=np.int16).astype(np.float32) / 32768.0
+    audio_seconds = len(samples) / EFFECTS_SAMPLE_RATE
+
+    slowest = None
+    for block_ms in block_sizes:
+        block = EFFECTS_SAMPLE_RATE * block_ms // 1000
+        line = TelephoneLine(EFFECTS_SAMPLE_RATE, seed=0)
+        started = time.process_time()
+        for i in range(0, len(samples), block):
+            line.process(samples[i:i + block])
+        cpu = time.process_time() - started
+        speedup = audio_seconds / cpu
+        slowest = speedup if slowest is None else min(slowest, speedup)
+        click.echo(f"block {block_ms:5d}ms: {speedup:8.1f} audio-s per CPU-s ({cpu * 1000 / audio_seconds:.3f}ms CPU per audio-second)")
+
+    if slowest < min_speedup:
+        raise click.ClickException(f"Effects chain too slow: {slowest:.1f}x real time < {min_speedup}x")
+    click.echo("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Local stand-ins for the Gemini REST API and the ElevenLabs API, so the real
+provider clients can be load tested without spending quota. One server
+answers both: Gemini under /v1beta, ElevenLabs under /v1.
+
+    cd backend && python -m benchmarks.fake_providers --port 8100 --gemini-latency lognormal:0.8,0.4
+
+then start the API with GEMINI_BASE_URL=http://127.0.0.1:8100 and
+ELEVENLABS_BASE_URL=http://127.0.0.1:8100.
+
+Latencies are distributions: "fixed:S", "uniform:LOW,HIGH" or
+"lognormal:MEDIAN,SIGMA" (seconds). Replies reuse the stub texts.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+import click
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from benchmarks.stubs import STUB_REPLY, STUB_SCENARIO
+
+
+@dataclass
+class Latency:
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, values = spec.partition(":")
+        if not values:
+            kind, values = "fixed", kind
+        numbers = [float(v) for v in values.split(",")]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise click.BadParameter(f"unknown latency distribution '{kind}'")
+        return cls(kind, numbers[0], numbers[1] if len(numbers) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return rng.lognormvariate(0.0, self.b) * self.a
+        return self.a
+
+
+@dataclass
+class FakeProviderConfig:
+    # Whole response time for generateContent; spread over the chunks when streaming
+    gemini_latency: Latency = field(default_factory=lambda: Latency("fixed", 0.5))
+    gemini_error_rate: float = 0.0
+    # Time to the first TTS chunk, then the time to send the rest
+    tts_first_chunk: Latency = field(default_factory=lambda: Latency("fixed", 0.2))
+    tts_latency: Latency = field(default_factory=lambda: Latency("fixed", 0.3))
+    tts_chunks: int = 8
+    tts_chunk_bytes: int = 4096
+    voice_latency: Latency = field(default_factory=lambda: Latency("fixed", 1.0))
+    elevenlabs_error_rate: float = 0.0
+    seed: int = 0
+
+
+def gemini_reply(body: dict) -> str:
+    """Same answers as StubGenerativeModel, picked from the REST request body."""
+    parts = [part for content in body.get("contents", []) for part in content.get("parts", [])]
+    if any("inlineData" in part or "inline_data" in part for part in parts):
+        return "Where is the fire?"
+    text = " ".join(part.get("text", "") for part in parts)
+    if "Scenario Engine" in text:
+        return json.dumps(STUB_SCENARIO)
+    if "running summary" in text:
+        return "Arthur, 82, fell in his kitchen and smells smoke. The dispatcher is keeping him calm and asking for his address."
+    config = body.get("generationConfig") or body.get("generation_config") or {}
+    if (config.get("responseMimeType") or config.get("response_mime_type")) == "text/plain":
+        return STUB_REPLY
+    return json.dumps({"spoken_response": STUB_REPLY})
+
+
+def gemini_candidate(text: str, finished: bool) -> dict:
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate]}
+
+
+def create_app(config: FakeProviderConfig) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(config.seed)
+    app.state.requests = {"gemini": 0, "elevenlabs": 0, "errors": 0}
+
+    def fail(rate: float) -> bool:
+        if rate and rng.random() < rate:
+            app.state.requests["errors"] += 1
+            return True
+        return False
+
+    def gemini_error():
+        return JSONResponse({"error": {"code": 503, "message": "The model is overloaded (fake).", "status": "UNAVAILABLE"}}, status_code=503)
+
+    def elevenlabs_error():
+        return JSONResponse({"detail": {"status": "too_many_concurrent_requests", "message": "Fake rate limit."}}, status_code=429)
+
+    # --- Gemini (REST transport) ----------------------------------------
+
+    @app.get("/v1beta/models/{model}")
+    async def get_model(model: str):
+        return {"name": f"models/{model}", "baseModelId": model, "version": "fake", "displayName": model,
+                "inputTokenLimit": 1048576, "outputTokenLimit": 65536, "supportedGenerationMethods": ["generateContent"]}
+
+    @app.post("/v1beta/cachedContents")
+    async def create_cached_content():
+        # The prompt cache falls back to its local prefix reuse
+        return JSONResponse({"error": {"code": 400, "message": "Caching is not supported by the fake.", "status": "INVALID_ARGUMENT"}}, status_code=400)
+
+    @app.post("/v1beta/models/{model_action:path}")
+    async def generate_content(model_action: str, request: Request):
+        app.state.requests["gemini"] += 1
+        body = await request.json()
+        latency = config.gemini_latency.sample(rng)
+        if fail(config.gemini_error_rate):
+            await asyncio.sleep(latency / 4)
+            return gemini_error()
+
+        reply = gemini_reply(body)
+        if not model_action.endswith(":streamGenerateContent"):
+            await asyncio.sleep(latency)
+            return gemini_candidate(reply, finished=True)
+
+        words = reply.split(" ")
+
+        async def stream():
+            # The REST transport reads one JSON array, element by element
+            for i, word in enumerate(words):
+                await asyncio.sleep(latency / len(words))
+                last = i == len(words) - 1
+                element = json.dumps(gemini_candidate(word if last else word + " ", finished=last))
+                yield ("[" if i == 0 else ",") + element + ("]" if last else "\n")
+
+        return StreamingResponse(stream(), media_type="application/json")
+
+    # --- ElevenLabs -----------------------------------------------------
+
+    @app.head("/")
+    @app.get("/")
+    async def root():
+        return Response()
+
+    async def tts(streaming: bool):
+        app.state.requests["elevenlabs"] += 1
+        first_chunk = config.tts_first_chunk.sample(rng)
+        rest = config.tts_latency.sample(rng)
+        if fail(config.elevenlabs_error_rate):
+            await asyncio.sleep(first_chunk)
+            return elevenlabs_error()
+
+        chunk = b"\xff\xf3" + b"\x00" * (config.tts_chunk_bytes - 2)
+
+        async def audio():
+            await asyncio.sleep(first_chunk)
+            yield chunk
+            for _ in range(config.tts_chunks - 1):
+                await asyncio.sleep(rest / max(1, config.tts_chunks - 1))
+                yield chunk
+
+        if streaming:
+            return StreamingResponse(audio(), media_type="audio/mpeg")
+        return Response(b"".join([c async for c in audio()]), media_type="audio/mpeg")
+
+    @app.post("/v1/text-to-speech/{voice_id}/stream")
+    async def text_to_speech_stream(voice_id: str):
+        return await tts(streaming=True)
+
+    @app.post("/v1/text-to-speech/{voice_id}")
+    async def text_to_speech(voice_id: str):
+        return await tts(streaming=False)
+
+    @app.post("/v1/text-to-voice/design")
+    async def design_voice():
+        app.state.requests["elevenlabs"] += 1
+        await asyncio.sleep(config.voice_latency.sample(rng))
+        if fail(config.elevenlabs_error_rate):
+            return elevenlabs_error()
+        return {
+            "previews": [{"audio_base_64": "", "generated_voice_id": f"fake_preview_{i}", "media_type": "audio/mpeg", "duration_secs": 3.0, "language": "en"} for i in range(3)],
+            "text": "fake"
+        }
+
+    @app.post("/v1/text-to-voice")
+    async def create_voice():
+        app.state.requests["elevenlabs"] += 1
+        await asyncio.sleep(config.voice_latency.sample(rng) / 2)
+        if fail(config.elevenlabs_error_rate):
+            return elevenlabs_error()
+        return {"voice_id": f"fake_voice_{rng.randrange(10**6)}", "name": "fake"}
+
+    return app
+
+
+class FakeProviderServer:
+    """Runs the fake providers with uvicorn in a background thread."""
+
+    def __init__(self, config: FakeProviderConfig, host: str = "127.0.0.1", port: int = 0):
+        self.app = create_app(config)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning", access_log=False))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeProviderServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join()
+
+    def stats(self) -> dict:
+        return dict(self.app.state.requests)
+
+
+def config_options(fn):
+    """Shared click options for the fake provider behaviour."""
+    options = [
+        click.option("--gemini-latency", default="lognormal:0.8,0.3", help="Gemini response time distribution."),
+        click.option("--gemini-error-rate", default=0.0, help="Fraction of Gemini calls answered with 503."),
+        click.option("--tts-first-chunk", default="lognormal:0.25,0.3", help="ElevenLabs time to first audio chunk."),
+        click.option("--tts-latency", default="uniform:0.2,0.6", help="ElevenLabs time for the remaining chunks."),
+        click.option("--tts-chunks", default=8, help="Audio chunks per TTS response."),
+        click.option("--voice-latency", default="fixed:1.0", help="ElevenLabs voice design time."),
+        click.option("--elevenlabs-error-rate", default=0.0, help="Fraction of ElevenLabs calls answered with 429."),
+        click.option("--seed", default=0, help="Random seed for latencies and errors."),
+    ]
+    for option in reversed(options):
+        fn = option(fn)
+    return fn
+
+
+def build_config(gemini_latency, gemini_error_rate, tts_first_chunk, tts_latency, tts_chunks, voice_latency, elevenlabs_error_rate, seed) -> FakeProviderConfig:
+    return FakeProviderConfig(
+        gemini_latency=Latency.parse(gemini_latency),
+        gemini_error_rate=gemini_error_rate,
+        tts_first_chunk=Latency.parse(tts_first_chunk),
+        tts_latency=Latency.parse(tts_latency),
+        tts_chunks=tts_chunks,
+        voice_latency=Latency.parse(voice_latency),
+        elevenlabs_error_rate=elevenlabs_error_rate,
+        seed=seed
+    )
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=8100)
+@config_options
+def main(host, port, **options):
+    uvicorn.run(create_app(build_config(**options)), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Session start latency with voice design run before the opening line
+(sequential) and alongside it (fan_out, the default graph), using stub
+providers. A follow-up dispatcher turn is timed too; it skips voice design
+and should be the same in both graphs.
+
+    cd backend && python -m benchmarks.first_turn --sessions 5 --llm-latency 1.0 --voice-latency 1.0
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+import click
+
+from benchmarks.stubs import install_stub_providers
+
+START = {
+    "scenario": None,
+    "voice_definition": None,
+    "current_text": None,
+    "audio_history": [],
+    "final_audio": None,
+    "messages": []
+}
+
+
+async def run_session(graph) -> tuple:
+    from langchain_core.messages import HumanMessage
+    from core.metrics import start_turn
+
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    timings = start_turn()
+    started = time.perf_counter()
+    async for _ in graph.astream(START, config):
+        pass
+    first = time.perf_counter() - started
+
+    await graph.aupdate_state(config, {"messages": [HumanMessage(content="Where are you?")]}, as_node="audio_effects")
+    start_turn()
+    started = time.perf_counter()
+    async for _ in graph.astream(None, config):
+        pass
+    follow_up = time.perf_counter() - started
+    # Step timings of the session start only
+    return first, follow_up, timings
+
+
+async def run_mode(fan_out: bool, sessions: int):
+    from core.checkpoint import TTLSqliteSaver
+    from core.graph import build_graph
+
+    graph = build_graph(is_cli=False, checkpointer=TTLSqliteSaver.from_path(":memory:"), fan_out=fan_out)
+    return [await run_session(graph) for _ in range(sessions)]
+
+
+@click.command()
+@click.option("--sessions", default=5, help="Session starts per graph; medians are reported.")
+@click.option("--llm-latency", default=1.0, help="Stub Gemini latency in seconds.")
+@click.option("--tts-latency", default=0.3, help="Stub ElevenLabs TTS latency in seconds.")
+@click.option("--voice-latency", default=0.5, help="Stub voice design/create latency in seconds (each).")
+def main(sessions, llm_latency, tts_latency, voice_latency):
+    install_stub_providers(llm_latency, tts_latency, voice_latency)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Keep the designed voices out of the local scenario database
+        os.environ["SCENARIO_DB"] = os.path.join(directory, "scenarios.db")
+        from core.db import create_db_and_tables
+        create_db_and_tables()
+
+        click.echo(f"{'graph':<11} {'first turn s':>12} {'follow-up s':>11} {'voice s':>8} {'reply s':>8}")
+        firsts = {}
+        for name, fan_out in (("sequential", False), ("fan_out", True)):
+            results = asyncio.run(run_mode(fan_out, sessions))
+            firsts[name] = statistics.median(first for first, _, _ in results)
+            follow_up = statistics.median(follow_up for _, follow_up, _ in results)
+            voice = statistics.median(timings.get("voice_designer", 0.0) for _, _, timings in results)
+            reply = statistics.median(timings.get("generate_response", 0.0) for _, _, timings in results)
+            click.echo(f"{name:<11} {firsts[name]:>12.2f} {follow_up:>11.2f} {voice:>8.2f} {reply:>8.2f}")
+
+    saved = firsts["sequential"] - firsts["fan_out"]
+    click.echo(f"session start {saved:.2f}s faster ({saved / firsts['sequential']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
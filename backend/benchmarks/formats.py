@@ -0,0 +1,93 @@
+"""
+Payload size and serialization cost of the /api/chat representations:
+JSON with base64 audio, raw audio/mpeg, and multipart/mixed.
+
+    cd backend && python -m benchmarks.formats --audio-kb 60 --iterations 500
+
+"server" is rendering the response body, "client" is getting text and MP3
+bytes back out of it; "request" is a full turn through the app with stub
+providers and no provider latency.
+"""
+import base64
+import email.parser
+import json
+import os
+import tempfile
+import time
+from urllib.parse import unquote
+
+import click
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from benchmarks.stubs import install_stub_providers
+
+ACCEPT = {"json": "application/json", "audio": "audio/mpeg", "multipart": "multipart/mixed"}
+
+
+def body_of(api, response_format: str, text: str, ref: dict):
+    response = api.render_chat_response(response_format, "benchmark", text, ref, api.blob_store.resolve(ref))
+    if isinstance(response, api.ChatResponse):
+        # What FastAPI does with a response_model return value
+        response = JSONResponse(jsonable_encoder(response))
+    return response.body, response.headers
+
+
+def parse(response_format: str, body: bytes, headers) -> bytes:
+    if response_format == "json":
+        return base64.b64decode(json.loads(body)["audio"])
+    if response_format == "audio":
+        unquote(headers["x-victim-text"])
+        return body
+    message = email.parser.BytesParser().parsebytes(f"Content-Type: {headers['content-type']}\r\n\r\n".encode("utf-8") + body)
+    parts = message.get_payload()
+    json.loads(parts[0].get_payload())
+    return parts[1].get_payload(decode=True)
+
+
+def timed(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+@click.command()
+@click.option("--audio-kb", default=60, help="MP3 size of the victim line (60 KiB is about 4s at 128 kbps).")
+@click.option("--iterations", default=500, help="Repetitions for the serialization timings.")
+@click.option("--requests", default=50, help="Full turns per format through the app.")
+def main(audio_kb, iterations, requests):
+    os.environ.setdefault("CHECKPOINT_DB", ":memory:")
+    os.environ.setdefault("BLOB_STORE_DIR", tempfile.mkdtemp())
+    install_stub_providers(llm_latency=0, tts_latency=0, voice_latency=0)
+    import agents.tts
+    import api
+
+    audio = os.urandom(audio_kb * 1024)
+    agents.tts.synthesize = lambda voice_id, text, previous_text=None: audio
+    text = "Oh god... the smoke! I can't get up... PLEASE hurry!"
+    ref = api.blob_store.put(audio)
+
+    click.echo(f"victim line: {len(audio) / 1024:.1f} KiB of MP3")
+    click.echo(f"{'format':<10} {'payload KiB':>11} {'overhead':>8} {'server ms':>9} {'client ms':>9} {'request ms':>10}")
+    with TestClient(api.app) as client:
+        client.post("/api/chat/benchmark").raise_for_status()
+        for response_format, accept in ACCEPT.items():
+            body, headers = body_of(api, response_format, text, ref)
+            assert parse(response_format, body, headers) == audio
+
+            server_ms = timed(lambda: body_of(api, response_format, text, ref), iterations)
+            client_ms = timed(lambda: parse(response_format, body, headers), iterations)
+
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.post("/api/chat/benchmark", data={"text": "Stay with me."}, headers={"Accept": accept}).raise_for_status()
+            request_ms = (time.perf_counter() - started) / requests * 1000
+
+            overhead = (len(body) - len(audio)) / len(audio) * 100
+            click.echo(f"{response_format:<10} {len(body) / 1024:>11.1f} {overhead:>7.1f}% {server_ms:>9.3f} {client_ms:>9.3f} {request_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Capacity test for one API worker: starts the fake Gemini/ElevenLabs server
+(benchmarks/fake_providers.py), starts `uvicorn api:app` pointed at it, and
+drives N concurrent simulated trainees through full /api/chat sessions:
+start, several text/audio turns, hang-up.
+
+    cd backend && python -m benchmarks.load --trainees 50 --turns 6
+    cd backend && python -m benchmarks.load --trainees 100 --gemini-error-rate 0.02 --pipelined
+
+Reports p50/p95/p99 turn latency (per turn kind and overall), throughput,
+errors, and the worker's CPU and memory, read from /proc (Linux).
+"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import click
+import httpx
+
+from benchmarks.fake_providers import FakeProviderServer, build_config, config_options
+from benchmarks.stubs import synthetic_speech
+from core.transcription import pcm_to_wav
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DISPATCHER_LINES = [
+    "911, what is the address of your emergency?",
+    "Okay, stay on the line with me. Are you hurt?",
+    "Is anyone else in the house with you?",
+    "Can you get to a door or a window?",
+    "Help is on the way, keep talking to me.",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class WorkerMonitor:
+    """Samples CPU time and resident memory of a process from /proc."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.peak_rss = 0
+
+    def cpu_seconds(self) -> float:
+        with open(f"/proc/{self.pid}/stat") as f:
+            # Fields after the parenthesized command name; utime and stime are 14 and 15
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def rss_bytes(self) -> int:
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    async def sample(self, interval: float = 0.25):
+        while True:
+            self.peak_rss = max(self.peak_rss, self.rss_bytes())
+            await asyncio.sleep(interval)
+
+
+async def run_trainee(client: httpx.AsyncClient, turns: int, audio_ratio: float, think_time: float, wav: bytes, rng: random.Random, results: list):
+    thread_id = str(uuid.uuid4())
+
+    async def turn(kind: str, **request):
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"/api/chat/{thread_id}", **request)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        results.append((kind, time.perf_counter() - started, ok))
+        return ok
+
+    if not await turn("start"):
+        return
+    for i in range(turns):
+        await asyncio.sleep(rng.uniform(0, 2 * think_time))
+        if rng.random() < audio_ratio:
+            await turn("audio", files={"audio": ("turn.wav", wav, "audio/wav")})
+        else:
+            await turn("text", data={"text": DISPATCHER_LINES[i % len(DISPATCHER_LINES)]})
+    # The API has no session teardown; the trainee says goodbye and disconnects
+    await turn("hangup", data={"text": "Officers are at your door now, I'm going to hang up."})
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def drive(base_url: str, monitor: WorkerMonitor, trainees: int, turns: int, audio_ratio: float, think_time: float, ramp: float, seed: int):
+    wav = pcm_to_wav(synthetic_speech(2.0))
+    results = []
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=trainees, max_keepalive_connections=trainees)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        sampler = asyncio.create_task(monitor.sample())
+        cpu_before = monitor.cpu_seconds()
+        started = time.perf_counter()
+
+        async def delayed(i: int):
+            await asyncio.sleep(ramp * i / max(1, trainees))
+            await run_trainee(client, turns, audio_ratio, think_time, wav, random.Random(rng.random()), results)
+
+        await asyncio.gather(*(delayed(i) for i in range(trainees)))
+        wall = time.perf_counter() - started
+        cpu = monitor.cpu_seconds() - cpu_before
+        sampler.cancel()
+    return results, wall, cpu
+
+
+def worker_env(providers_url: str, directory: str, pipelined: bool = False) -> dict:
+    """Environment for an API worker that talks to the fake providers and keeps its state in `directory`."""
+    return {
+        **os.environ,
+        "GEMINI_BASE_URL": providers_url,
+        "ELEVENLABS_BASE_URL": providers_url,
+        "GEMINI_API_KEY": "fake",
+        "ELEVENLABS_API_KEY": "fake",
+        "STT_ENGINE": "gemini",
+        "CHECKPOINT_DB": os.path.join(directory, "checkpoints.db"),
+        "BLOB_STORE_DIR": os.path.join(directory, "blobs"),
+        "SCENARIO_POOL_SIZE": "0",
+        # Every turn should reach the fake providers, and the fake audio is not real MP3
+        "TTS_CACHE": "0",
+        "AUDIO_EFFECTS": "0",
+        "PIPELINED_RESPONSE": "1" if pipelined else "0",
+    }
+
+
+def start_worker(port: int, providers_url: str, directory: str, pipelined: bool) -> subprocess.Popen:
+    env = worker_env(providers_url, directory, pipelined)
+    # The worker logs every provider request; keep that out of the report
+    log_path = os.path.join(directory, "worker.log")
+    with open(log_path, "wb") as log:
+        worker = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            env=env, cwd=BACKEND_DIR, stdout=log, stderr=subprocess.STDOUT
+        )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if worker.poll() is not None:
+            with open(log_path, errors="replace") as log:
+                raise click.ClickException(f"API worker exited with code {worker.returncode}:\n{log.read()[-2000:]}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/readyz", timeout=1).raise_for_status()
+            return worker
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    worker.terminate()
+    raise click.ClickException("API worker did not come up within 60s")
+
+
+@click.command()
+@click.option("--trainees", default=50, help="Concurrent simulated trainees.")
+@click.option("--turns", default=6, help="Dispatcher turns per session between start and hang-up.")
+@click.option("--audio-ratio", default=0.3, help="Fraction of turns sent as recorded audio instead of text.")
+@click.option("--think-time", default=1.0, help="Mean pause between a reply and the next dispatcher turn, in seconds.")
+@click.option("--ramp", default=5.0, help="Seconds over which trainees join.")
+@click.option("--pipelined", is_flag=True, help="Run the worker with PIPELINED_RESPONSE=1.")
+@config_options
+def main(trainees, turns, audio_ratio, think_time, ramp, pipelined, **provider_options):
+    fake = FakeProviderServer(build_config(**provider_options)).start()
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        worker = start_worker(port, fake.base_url, directory, pipelined)
+        try:
+            monitor = WorkerMonitor(worker.pid)
+            idle_rss = monitor.rss_bytes()
+            results, wall, cpu = asyncio.run(drive(f"http://127.0.0.1:{port}", monitor, trainees, turns, audio_ratio, think_time, ramp, provider_options["seed"]))
+        finally:
+            worker.terminate()
+            worker.wait()
+    fake.stop()
+
+    ok = [r for r in results if r[2]]
+    click.echo(f"{trainees} trainees x ({turns} turns + start + hang-up), pipelined: {pipelined}")
+    click.echo(f"{'kind':<8} {'turns':>6} {'errors':>6} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7}")
+    for kind in ("start", "text", "audio", "hangup", "all"):
+        rows = [r for r in results if kind == "all" or r[0] == kind]
+        latencies = [r[1] for r in rows if r[2]]
+        if not rows:
+            continue
+        errors = len(rows) - len(latencies)
+        if latencies:
+            click.echo(f"{kind:<8} {len(rows):>6} {errors:>6} {percentile(latencies, 50):>7.2f} {percentile(latencies, 95):>7.2f} {percentile(latencies, 99):>7.2f}")
+        else:
+            click.echo(f"{kind:<8} {len(rows):>6} {errors:>6}")
+    click.echo(f"throughput: {len(ok) / wall:.1f} turns/s over {wall:.1f}s ({len(results) - len(ok)} failed)")
+    click.echo(f"worker: {cpu / wall * 100:.0f}% of a core on average, RSS {idle_rss / 2**20:.0f} MiB idle, {monitor.peak_rss / 2**20:.0f} MiB peak")
+    click.echo(f"fake providers: {fake.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compares one victim turn generated sequentially (generate_response -> tts)
+with the sentence-pipelined node, using stub providers.
+
+    cd backend && python -m benchmarks.pipelined --llm-latency 2.0 --tts-latency 0.6
+"""
+import time
+
+import click
+
+from benchmarks.stubs import install_stub_providers
+
+STATE = {
+    "scenario": {"victim_persona": "You are Arthur, 82 years old. You smell smoke."},
+    "voice_definition": {"voice_id": "stub_voice_id"},
+    "current_text": None,
+    "audio_history": [],
+    "final_audio": None,
+    "messages": []
+}
+
+
+@click.command()
+@click.option("--llm-latency", default=2.0, help="Stub Gemini time for the whole reply, in seconds.")
+@click.option("--tts-latency", default=0.6, help="Stub ElevenLabs time per request, in seconds.")
+def main(llm_latency, tts_latency):
+    install_stub_providers(llm_latency, tts_latency)
+
+    from agents.scenario import generate_response_node
+    from agents.tts import tts_node
+    from agents.pipelined_response import stream_reply
+
+    started = time.perf_counter()
+    state = {**STATE, **generate_response_node(STATE)}
+    tts_node(state)
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    first_audio = None
+    segments = 0
+    for _sentence, _audio in stream_reply(STATE):
+        segments += 1
+        if first_audio is None:
+            first_audio = time.perf_counter() - started
+    pipelined = time.perf_counter() - started
+
+    click.echo(f"sequential: first audio {sequential:.2f}s, turn {sequential:.2f}s")
+    click.echo(f"pipelined:  first audio {first_audio:.2f}s, turn {pipelined:.2f}s ({segments} segments)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compares the /process-audio request path before and after moving it in memory:
+the old handler spooled the upload to a temp file, reopened it for STT and
+decoded it again for playback; the new one works on the request buffer with a
+single decode. Playback and the mic turn are stubbed out, STT is a no-op.
+
+    cd backend && python -m benchmarks.process_audio --requests 50
+    cd backend && python -m benchmarks.process_audio --audio sample.mp3 --pcm-engine
+
+Disk I/O is read from /proc/self/io (Linux): bytes moved through read/write
+syscalls, the number of write syscalls, and bytes that reached the block layer.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import click
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from pydub import AudioSegment
+
+from benchmarks.stubs import synthetic_speech
+from core.transcription import STTEngine, pcm_to_wav, to_pcm16
+import core.server as server
+
+
+class StubSTT(STTEngine):
+    name = "stub"
+
+    def __init__(self, needs_pcm: bool):
+        self.needs_pcm = needs_pcm
+
+    def transcribe(self, audio: bytes, mime_type: str = "audio/wav") -> str:
+        if self.needs_pcm:
+            to_pcm16(audio)
+        return "Where is the fire?"
+
+
+def legacy_app(stt: StubSTT) -> FastAPI:
+    """The previous /process-audio handler, minus playback and the mic turn."""
+    app = FastAPI()
+
+    def transcribe_file(file_path: str, mime_type: str) -> str:
+        with open(file_path, "rb") as audio_file:
+            return stt.transcribe(audio_file.read(), mime_type)
+
+    @app.post("/process-audio")
+    async def process_audio(file: UploadFile = File(...)):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mp3_path = os.path.join(temp_dir, "input.mp3")
+            with open(mp3_path, "wb") as buffer:
+                shutil.copyfileobj(file.file, buffer)
+            uploaded_text = transcribe_file(mp3_path, file.content_type)
+            AudioSegment.from_file(mp3_path, format="wav" if "wav" in file.content_type else "mp3")
+
+            # The mic clip went through a NamedTemporaryFile as well
+            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
+                temp_wav.write(pcm_to_wav(b"\x00\x00" * 16000))
+                temp_wav_path = temp_wav.name
+            transcribe_file(temp_wav_path, "audio/wav")
+            os.remove(temp_wav_path)
+
+            return {"uploaded_audio_transcript": uploaded_text, "server_mic_transcript": "...", "status": "success"}
+
+    return app
+
+
+def proc_io():
+    try:
+        with open("/proc/self/io") as f:
+            return {key: int(value) for key, value in (line.split(": ") for line in f)}
+    except OSError:
+        return None
+
+
+def run(client: TestClient, requests: int, filename: str, audio: bytes, mime_type: str):
+    io_before = proc_io()
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.post("/process-audio", files={"file": (filename, audio, mime_type)}).raise_for_status()
+        latencies.append(time.perf_counter() - started)
+    io_after = proc_io()
+    io = {key: (io_after[key] - io_before[key]) // requests for key in io_after} if io_before else None
+    return sorted(latencies), io
+
+
+@click.command()
+@click.option("--audio", "audio_path", type=click.Path(exists=True), default=None, help="Upload to send (default: 5s of synthetic WAV).")
+@click.option("--requests", default=50, help="Requests per variant.")
+@click.option("--pcm-engine", is_flag=True, help="Stub an STT engine that needs decoded PCM (google/vosk) instead of a cloud one.")
+def main(audio_path, requests, pcm_engine):
+    if audio_path:
+        with open(audio_path, "rb") as f:
+            audio = f.read()
+        filename = os.path.basename(audio_path)
+    else:
+        audio, filename = pcm_to_wav(synthetic_speech(5.0)), "input.wav"
+    mime_type = "audio/wav" if filename.endswith(".wav") else "audio/mpeg"
+
+    stt = StubSTT(pcm_engine)
+    server.stt_engine = stt
+    server.play = lambda segment: None
+    server.record_from_mic_and_transcribe = lambda: server.transcribe_audio(pcm_to_wav(b"\x00\x00" * 16000))
+
+    click.echo(f"upload: {filename}, {len(audio) / 1024:.1f} KiB, {requests} requests, stt needs pcm: {pcm_engine}")
+    for name, app in (("temp files", legacy_app(stt)), ("in memory", server.app)):
+        with TestClient(app) as client:
+            latencies, io = run(client, requests, filename, audio, mime_type)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+        line = f"{name:<10} p50 {p50:6.2f}ms  p95 {p95:6.2f}ms"
+        if io is not None:
+            line += f"  per request: read {io['rchar'] / 1024:6.1f} KiB, written {io['wchar'] / 1024:6.1f} KiB, {io['syscw']} write calls, {io['write_bytes'] / 1024:.1f} KiB to disk"
+        click.echo(line)
+
+
+if __name__ == "__main__":
+    main()
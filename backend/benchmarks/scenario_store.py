@@ -0,0 +1,176 @@
+"""
+Scenario store reads per second with many API worker processes reading at
+once (session starts via get_scenario, library pages via list_scenarios)
+while another process keeps upserting scenarios.
+
+    cd backend && python -m benchmarks.scenario_store --workers 8 --threads 4 --duration 5
+
+"baseline" is the store as it was: rollback journal, no secondary indexes,
+no read cache. "tuned" is the default configuration: WAL, indexes, pool and
+read-through cache. Each mode gets a freshly seeded database file.
+"""
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+
+MODES = {
+    "baseline": {"SCENARIO_DB_WAL": "0", "SCENARIO_CACHE_SIZE": "0", "SCENARIO_DB_POOL_SIZE": "5", "SCENARIO_DB_MAX_OVERFLOW": "10"},
+    "tuned": {},
+}
+
+
+def seed(env: dict, path: str, scenarios: int, drop_indexes: bool):
+    os.environ.update(env)
+    from core import db
+    from core.types import DEMOGRAPHICS, SCENARIO_TYPES
+
+    db.create_db_and_tables()
+    started = datetime.now(timezone.utc) - timedelta(days=30)
+    db.insert_scenarios([
+        db.Scenario(
+            voice_id=f"voice_{i:06d}",
+            voice_name=f"Caller {i}",
+            voice_prompt="An elderly male voice, deep, raspy, and breathy, with a heavy Scottish accent.",
+            victim_persona="You are Arthur, 82 years old. You have fallen in your kitchen and cannot get up. " * 8,
+            description=f"Generated Scenario: Caller {i}",
+            example_dialogue="I've been living in this old house for nearly forty years now. " * 4,
+            scenario_type=SCENARIO_TYPES[i % len(SCENARIO_TYPES)],
+            demographic=DEMOGRAPHICS[i % len(DEMOGRAPHICS)],
+            pool_status="ready",
+            created_at=started + timedelta(minutes=i)
+        )
+        for i in range(scenarios)
+    ])
+    if drop_indexes:
+        with sqlite3.connect(path) as connection:
+            for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_scenario_%'").fetchall():
+                connection.execute(f"DROP INDEX {name}")
+
+
+def reader(env: dict, scenarios: int, threads: int, list_ratio: float, start, deadline, results):
+    """One API worker process: `threads` request handlers reading as fast as they can until `deadline`."""
+    os.environ.update(env)
+    from core import db
+    from core.types import DEMOGRAPHICS, SCENARIO_TYPES
+
+    counts = {"get": [], "list": [], "errors": 0}
+    lock = threading.Lock()
+
+    def handler(seed_value: int):
+        rng = random.Random(seed_value)
+        latencies = {"get": [], "list": []}
+        errors = 0
+        while time.time() < deadline.value:
+            kind = "list" if rng.random() < list_ratio else "get"
+            began = time.perf_counter()
+            try:
+                if kind == "get":
+                    db.get_scenario(f"voice_{rng.randrange(scenarios):06d}")
+                else:
+                    filters = rng.choice([{"scenario_type": rng.choice(SCENARIO_TYPES)}, {"demographic": rng.choice(DEMOGRAPHICS)}, {}])
+                    db.list_scenarios(limit=20, **filters)
+            except Exception:
+                errors += 1
+                continue
+            latencies[kind].append(time.perf_counter() - began)
+        with lock:
+            counts["get"] += latencies["get"]
+            counts["list"] += latencies["list"]
+            counts["errors"] += errors
+
+    start.wait()
+    workers = [threading.Thread(target=handler, args=(os.getpid() * 1000 + i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put(counts)
+
+
+def writer(env: dict, scenarios: int, writes_per_second: float, start, deadline, results):
+    """Keeps the store busy with upserts, as the scenario pool and batch generation do."""
+    os.environ.update(env)
+    from core import db
+
+    rng = random.Random(0)
+    writes = 0
+    start.wait()
+    while time.time() < deadline.value:
+        scenario = db.get_scenario(f"voice_{rng.randrange(scenarios):06d}")
+        db.upsert_scenario(db.Scenario(**{**scenario.model_dump(), "pool_status": rng.choice(["ready", "claimed"])}))
+        writes += 1
+        time.sleep(1 / writes_per_second)
+    results.put(writes)
+
+
+def run_mode(mode: str, directory: str, scenarios: int, workers: int, threads: int, duration: float, writes_per_second: float, list_ratio: float):
+    path = os.path.join(directory, f"{mode}.db")
+    env = {**MODES[mode], "SCENARIO_DB": path}
+    context = multiprocessing.get_context("spawn")
+
+    seeder = context.Process(target=seed, args=(env, path, scenarios, mode == "baseline"))
+    seeder.start()
+    seeder.join()
+
+    start = context.Event()
+    # Set just before `start`, once every process has imported the store
+    deadline = context.Value("d", 0.0)
+    results = context.Queue()
+    processes = [context.Process(target=reader, args=(env, scenarios, threads, list_ratio, start, deadline, results)) for _ in range(workers)]
+    if writes_per_second > 0:
+        processes.append(context.Process(target=writer, args=(env, scenarios, writes_per_second, start, deadline, results)))
+    for process in processes:
+        process.start()
+    time.sleep(3.0)
+    deadline.value = time.time() + duration
+    start.set()
+
+    outputs = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    reads = {"get": [], "list": []}
+    errors = 0
+    writes = 0
+    for output in outputs:
+        if isinstance(output, int):
+            writes = output
+            continue
+        reads["get"] += output["get"]
+        reads["list"] += output["list"]
+        errors += output["errors"]
+    return reads, errors, writes
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] if values else 0.0
+
+
+@click.command()
+@click.option("--scenarios", default=500, help="Scenarios in the library.")
+@click.option("--workers", default=8, help="API worker processes reading concurrently.")
+@click.option("--threads", default=4, help="Concurrent requests per worker.")
+@click.option("--duration", default=5.0, help="Seconds of reading per mode.")
+@click.option("--writes-per-second", default=20.0, help="Upserts per second from a separate process (0 disables).")
+@click.option("--list-ratio", default=0.2, help="Fraction of reads that are list_scenarios pages.")
+def main(scenarios, workers, threads, duration, writes_per_second, list_ratio):
+    click.echo(f"{scenarios} scenarios, {workers} workers x {threads} threads, {writes_per_second:g} writes/s, {duration:g}s per mode")
+    click.echo(f"{'mode':<9} {'kind':<5} {'reads/s':>9} {'p50 ms':>7} {'p99 ms':>7} {'errors':>6} {'writes':>6}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in MODES:
+            reads, errors, writes = run_mode(mode, directory, scenarios, workers, threads, duration, writes_per_second, list_ratio)
+            for kind, latencies in reads.items():
+                click.echo(f"{mode:<9} {kind:<5} {len(latencies) / duration:>9.0f} {percentile(latencies, 50) * 1000:>7.2f} "
+                           f"{percentile(latencies, 99) * 1000:>7.2f} {errors:>6} {writes:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Cold-start times, each measured in a fresh interpreter: importing api.py and
+cli.py, two CLI commands, and an API worker (`uvicorn api:app` against the
+fake providers) from process start until /healthz and /readyz answer 200.
+
+    cd backend && python -m benchmarks.startup --runs 5
+    cd backend && python -m benchmarks.startup --max-seconds 4
+
+With --max-seconds the run fails (exit code 1) when any median exceeds the
+budget, so it can guard startup time in CI.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+import httpx
+
+from benchmarks.fake_providers import FakeProviderConfig, FakeProviderServer, Latency
+from benchmarks.load import BACKEND_DIR, free_port, worker_env
+
+COMMANDS = {
+    "import api": [sys.executable, "-c", "import api"],
+    "import cli": [sys.executable, "-c", "import cli"],
+    "cli.py --help": [sys.executable, "cli.py", "--help"],
+    "cli.py run-agent effects": [sys.executable, "cli.py", "run-agent", "effects"],
+}
+
+
+def time_command(command, env: dict) -> float:
+    started = time.perf_counter()
+    subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def time_worker(providers_url: str, directory: str, timeout: float = 60.0):
+    """Seconds from spawning the worker until /healthz, then /readyz, answer 200."""
+    port = free_port()
+    started = time.perf_counter()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=worker_env(providers_url, directory), cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    probes = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            for path in ("/healthz", "/readyz"):
+                while path not in probes:
+                    if worker.poll() is not None:
+                        raise click.ClickException(f"API worker exited with code {worker.returncode}")
+                    if time.perf_counter() - started > timeout:
+                        raise click.ClickException(f"API worker did not answer {path} within {timeout:.0f}s")
+                    try:
+                        if client.get(path).status_code == 200:
+                            probes[path] = time.perf_counter() - started
+                            continue
+                    except httpx.HTTPError:
+                        pass
+                    time.sleep(0.01)
+    finally:
+        worker.terminate()
+        worker.wait()
+    return probes["/healthz"], probes["/readyz"]
+
+
+@click.command()
+@click.option("--runs", default=5, help="Fresh processes per measurement; the median is reported.")
+@click.option("--provider-latency", default=0.05, help="Fake Gemini/ElevenLabs response time during worker warm-up, in seconds.")
+@click.option("--max-seconds", default=None, type=float, help="Fail if any median exceeds this many seconds.")
+def main(runs, provider_latency, max_seconds):
+    latency = Latency("fixed", provider_latency)
+    fake = FakeProviderServer(FakeProviderConfig(gemini_latency=latency, tts_first_chunk=latency, voice_latency=latency)).start()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        env = worker_env(fake.base_url, directory)
+        for name, command in COMMANDS.items():
+            results[name] = [time_command(command, env) for _ in range(runs)]
+
+        probes = [time_worker(fake.base_url, directory) for _ in range(runs)]
+        results["worker /healthz"] = [healthz for healthz, _ in probes]
+        results["worker /readyz"] = [readyz for _, readyz in probes]
+    fake.stop()
+
+    click.echo(f"{'startup':<26} {'median s':>9} {'min s':>7} {'max s':>7}")
+    slow = []
+    for name, seconds in results.items():
+        median = statistics.median(seconds)
+        if max_seconds is not None and median > max_seconds:
+            slow.append(name)
+        click.echo(f"{name:<26} {median:>9.2f} {min(seconds):>7.2f} {max(seconds):>7.2f}")
+    if slow:
+        raise click.ClickException(f"over the {max_seconds:.2f}s budget: {', '.join(slow)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures STT throughput and latency for one engine by streaming a WAV file
+through it in fixed-size chunks, as a live call would deliver them.
+
+    cd backend && STT_ENGINE=vosk VOSK_MODEL_PATH=models/vosk-model-small-en-us-0.15 \
+        python -m benchmarks.stt --wav samples/dispatcher.wav
+
+With the vosk engine this runs fully offline. Reports the real-time factor
+(processing time / audio duration; below 1.0 keeps up with live audio), the
+time to the first partial result and the delay between the last chunk and the
+final transcript.
+"""
+import time
+
+import click
+
+from core.transcription import STT_SAMPLE_RATE, get_stt_engine, to_pcm16
+
+
+@click.command()
+@click.option("--wav", "wav_path", required=True, type=click.Path(exists=True), help="Audio file to transcribe (any format pydub can decode).")
+@click.option("--chunk-ms", default=100, help="Chunk size fed to the engine, in milliseconds.")
+@click.option("--runs", default=3, help="Number of passes over the file.")
+def main(wav_path, chunk_ms, runs):
+    engine = get_stt_engine(default="vosk")
+    with open(wav_path, "rb") as f:
+        pcm = to_pcm16(f.read())
+    audio_seconds = len(pcm) / (STT_SAMPLE_RATE * 2)
+    chunk_bytes = STT_SAMPLE_RATE * 2 * chunk_ms // 1000
+
+    click.echo(f"engine: {engine.name}, audio: {audio_seconds:.2f}s, chunk: {chunk_ms}ms")
+    for run in range(runs):
+        last_chunk_at = None
+        first_partial = None
+        partials = 0
+
+        def chunks():
+            nonlocal last_chunk_at
+            for i in range(0, len(pcm), chunk_bytes):
+                yield pcm[i:i + chunk_bytes]
+            last_chunk_at = time.perf_counter()
+
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        final = None
+        for transcript in engine.stream(chunks()):
+            if transcript.is_final:
+                final = transcript
+            else:
+                partials += 1
+                if first_partial is None:
+                    first_partial = time.perf_counter() - started
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        finalize = time.perf_counter() - last_chunk_at
+
+        first_partial_text = f"{first_partial * 1000:.0f}ms" if first_partial is not None else "n/a"
+        click.echo(
+            f"run {run + 1}: rtf {wall / audio_seconds:.3f} (cpu {cpu / audio_seconds:.3f}), "
+            f"first partial {first_partial_text}, {partials} partials, finalize {finalize * 1000:.0f}ms"
+        )
+    click.echo(f"transcript: {final.text if final else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Stand-in Gemini / ElevenLabs providers with fixed latency, for benchmarks that
+must not spend real quota. Sync methods block with time.sleep, async methods
+yield with asyncio.sleep, so they behave like the real clients on each path.
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+STUB_SCENARIO = {
+    "voice_name": "Arthur",
+    "elevenlabs_voice_prompt": "An elderly male voice, deep, raspy, and breathy, with a heavy Scottish accent.",
+    "generated_voice_sample_text": "I've been living in this old house for nearly forty years now, and I've never seen the winters get quite this cold.",
+    "victim_persona": "You are Arthur, 82 years old. You have fallen in your kitchen and cannot get up. You smell smoke.",
+    "scenario_type": "fire",
+    "demographic": "elderly"
+}
+
+STUB_REPLY = "Oh god... the smoke! I can't get up... PLEASE hurry!"
+
+STUB_AUDIO_CHUNK = b"\xff\xf3" + b"\x00" * 4094
+
+
+def synthetic_speech(seconds: float, sample_rate: int = 16000, lead_silence: float = 0.3, trail_silence: float = 0.6, seed: int = 0) -> bytes:
+    """16-bit mono PCM: room noise, a syllable-modulated voiced signal, room noise."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    voice = envelope * (3000 * np.sin(2 * np.pi * 150 * t) + 1500 * np.sin(2 * np.pi * 450 * t))
+    signal = np.concatenate([np.zeros(int(sample_rate * lead_silence)), voice, np.zeros(int(sample_rate * trail_silence))])
+    signal += rng.normal(0, 100, len(signal))
+    return signal.astype(np.int16).tobytes()
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def estimate_tokens(contents) -> int:
+    # Close enough to Gemini's tokenizer for English prose
+    return len(str(contents)) // 4
+
+
+class StubGenerativeModel:
+    latency = 0.5
+    # Extra latency per 1k prompt tokens, to model prompt-processing time
+    latency_per_1k_tokens = 0.0
+    # (model_name, prompt_tokens) per call, for benchmarks that report prompt size
+    calls = []
+
+    def __init__(self, model_name: str = "stub", system_instruction: str = None, **kwargs):
+        self.model_name = model_name
+        self.system_instruction = system_instruction or ""
+
+    def _reply(self, contents) -> str:
+        if isinstance(contents, list):
+            return "Where is the fire?"
+        if "Scenario Engine" in str(contents):
+            return json.dumps(STUB_SCENARIO)
+        if "running summary" in str(contents):
+            return "Arthur, 82, fell in his kitchen and smells smoke. The dispatcher is keeping him calm and asking for his address."
+        return json.dumps({"spoken_response": STUB_REPLY})
+
+    def _latency(self, contents) -> float:
+        tokens = estimate_tokens(contents) + estimate_tokens(self.system_instruction)
+        StubGenerativeModel.calls.append((self.model_name, tokens))
+        return self.latency + self.latency_per_1k_tokens * tokens / 1000
+
+    def _stream(self, text: str):
+        # Tokens arrive evenly spread over the stub latency
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.latency / len(words))
+            yield StubResponse(word if i == len(words) - 1 else word + " ")
+
+    async def _astream(self, text: str):
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.latency / len(words))
+            yield StubResponse(word if i == len(words) - 1 else word + " ")
+
+    def generate_content(self, contents, stream: bool = False, **kwargs):
+        latency = self._latency(contents)
+        if stream:
+            return self._stream(STUB_REPLY)
+        time.sleep(latency)
+        return StubResponse(self._reply(contents))
+
+    async def generate_content_async(self, contents, stream: bool = False, **kwargs):
+        latency = self._latency(contents)
+        if stream:
+            return self._astream(STUB_REPLY)
+        await asyncio.sleep(latency)
+        return StubResponse(self._reply(contents))
+
+
+class _StubTextToSpeech:
+    def __init__(self, latency: float, chunks: int):
+        self.latency = latency
+        self.chunks = chunks
+
+    def convert(self, **kwargs):
+        for _ in range(self.chunks):
+            time.sleep(self.latency / self.chunks)
+            yield STUB_AUDIO_CHUNK
+
+    stream = convert
+
+
+class _StubAsyncTextToSpeech(_StubTextToSpeech):
+    async def convert(self, **kwargs):
+        for _ in range(self.chunks):
+            await asyncio.sleep(self.latency / self.chunks)
+            yield STUB_AUDIO_CHUNK
+
+    stream = convert
+
+
+def _previews():
+    return SimpleNamespace(previews=[SimpleNamespace(generated_voice_id=f"stub_preview_{i}", audio_base_64="") for i in range(3)])
+
+
+class _StubTextToVoice:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def design(self, **kwargs):
+        time.sleep(self.latency)
+        return _previews()
+
+    def create(self, **kwargs):
+        time.sleep(self.latency)
+        return SimpleNamespace(voice_id="stub_voice_id")
+
+
+class _StubAsyncTextToVoice(_StubTextToVoice):
+    async def design(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return _previews()
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(voice_id="stub_voice_id")
+
+
+class StubElevenLabs:
+    def __init__(self, tts_latency: float = 0.3, voice_latency: float = 1.0, chunks: int = 8):
+        self.text_to_speech = _StubTextToSpeech(tts_latency, chunks)
+        self.text_to_voice = _StubTextToVoice(voice_latency)
+
+
+class StubAsyncElevenLabs:
+    def __init__(self, tts_latency: float = 0.3, voice_latency: float = 1.0, chunks: int = 8):
+        self.text_to_speech = _StubAsyncTextToSpeech(tts_latency, chunks)
+        self.text_to_voice = _StubAsyncTextToVoice(voice_latency)
+
+
+def install_stub_providers(llm_latency: float = 0.5, tts_latency: float = 0.3, voice_latency: float = 1.0):
+    """Registers stub Gemini / ElevenLabs clients in the provider registry."""
+    import google.generativeai as genai
+    from core.providers import providers
+
+    StubGenerativeModel.latency = llm_latency
+    genai.GenerativeModel = StubGenerativeModel
+
+    providers.reset()
+    providers.register("genai", genai)
+    providers.register("elevenlabs", StubElevenLabs(tts_latency, voice_latency))
+    providers.register("async_elevenlabs", StubAsyncElevenLabs(tts_latency, voice_latency))
+    # Nothing to connect to
+    providers.awarm_up = _noop_awarm_up
+
+    # Measure the stub latencies, not cache hits from earlier runs
+    from core.tts_cache import tts_cache
+    tts_cache.enabled = False
+    # The stub audio is not real MP3, there is nothing to filter
+    import agents.effects
+    agents.effects.AUDIO_EFFECTS = False
+
+
+async def _noop_awarm_up():
+    pass
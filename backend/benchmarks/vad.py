@@ -0,0 +1,92 @@
+"""
+Compares end-of-speech detection with speech_recognition's listen() (0.5s
+ambient calibration per turn, then pause_threshold) against core/vad.py on the
+same synthetic utterance, fed in real-time-sized chunks.
+
+    cd backend && python -m benchmarks.vad --utterance-seconds 2.5
+
+Reports when each detector ends the turn relative to the end of speech, how
+many bytes it hands to STT, and the endpointer's frame throughput.
+"""
+import io
+import time
+
+import click
+import speech_recognition as sr
+
+from benchmarks.stubs import synthetic_speech
+from core.vad import Endpointer, VAD_FRAME_MS, VAD_SAMPLE_RATE
+
+LEAD_SILENCE = 1.0
+TRAIL_SILENCE = 3.0
+
+
+class _PCMStream(io.BytesIO):
+    # PyAudio streams read frames, not bytes
+    def read(self, frames: int = -1) -> bytes:
+        return super().read(frames * 2 if frames > 0 else frames)
+
+
+class BufferSource(sr.AudioSource):
+    """A speech_recognition source that plays back a PCM buffer and records how much was read."""
+
+    def __init__(self, pcm: bytes):
+        self.SAMPLE_RATE = VAD_SAMPLE_RATE
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = VAD_SAMPLE_RATE * VAD_FRAME_MS // 1000
+        self.stream = _PCMStream(pcm)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def baseline(pcm: bytes):
+    recognizer = sr.Recognizer()
+    source = BufferSource(pcm)
+    recognizer.adjust_for_ambient_noise(source, duration=0.5)
+    audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
+    return source.stream.tell() / 2 / VAD_SAMPLE_RATE, len(audio.get_raw_data())
+
+
+def endpointer(pcm: bytes):
+    vad = Endpointer()
+    chunk = vad.frame_bytes
+    speech = []
+    for i in range(0, len(pcm), chunk):
+        audio, ended = vad.push(pcm[i:i + chunk])
+        speech.append(audio)
+        if ended:
+            return (i + chunk) / 2 / VAD_SAMPLE_RATE, len(b"".join(speech))
+    return len(pcm) / 2 / VAD_SAMPLE_RATE, len(b"".join(speech))
+
+
+@click.command()
+@click.option("--utterance-seconds", default=2.5, help="Length of the spoken part.")
+@click.option("--seconds", default=60.0, help="Audio processed for the throughput figure.")
+def main(utterance_seconds, seconds):
+    pcm = synthetic_speech(utterance_seconds, VAD_SAMPLE_RATE, lead_silence=LEAD_SILENCE, trail_silence=TRAIL_SILENCE)
+    speech_end = LEAD_SILENCE + utterance_seconds
+
+    for name, detect in (("listen()", baseline), ("endpointer", endpointer)):
+        ended_at, uploaded = detect(pcm)
+        click.echo(
+            f"{name:<11} turn ends {(ended_at - speech_end) * 1000:5.0f}ms after speech, "
+            f"uploads {uploaded / 1024:6.1f} KiB ({uploaded / 2 / VAD_SAMPLE_RATE:.2f}s of audio)"
+        )
+
+    click.echo("listen() also spends 500ms on ambient calibration before every turn")
+
+    long_pcm = synthetic_speech(seconds, VAD_SAMPLE_RATE)
+    vad = Endpointer(max_utterance_ms=int(seconds * 2000))
+    started = time.process_time()
+    for i in range(0, len(long_pcm), vad.frame_bytes * 10):
+        vad.push(long_pcm[i:i + vad.frame_bytes * 10])
+    cpu = time.process_time() - started
+    click.echo(f"endpointer throughput: {len(long_pcm) / 2 / VAD_SAMPLE_RATE / cpu:.0f}x real time")
+
+
+if __name__ == "__main__":
+    main()
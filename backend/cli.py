@@ -1,20 +1,36 @@
 import click
 import asyncio
+import importlib
 from dotenv import load_dotenv
-from core.graph import build_graph
-from core.db import create_db_and_tables, upsert_scenario, get_scenario, Scenario
 import pprint
 
 load_dotenv()
 
+# Agents by name, imported on demand so a command only loads the SDKs it uses
+AGENTS = {
+    "scenario": "agents.scenario:generate_scenario_node",
+    "response": "agents.scenario:generate_response_node",
+    "voice_design": "agents.voice_design:voice_design_node",
+    "tts": "agents.tts:tts_node",
+    "effects": "agents.effects:audio_effects_node"
+}
+
+def load_agent(agent_name: str):
+    module_name, function_name = AGENTS[agent_name].split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
 @click.group()
 def cli():
-    create_db_and_tables()
+    pass
 
 @cli.command()
 @click.option('--load-voice-id', help='Load a saved scenario by Voice ID', default=None)
 def demo(load_voice_id):
     """Runs the demo flow: Scenario -> Voice -> Response -> TTS -> Effects"""
+    from core.graph import build_graph
+    from core.db import create_db_and_tables, upsert_scenario, get_scenario, Scenario
+
+    create_db_and_tables()
     graph = build_graph()
     
     if load_voice_id:
@@ -29,7 +45,9 @@ def demo(load_voice_id):
                 "voice_name": scenario_record.voice_name,
                 "voice_prompt": scenario_record.voice_prompt,
                 "victim_persona": scenario_record.victim_persona,
-                "example_dialogue": ""
+                "example_dialogue": "",
+                "scenario_type": scenario_record.scenario_type,
+                "demographic": scenario_record.demographic
             },
             "voice_definition": {"voice_id": scenario_record.voice_id},
             "current_text": None,
@@ -69,7 +87,10 @@ def demo(load_voice_id):
                             voice_name=current_scenario.get("voice_name", "Unknown"),
                             voice_prompt=current_scenario.get("voice_prompt", ""),
                             victim_persona=current_scenario.get("victim_persona", ""),
-                            description=current_scenario.get("description", "")
+                            description=current_scenario.get("description", ""),
+                            example_dialogue=current_scenario.get("example_dialogue"),
+                            scenario_type=current_scenario.get("scenario_type"),
+                            demographic=current_scenario.get("demographic")
                         )
                         upsert_scenario(scenario_db)
                         click.echo(f"  > Saved scenario to DB with Voice ID: {voice_def['voice_id']}")
@@ -88,6 +109,37 @@ def demo(load_voice_id):
     click.echo("Final Graph State:")
     pprint.pprint(final_state)
 
+@cli.command()
+@click.option('--count', default=100, help='Scenarios the batch should hold, counting ones already in the journal.')
+@click.option('--concurrency', default=4, help='Scenarios prepared in parallel.')
+@click.option('--gemini-rpm', default=30.0, help='Gemini scenario requests per minute (0 = unlimited).')
+@click.option('--elevenlabs-rpm', default=30.0, help='ElevenLabs voice design requests per minute (0 = unlimited).')
+@click.option('--retries', default=3, help='Retries per scenario, with exponential backoff.')
+@click.option('--journal', default='scenario_batch.jsonl', help='JSONL journal of finished scenarios; rerun with the same journal to resume.')
+@click.option('--insert-batch-size', default=20, help='Scenarios per bulk insert.')
+def generate_batch(count, concurrency, gemini_rpm, elevenlabs_rpm, retries, journal, insert_batch_size):
+    """Generates scenarios with designed voices in parallel and stores them as ready pool scenarios."""
+    from core.batch import ScenarioBatch
+    from core.db import create_db_and_tables
+
+    create_db_and_tables()
+    batch = ScenarioBatch(count, concurrency, journal, gemini_rpm, elevenlabs_rpm, retries, insert_batch_size)
+    click.echo(f"Generating up to {count} scenarios, {concurrency} at a time (journal: {journal})")
+    try:
+        report = batch.run(progress=click.echo)
+    except KeyboardInterrupt:
+        click.echo(f"Interrupted; finished scenarios are in {journal}. Run the same command again to resume.")
+        return
+
+    click.echo("-" * 50)
+    click.echo(f"Generated {report.generated} scenarios in {report.elapsed:.1f}s ({report.scenarios_per_minute():.1f}/min), "
+               f"{report.failed} failed, {report.resumed} resumed from the journal, {report.inserted} stored")
+    for step, seconds in report.step_seconds.items():
+        if seconds:
+            click.echo(f"  {step}: {sum(seconds) / len(seconds):.2f}s avg, {max(seconds):.2f}s max")
+    if report.failed:
+        click.echo("Run the same command again to retry the failed scenarios.")
+
 @cli.command()
 @click.argument('agent_name')
 def run_agent(agent_name):
@@ -109,23 +161,8 @@ def run_agent(agent_name):
         "messages": []
     }
 
-    # Import agents
-    from agents.scenario import generate_scenario_node
-    from agents.scenario import generate_response_node
-    from agents.voice_design import voice_design_node
-    from agents.tts import tts_node
-    from agents.effects import audio_effects_node
-    
-    agents = {
-        "scenario": generate_scenario_node,
-        "response": generate_response_node,
-        "voice_design": voice_design_node,
-        "tts": tts_node,
-        "effects": audio_effects_node
-    }
-    
-    if agent_name not in agents:
-        click.echo(f"Error: Agent '{agent_name}' not found. Available agents: {', '.join(agents.keys())}")
+    if agent_name not in AGENTS:
+        click.echo(f"Error: Agent '{agent_name}' not found. Available agents: {', '.join(AGENTS.keys())}")
         return
 
     click.echo(f"Running agent: {agent_name}")
@@ -161,7 +198,7 @@ def run_agent(agent_name):
                               'medium-high pitch, clear resonance with a '
                               'slight vocal fry.'}
             
-        result = agents[agent_name](mock_state)
+        result = load_agent(agent_name)(mock_state)
         click.echo("Result:")
         pprint.pprint(result)
     except Exception as e:
@@ -0,0 +1,180 @@
+"""
+Batch scenario generation for `cli.py generate-batch`: many scenarios (Gemini)
+and their voices (ElevenLabs voice design) prepared concurrently, within
+per-provider request rates, and bulk inserted into the Scenario table as
+ready pool scenarios.
+
+Every finished scenario is appended to a JSONL journal before it is inserted,
+so an interrupted or partly failed run is resumed by running the same command
+again: journaled scenarios are (re)inserted and only the rest is generated.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Token bucket shared by the worker threads: `per_minute` requests a minute, in bursts of up to `burst`."""
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1):
+        if self.rate <= 0:
+            return
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+
+@dataclass
+class BatchReport:
+    requested: int
+    resumed: int = 0
+    generated: int = 0
+    failed: int = 0
+    inserted: int = 0
+    elapsed: float = 0.0
+    # Provider time per finished scenario, by step
+    step_seconds: Dict[str, List[float]] = field(default_factory=lambda: {"scenario": [], "voice": []})
+
+    def scenarios_per_minute(self) -> float:
+        return self.generated / self.elapsed * 60 if self.elapsed else 0.0
+
+class ScenarioBatch:
+    """
+    Generates scenarios until the journal holds `count` of them.
+
+    `concurrency` scenarios are in flight at once; each one is a Gemini call
+    followed by an ElevenLabs design + create, retried up to `retries` times
+    with exponential backoff (a voice design retry keeps the generated scenario).
+    """
+
+    def __init__(self, count: int, concurrency: int = 4, journal_path: str = "scenario_batch.jsonl",
+                 gemini_rpm: float = 30.0, elevenlabs_rpm: float = 30.0, retries: int = 3, insert_batch_size: int = 20):
+        self.count = count
+        self.concurrency = max(1, concurrency)
+        self.journal_path = journal_path
+        self.gemini = RateLimiter(gemini_rpm, burst=self.concurrency)
+        # Voice design is two ElevenLabs requests (design, then create)
+        self.elevenlabs = RateLimiter(elevenlabs_rpm, burst=max(2, self.concurrency))
+        self.retries = retries
+        self.insert_batch_size = max(1, insert_batch_size)
+        self._journal_lock = threading.Lock()
+
+    def read_journal(self) -> List[dict]:
+        if not os.path.exists(self.journal_path):
+            return []
+        entries = []
+        with open(self.journal_path) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A line cut short by a crash; that scenario is generated again
+                    logger.warning(f"Scenario batch: skipping a damaged journal line in {self.journal_path}")
+        return entries
+
+    def append_journal(self, entry: dict):
+        with self._journal_lock, open(self.journal_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def prepare(self) -> Tuple[dict, dict, Dict[str, float]]:
+        """One scenario and its voice, journaled; returns (scenario, voice_definition, seconds per step)."""
+        from agents.scenario import generate_scenario_node
+        from agents.voice_design import voice_design_node
+
+        scenario = None
+        seconds = {}
+        for attempt in range(self.retries + 1):
+            try:
+                if scenario is None:
+                    self.gemini.acquire()
+                    started = time.perf_counter()
+                    scenario = generate_scenario_node({})["scenario"]
+                    seconds["scenario"] = time.perf_counter() - started
+
+                self.elevenlabs.acquire(2)
+                started = time.perf_counter()
+                voice_definition = voice_design_node({"scenario": scenario})["voice_definition"]
+                seconds["voice"] = time.perf_counter() - started
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"Scenario batch: attempt {attempt + 1} failed ({e}); retrying in {delay}s")
+                time.sleep(delay)
+
+        # Journaled from the worker, so work finishing while the run is interrupted is kept
+        self.append_journal({"scenario": scenario, "voice_definition": voice_definition, "finished_at": time.time()})
+        return scenario, voice_definition, seconds
+
+    def run(self, progress: Callable[[str], None] = print) -> BatchReport:
+        from core.db import insert_scenarios
+        from core.pool import scenario_record
+
+        journaled = self.read_journal()
+        report = BatchReport(requested=self.count, resumed=len(journaled))
+        if journaled:
+            # Inserts are idempotent: anything journaled but not yet stored is stored now
+            report.inserted += insert_scenarios([scenario_record(e["scenario"], e["voice_definition"]) for e in journaled])
+            progress(f"Resuming {self.journal_path}: {len(journaled)} scenarios already generated, {report.inserted} newly stored")
+
+        remaining = max(0, self.count - len(journaled))
+        pending_rows = []
+
+        def flush():
+            if pending_rows:
+                report.inserted += insert_scenarios(pending_rows)
+                pending_rows.clear()
+
+        started = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="scenario-batch")
+        try:
+            in_flight = set()
+            submitted = 0
+            while submitted < remaining or in_flight:
+                while submitted < remaining and len(in_flight) < self.concurrency:
+                    in_flight.add(executor.submit(self.prepare))
+                    submitted += 1
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        scenario, voice_definition, seconds = future.result()
+                    except Exception as e:
+                        report.failed += 1
+                        progress(f"FAILED: {e}")
+                        continue
+                    report.generated += 1
+                    for step, value in seconds.items():
+                        report.step_seconds[step].append(value)
+                    pending_rows.append(scenario_record(scenario, voice_definition))
+                    if len(pending_rows) >= self.insert_batch_size:
+                        flush()
+                    progress(f"[{report.resumed + report.generated}/{self.count}] {scenario.get('voice_name')} ({voice_definition['voice_id']})")
+        finally:
+            # On Ctrl-C: drop the queued work, keep (and store) everything already finished
+            executor.shutdown(wait=True, cancel_futures=True)
+            flush()
+            report.elapsed = time.perf_counter() - started
+        return report
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Layer III bitrates in kbps, indexed by the header's bitrate field
+MP3_BITRATES = {
+    "mpeg1": [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    "mpeg2": [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+def mp3_duration_ms(data: bytes) -> Optional[int]:
+    """Duration estimated from the first frame header, assuming constant bitrate (as ElevenLabs and our encoder produce)."""
+    offset = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        # Syncsafe tag size: 7 bits per byte
+        offset = 10 + ((data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F))
+    while offset + 4 <= len(data):
+        if data[offset] == 0xFF and data[offset + 1] & 0xE0 == 0xE0:
+            version = (data[offset + 1] >> 3) & 0x03
+            layer = (data[offset + 1] >> 1) & 0x03
+            bitrate_index = data[offset + 2] >> 4
+            if layer == 0x01 and version != 0x01 and 0 < bitrate_index < 15:
+                kbps = MP3_BITRATES["mpeg1" if version == 0x03 else "mpeg2"][bitrate_index]
+                return int((len(data) - offset) * 8 / kbps)
+        offset += 1
+    return None
+
+class BlobStore:
+    """
+    Content-addressed store for audio produced during a call.
+
+    Graph state keeps only a small reference ({"blob_id", "bytes",
+    "duration_ms", "mime"}) so checkpoints stay small; the bytes live in an
+    in-memory LRU bounded by `memory_bytes`, written through to
+    <dir>/<ab>/<sha256> and evicted from disk least recently used first.
+    Identical audio (cached TTS lines) is stored once.
+    """
+
+    def __init__(self, directory: str, memory_bytes: int = 64 * 1024 * 1024, disk_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk_used: Optional[int] = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, blob_id: str) -> str:
+        return os.path.join(self.directory, blob_id[:2], blob_id)
+
+    def _remember(self, blob_id: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        if blob_id in self._memory:
+            self._memory.move_to_end(blob_id)
+            return
+        self._memory[blob_id] = data
+        self._memory_used += len(data)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def put(self, data: bytes, mime: str = "audio/mpeg") -> Dict[str, Any]:
+        """Stores `data` and returns the reference to keep in graph state."""
+        blob_id = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            known = blob_id in self._memory
+            self._remember(blob_id, data)
+
+        path = self._path(blob_id)
+        if not known and not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            with self._lock:
+                if self._disk_used is None:
+                    self._disk_used = self._scan_disk_usage()
+                else:
+                    self._disk_used += len(data)
+                if self._disk_used > self.disk_bytes:
+                    self._evict_disk()
+
+        return {
+            "blob_id": blob_id,
+            "bytes": len(data),
+            "duration_ms": mp3_duration_ms(data) if mime == "audio/mpeg" else None,
+            "mime": mime
+        }
+
+    async def aput(self, data: bytes, mime: str = "audio/mpeg") -> Dict[str, Any]:
+        """`put` on a worker thread, so the disk write (and any eviction scan) stays off the event loop."""
+        return await asyncio.to_thread(self.put, data, mime)
+
+    def get(self, blob_id: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(blob_id)
+            if data is not None:
+                self._memory.move_to_end(blob_id)
+                self.memory_hits += 1
+                return data
+
+        path = self._path(blob_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # mtime doubles as the LRU clock for disk eviction
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(blob_id, data)
+        return data
+
+    def resolve(self, ref: Optional[Dict[str, Any]]) -> Optional[bytes]:
+        """Bytes for a state reference, or None if there is none (or it was evicted)."""
+        if not ref:
+            return None
+        return self.get(ref["blob_id"])
+
+    async def aresolve(self, ref: Optional[Dict[str, Any]]) -> Optional[bytes]:
+        if not ref:
+            return None
+        return await asyncio.to_thread(self.get, ref["blob_id"])
+
+    def _files(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".tmp"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _scan_disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def _evict_disk(self):
+        # Evict down to 90% so we don't rescan the directory on every put
+        target = int(self.disk_bytes * 0.9)
+        files = sorted(self._files(), key=lambda f: f[2])
+        used = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if used <= target:
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except OSError:
+                pass
+        self._disk_used = used
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_bytes": self._memory_used,
+            "memory_entries": len(self._memory)
+        }
+
+blob_store = BlobStore(
+    os.getenv("BLOB_STORE_DIR", ".blobs"),
+    memory_bytes=int(os.getenv("BLOB_STORE_MEMORY_MB", "64")) * 1024 * 1024,
+    disk_bytes=int(os.getenv("BLOB_STORE_DISK_MB", "1024")) * 1024 * 1024
+)
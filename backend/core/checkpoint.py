@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple, copy_checkpoint, get_checkpoint_id
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from core.metrics import track
+
+logger = logging.getLogger(__name__)
+
+class TTLSqliteSaver(SqliteSaver):
+    """
+    Disk-backed checkpointer for the API graph.
+
+    On top of SqliteSaver it adds:
+    - idle-thread TTL eviction (threads not read or written for `ttl_seconds` are deleted),
+    - compaction that keeps only the latest checkpoint (and its writes) per thread,
+    - a bounded LRU of the latest checkpoint tuple for active threads,
+    - async methods (run in a worker thread) so it can back graph.astream().
+    """
+
+    def __init__(self, conn: sqlite3.Connection, *, ttl_seconds: float = 6 * 3600, hot_cache_size: int = 256, serde=None):
+        super().__init__(conn, serde=serde)
+        self.ttl_seconds = ttl_seconds
+        self.hot_cache_size = hot_cache_size
+        self._hot: "OrderedDict[Tuple[str, str], CheckpointTuple]" = OrderedDict()
+        # Guards _hot, the in-flight read bookkeeping below and _last_seen
+        self._hot_lock = threading.Lock()
+        # Disk reads in progress per key, and the keys written to while one was in progress
+        self._reads_in_flight: Dict[Tuple[str, str], int] = {}
+        self._stale_reads = set()
+        self._last_seen: Dict[str, float] = {}
+        self.hot_hits = 0
+        self.hot_misses = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_path(cls, path: str, **kwargs) -> "TTLSqliteSaver":
+        return cls(sqlite3.connect(path, check_same_thread=False), **kwargs)
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, last_seen REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    # --- hot cache -------------------------------------------------------
+
+    def _touch(self, thread_id: str):
+        with self._hot_lock:
+            self._last_seen[thread_id] = time.time()
+
+    def _invalidate(self, thread_id: str, checkpoint_ns: Optional[str] = None):
+        """Called after a write has reached the database."""
+        def matches(key: Tuple[str, str]) -> bool:
+            return key[0] == thread_id and (checkpoint_ns is None or key[1] == checkpoint_ns)
+
+        with self._hot_lock:
+            for key in [k for k in self._hot if matches(k)]:
+                del self._hot[key]
+            # A read that started before the write may return the old checkpoint; it must not be cached
+            self._stale_reads.update(k for k in self._reads_in_flight if matches(k))
+
+    @staticmethod
+    def _copy(checkpoint_tuple: CheckpointTuple) -> CheckpointTuple:
+        # LangGraph updates the checkpoint it is handed in place, so callers never get the cached object
+        return checkpoint_tuple._replace(
+            checkpoint=copy_checkpoint(checkpoint_tuple.checkpoint),
+            metadata=dict(checkpoint_tuple.metadata),
+            pending_writes=list(checkpoint_tuple.pending_writes) if checkpoint_tuple.pending_writes is not None else None
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = str(config["configurable"]["thread_id"])
+        self._touch(thread_id)
+
+        # Only "latest checkpoint" lookups are cached; explicit checkpoint_id reads go to disk
+        if get_checkpoint_id(config):
+            return super().get_tuple(config)
+
+        key = (thread_id, config["configurable"].get("checkpoint_ns", ""))
+        with self._hot_lock:
+            if key in self._hot:
+                self._hot.move_to_end(key)
+                self.hot_hits += 1
+                return self._copy(self._hot[key])
+            self.hot_misses += 1
+            self._reads_in_flight[key] = self._reads_in_flight.get(key, 0) + 1
+
+        checkpoint_tuple = None
+        try:
+            checkpoint_tuple = super().get_tuple(config)
+        finally:
+            with self._hot_lock:
+                fresh = key not in self._stale_reads
+                remaining = self._reads_in_flight[key] - 1
+                if remaining:
+                    self._reads_in_flight[key] = remaining
+                else:
+                    del self._reads_in_flight[key]
+                    self._stale_reads.discard(key)
+                # A concurrent miss may already have filled it with the same checkpoint
+                if checkpoint_tuple is not None and fresh and key not in self._hot:
+                    self._hot[key] = self._copy(checkpoint_tuple)
+                    while len(self._hot) > self.hot_cache_size:
+                        self._hot.popitem(last=False)
+        return checkpoint_tuple
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        self._touch(thread_id)
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        self._invalidate(thread_id, config["configurable"].get("checkpoint_ns", ""))
+        return next_config
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        thread_id = str(config["configurable"]["thread_id"])
+        self._touch(thread_id)
+        super().put_writes(config, writes, task_id, task_path)
+        self._invalidate(thread_id, config["configurable"].get("checkpoint_ns", ""))
+
+    def delete_thread(self, thread_id: str) -> None:
+        thread_id = str(thread_id)
+        with self._hot_lock:
+            self._last_seen.pop(thread_id, None)
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+        self._invalidate(thread_id)
+
+    # --- async (SqliteSaver only implements the sync API) -----------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with track("checkpoint"):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None, before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        with track("checkpoint"):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        with track("checkpoint"):
+            await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # --- maintenance -----------------------------------------------------
+
+    def _flush_activity(self, cur: sqlite3.Cursor):
+        with self._hot_lock:
+            seen, self._last_seen = self._last_seen, {}
+        cur.executemany(
+            "INSERT INTO thread_activity (thread_id, last_seen) VALUES (?, ?) "
+            "ON CONFLICT(thread_id) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+            list(seen.items())
+        )
+        # Threads restored from disk after a restart start their TTL now
+        cur.execute(
+            "INSERT OR IGNORE INTO thread_activity (thread_id, last_seen) SELECT DISTINCT thread_id, ? FROM checkpoints",
+            (time.time(),)
+        )
+
+    def evict_idle(self, ttl_seconds: Optional[float] = None) -> int:
+        """Deletes threads idle for longer than the TTL. Returns the number of threads evicted."""
+        cutoff = time.time() - (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self.cursor() as cur:
+            self._flush_activity(cur)
+            cur.execute("SELECT thread_id FROM thread_activity WHERE last_seen < ?", (cutoff,))
+            expired = [row[0] for row in cur.fetchall()]
+            for thread_id in expired:
+                cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                cur.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+        for thread_id in expired:
+            self._invalidate(thread_id)
+        return len(expired)
+
+    def compact(self) -> int:
+        """Keeps only the latest checkpoint per thread/namespace. Returns the number of checkpoints removed."""
+        with self.cursor() as cur:
+            cur.execute(
+                "DELETE FROM checkpoints WHERE checkpoint_id < ("
+                "SELECT MAX(latest.checkpoint_id) FROM checkpoints AS latest "
+                "WHERE latest.thread_id = checkpoints.thread_id AND latest.checkpoint_ns = checkpoints.checkpoint_ns)"
+            )
+            removed = cur.rowcount
+            cur.execute(
+                "DELETE FROM writes WHERE NOT EXISTS ("
+                "SELECT 1 FROM checkpoints AS c WHERE c.thread_id = writes.thread_id "
+                "AND c.checkpoint_ns = writes.checkpoint_ns AND c.checkpoint_id = writes.checkpoint_id)"
+            )
+        # Fold the WAL back into the main file so the freed pages can be reused
+        with self.cursor(transaction=False) as cur:
+            cur.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self.cursor(transaction=False) as cur:
+            threads, checkpoints, checkpoint_bytes = cur.execute(
+                "SELECT COUNT(DISTINCT thread_id), COUNT(*), COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints"
+            ).fetchone()
+            writes, write_bytes = cur.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM writes"
+            ).fetchone()
+        return {
+            "threads": threads,
+            "checkpoints": checkpoints,
+            "checkpoint_bytes": checkpoint_bytes,
+            "writes": writes,
+            "write_bytes": write_bytes,
+            "hot_cache_entries": len(self._hot),
+            "hot_cache_hits": self.hot_hits,
+            "hot_cache_misses": self.hot_misses
+        }
+
+    def maintain(self) -> Dict[str, int]:
+        evicted = self.evict_idle()
+        compacted = self.compact()
+        return {"evicted_threads": evicted, "compacted_checkpoints": compacted}
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                result = self.maintain()
+                logger.info(f"Checkpoint maintenance: {result} {self.stats()}")
+            except Exception as e:
+                logger.error(f"Checkpoint maintenance failed: {e}")
+
+    def start_maintenance(self, interval: float = 300.0):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="checkpoint-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop_maintenance(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
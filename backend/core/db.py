@@ -1,5 +1,13 @@
-from typing import Optional
-from sqlmodel import Field, Session, SQLModel, create_engine, select
+import base64
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Index, and_, event, insert, inspect, or_, text, update
+from sqlmodel import Field, Session, SQLModel, create_engine, select, func
+from core.types import DEMOGRAPHICS, SCENARIO_TYPES
 
 class Scenario(SQLModel, table=True):
     voice_id: str = Field(primary_key=True)
@@ -7,20 +15,246 @@ class Scenario(SQLModel, table=True):
     voice_prompt: str
     victim_persona: str
     description: Optional[str] = None
+    example_dialogue: Optional[str] = None
+    # One of SCENARIO_TYPES / DEMOGRAPHICS; None for scenarios stored before they existed
+    scenario_type: Optional[str] = None
+    demographic: Optional[str] = None
+    # Pre-warmed pool: "ready" until a session claims it, then "claimed"
+    pool_status: Optional[str] = None
+    # JSON list of unused generated_voice_ids from the same voice design call
+    spare_voice_ids: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    claimed_at: Optional[datetime] = None
 
-sqlite_file_name = "database.db"
+    # Listing is newest first, optionally filtered; claiming takes the oldest ready row
+    __table_args__ = (
+        Index("ix_scenario_created_at", "created_at"),
+        Index("ix_scenario_type_created_at", "scenario_type", "created_at"),
+        Index("ix_scenario_demographic_created_at", "demographic", "created_at"),
+        Index("ix_scenario_pool_status_created_at", "pool_status", "created_at"),
+    )
+
+sqlite_file_name = os.getenv("SCENARIO_DB", "database.db")
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
-engine = create_engine(sqlite_url)
+# WAL lets readers proceed while a writer commits (SCENARIO_DB_WAL=0 keeps the rollback journal)
+SCENARIO_DB_WAL = os.getenv("SCENARIO_DB_WAL", "1") == "1"
+SCENARIO_DB_BUSY_TIMEOUT_MS = int(os.getenv("SCENARIO_DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Pooled connections are reused by whichever thread checks them out (API threads, scenario pool, batch workers)
+engine = create_engine(
+    sqlite_url,
+    connect_args={"check_same_thread": False},
+    pool_size=int(os.getenv("SCENARIO_DB_POOL_SIZE", "16")),
+    max_overflow=int(os.getenv("SCENARIO_DB_MAX_OVERFLOW", "16")),
+    pool_timeout=float(os.getenv("SCENARIO_DB_POOL_TIMEOUT", "30"))
+)
+
+@event.listens_for(engine, "connect")
+def _configure_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    if SCENARIO_DB_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Durable across application crashes; only an OS crash can lose the last commits
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    # Wait for a competing writer instead of failing with "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout={SCENARIO_DB_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+class ScenarioCache:
+    """
+    In-process read-through cache for get_scenario(), an LRU of detached rows.
+
+    Writes through this module invalidate their rows; `ttl_seconds` bounds how
+    long a row changed by another process can be served stale. Cached rows are
+    shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._rows: "OrderedDict[str, Tuple[float, Scenario]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, voice_id: str) -> Optional[Scenario]:
+        with self._lock:
+            entry = self._rows.get(voice_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._rows.move_to_end(voice_id)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._rows[voice_id]
+            self.misses += 1
+            return None
+
+    def put(self, scenario: Scenario):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._rows[scenario.voice_id] = (time.monotonic(), scenario)
+            self._rows.move_to_end(scenario.voice_id)
+            while len(self._rows) > self.max_entries:
+                self._rows.popitem(last=False)
+
+    def invalidate(self, voice_id: str):
+        with self._lock:
+            self._rows.pop(voice_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._rows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+scenario_cache = ScenarioCache(
+    max_entries=int(os.getenv("SCENARIO_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("SCENARIO_CACHE_TTL", "60"))
+)
+
+def _add_missing_columns():
+    # create_all() does not alter existing tables, so add columns introduced later
+    existing = {column["name"] for column in inspect(engine).get_columns(Scenario.__tablename__)}
+    with engine.begin() as connection:
+        for column in Scenario.__table__.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(engine.dialect)
+                connection.execute(text(f"ALTER TABLE {Scenario.__tablename__} ADD COLUMN {column.name} {column_type}"))
+
+def _create_missing_indexes():
+    # Likewise for indexes added to an existing table
+    for index in Scenario.__table__.indexes:
+        index.create(engine, checkfirst=True)
+
+def _backfill_created_at():
+    # Rows stored before created_at existed get NULL from ALTER TABLE; listing and
+    # cursors order on it, so date them to the migration. Bound through the column
+    # (not CURRENT_TIMESTAMP) so the stored text compares like every other row's
+    with engine.begin() as connection:
+        connection.execute(update(Scenario).where(Scenario.created_at.is_(None)).values(created_at=datetime.now(timezone.utc)))
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    _add_missing_columns()
+    _backfill_created_at()
+    _create_missing_indexes()
 
 def upsert_scenario(scenario: Scenario):
     with Session(engine) as session:
         session.merge(scenario)
         session.commit()
+    scenario_cache.invalidate(scenario.voice_id)
+
+def insert_scenarios(scenarios: List[Scenario]) -> int:
+    """
+    Bulk insert in one transaction (one executemany). Rows whose voice_id is
+    already stored are skipped, so replaying a batch is harmless. Returns the
+    number of rows inserted.
+    """
+    if not scenarios:
+        return 0
+    rows = [scenario.model_dump() for scenario in scenarios]
+    with engine.begin() as connection:
+        result = connection.execute(insert(Scenario).prefix_with("OR IGNORE"), rows)
+    for scenario in scenarios:
+        scenario_cache.invalidate(scenario.voice_id)
+    return result.rowcount
 
 def get_scenario(voice_id: str) -> Optional[Scenario]:
+    """Read through scenario_cache; the returned row is shared and must not be modified."""
+    scenario = scenario_cache.get(voice_id)
+    if scenario is None:
+        with Session(engine) as session:
+            scenario = session.get(Scenario, voice_id)
+        if scenario is not None:
+            scenario_cache.put(scenario)
+    return scenario
+
+def _utc(value: datetime) -> datetime:
+    # Naive datetimes are taken as UTC, which is how created_at is stored
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def encode_cursor(scenario: Scenario) -> str:
+    key = f"{_utc(scenario.created_at).isoformat()}|{scenario.voice_id}"
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, voice_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return _utc(datetime.fromisoformat(created_at)), voice_id
+    except ValueError as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+
+def list_scenarios(scenario_type: Optional[str] = None, demographic: Optional[str] = None, pool_status: Optional[str] = None,
+                   created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                   limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Scenario], Optional[str]]:
+    """
+    One page of scenarios, newest first, and the cursor for the next page (None on the last one).
+
+    Pages are keyset-paginated on (created_at, voice_id), so deep pages cost the
+    same as the first and rows inserted meanwhile do not shift them.
+    """
+    query = select(Scenario)
+    if scenario_type is not None:
+        query = query.where(Scenario.scenario_type == scenario_type)
+    if demographic is not None:
+        query = query.where(Scenario.demographic == demographic)
+    if pool_status is not None:
+        query = query.where(Scenario.pool_status == pool_status)
+    if created_after is not None:
+        query = query.where(Scenario.created_at >= _utc(created_after))
+    if created_before is not None:
+        query = query.where(Scenario.created_at < _utc(created_before))
+    if cursor is not None:
+        after_created_at, after_voice_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Scenario.created_at < after_created_at,
+            and_(Scenario.created_at == after_created_at, Scenario.voice_id < after_voice_id)
+        ))
+    query = query.order_by(Scenario.created_at.desc(), Scenario.voice_id.desc()).limit(limit + 1)
+
+    with Session(engine) as session:
+        rows = list(session.exec(query).all())
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def count_ready_scenarios() -> int:
     with Session(engine) as session:
-        return session.get(Scenario, voice_id)
+        return session.exec(select(func.count()).select_from(Scenario).where(Scenario.pool_status == "ready")).one()
+
+def claim_ready_scenario() -> Optional[Scenario]:
+    """
+    Atomically takes the oldest ready scenario out of the pool.
+    The conditional UPDATE makes the claim safe across threads and worker processes:
+    if another worker claimed the same row first, we move on to the next candidate.
+    """
+    with Session(engine) as session:
+        while True:
+            candidate = session.exec(
+                select(Scenario.voice_id)
+                .where(Scenario.pool_status == "ready")
+                .order_by(Scenario.created_at)
+                .limit(1)
+            ).first()
+            if candidate is None:
+                return None
+
+            result = session.exec(
+                update(Scenario)
+                .where(Scenario.voice_id == candidate, Scenario.pool_status == "ready")
+                .values(pool_status="claimed", claimed_at=datetime.now(timezone.utc))
+            )
+            session.commit()
+            if result.rowcount == 1:
+                scenario_cache.invalidate(candidate)
+                return session.get(Scenario, candidate)
@@ -0,0 +1,147 @@
+"""
+Block-wise telephone-line simulation on float32 mono PCM.
+
+`TelephoneLine.process()` accepts blocks of any size and carries filter
+history, compressor envelope, hum phase and packet-loss state between calls,
+so TTS chunks can be processed as they stream in without seams.
+
+Chain: FIR band-pass (300-3400 Hz) -> compressor -> limiter ->
+Gilbert-Elliott packet loss -> line hiss and mains hum.
+"""
+import os
+from typing import Optional
+
+import numpy as np
+
+# Narrowband telephony runs at 8 kHz
+EFFECTS_SAMPLE_RATE = int(os.getenv("EFFECTS_SAMPLE_RATE", "8000"))
+
+def bandpass_taps(sample_rate: int, low: float = 300.0, high: float = 3400.0, taps: int = 129) -> np.ndarray:
+    """Hamming-windowed sinc band-pass, normalized to unity gain mid-band."""
+    n = np.arange(taps) - (taps - 1) / 2
+
+    def lowpass(cutoff: float) -> np.ndarray:
+        return 2 * cutoff / sample_rate * np.sinc(2 * cutoff / sample_rate * n)
+
+    h = (lowpass(min(high, sample_rate / 2 * 0.95)) - lowpass(low)) * np.hamming(taps)
+    center = np.sqrt(low * high)
+    h /= np.abs(np.dot(h, np.exp(-2j * np.pi * center / sample_rate * np.arange(taps))))
+    return h.astype(np.float32)
+
+class TelephoneLine:
+    def __init__(self, sample_rate: int = EFFECTS_SAMPLE_RATE, *,
+                 threshold_db: float = -24.0, ratio: float = 4.0, makeup_db: float = 9.0,
+                 attack_ms: float = 5.0, release_ms: float = 80.0, ceiling_db: float = -1.0,
+                 hiss_db: float = -50.0, hum_db: float = -48.0, hum_hz: float = 60.0,
+                 packet_ms: int = 20, loss_good_to_bad: float = 0.01, loss_bad_to_good: float = 0.35,
+                 seed: Optional[int] = None):
+        self.sample_rate = sample_rate
+        self.taps = bandpass_taps(sample_rate)
+        self._history = np.zeros(len(self.taps) - 1, dtype=np.float32)
+
+        # Gain is computed per 5 ms sub-block and interpolated across samples
+        self.sub_block = max(1, sample_rate // 200)
+        self.threshold_db = threshold_db
+        self.slope = 1.0 - 1.0 / ratio
+        self.makeup_db = makeup_db
+        self.attack = np.exp(-self.sub_block / (sample_rate * attack_ms / 1000))
+        self.release = np.exp(-self.sub_block / (sample_rate * release_ms / 1000))
+        self.ceiling = 10 ** (ceiling_db / 20)
+        self._envelope_db = -120.0
+        self._last_gain = 1.0
+
+        self.hiss = 10 ** (hiss_db / 20)
+        self.hum = 10 ** (hum_db / 20)
+        self.hum_step = 2 * np.pi * hum_hz / sample_rate
+        self._hum_phase = 0.0
+
+        self.packet = sample_rate * packet_ms // 1000
+        self.p_gb = loss_good_to_bad
+        self.p_bg = loss_bad_to_good
+        self._bad = False
+        self._packet_offset = 0
+        self._packet_lost = False
+        self._rng = np.random.default_rng(seed)
+
+    # --- stages ------------------------------------------------------------
+
+    def _bandpass(self, x: np.ndarray) -> np.ndarray:
+        padded = np.concatenate([self._history, x])
+        self._history = padded[len(padded) - len(self._history):]
+        return np.convolve(padded, self.taps, mode="valid").astype(np.float32)
+
+    def _dynamics(self, x: np.ndarray) -> np.ndarray:
+        count = -(-len(x) // self.sub_block)
+        padded = np.zeros(count * self.sub_block, dtype=np.float32)
+        padded[:len(x)] = x
+        blocks = padded.reshape(count, self.sub_block)
+        level_db = 10 * np.log10(np.mean(blocks * blocks, axis=1) + 1e-12)
+
+        # The envelope recursion is per sub-block (200/s), cheap enough in Python
+        envelope = np.empty(count)
+        current = self._envelope_db
+        for i, level in enumerate(level_db):
+            coefficient = self.attack if level > current else self.release
+            current = coefficient * current + (1 - coefficient) * level
+            envelope[i] = current
+        self._envelope_db = current
+
+        gain_db = np.minimum(0.0, (self.threshold_db - envelope) * self.slope) + self.makeup_db
+        gain = 10 ** (gain_db / 20)
+        # Limiter: never let a sub-block's peak exceed the ceiling
+        peaks = np.max(np.abs(blocks), axis=1) * gain
+        gain = np.where(peaks > self.ceiling, gain * self.ceiling / np.maximum(peaks, 1e-12), gain)
+
+        # Interpolate between sub-block gains so gain changes do not click
+        points = np.concatenate([[self._last_gain], gain])
+        positions = np.concatenate([[0], (np.arange(count) + 1) * self.sub_block])
+        per_sample = np.interp(np.arange(1, len(x) + 1), positions, points).astype(np.float32)
+        self._last_gain = float(per_sample[-1]) if len(x) else self._last_gain
+        return np.clip(x * per_sample, -self.ceiling, self.ceiling)
+
+    def _packet_loss(self, x: np.ndarray) -> np.ndarray:
+        positions = self._packet_offset + np.arange(len(x))
+        packet_index = positions // self.packet
+        count = int(packet_index[-1]) + 1 if len(x) else 0
+
+        lost = np.empty(count, dtype=bool)
+        draws = self._rng.random(count)
+        for i in range(count):
+            if i == 0 and self._packet_offset:
+                # Continues the packet in flight at the end of the previous block
+                lost[0] = self._packet_lost
+                continue
+            # Two-state Markov chain: losses come in bursts, as on a congested line
+            self._bad = (draws[i] >= self.p_bg) if self._bad else (draws[i] < self.p_gb)
+            lost[i] = self._bad
+        if count:
+            self._packet_lost = bool(lost[-1])
+        self._packet_offset = int(positions[-1] + 1) % self.packet if len(x) else self._packet_offset
+
+        mask = np.where(lost[packet_index], 0.0, 1.0).astype(np.float32)
+        return x * mask
+
+    def _line_noise(self, x: np.ndarray) -> np.ndarray:
+        phases = self._hum_phase + self.hum_step * np.arange(1, len(x) + 1)
+        self._hum_phase = float(phases[-1] % (2 * np.pi)) if len(x) else self._hum_phase
+        hum = self.hum * (np.sin(phases) + 0.5 * np.sin(3 * phases))
+        hiss = self.hiss * self._rng.standard_normal(len(x))
+        return (x + hum + hiss).astype(np.float32)
+
+    # --- public ------------------------------------------------------------
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if not len(block):
+            return block.astype(np.float32)
+        x = self._bandpass(block.astype(np.float32, copy=False))
+        x = self._dynamics(x)
+        x = self._packet_loss(x)
+        x = self._line_noise(x)
+        return np.clip(x, -1.0, 1.0)
+
+    def process_pcm16(self, pcm: bytes, block_samples: int = 4096) -> bytes:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        out = [self.process(samples[i:i + block_samples]) for i in range(0, len(samples), block_samples)]
+        if not out:
+            return b""
+        return (np.concatenate(out) * 32767).astype(np.int16).tobytes()
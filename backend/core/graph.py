@@ -1,32 +1,62 @@
 from langgraph.graph import StateGraph, END
 from typing import Any, Optional
 from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.runnables import RunnableLambda
 
 from .state import PipelineState
-from agents.scenario import generate_scenario_node, generate_response_node
-from agents.voice_design import voice_design_node
-from agents.tts import tts_node
-from agents.effects import audio_effects_node
+from .metrics import timed_node
+from agents.scenario import generate_scenario_node, generate_response_node, agenerate_scenario_node, agenerate_response_node
+from agents.voice_design import voice_design_node, avoice_design_node
+from agents.tts import tts_node, atts_node
+from agents.pipelined_response import pipelined_response_node, apipelined_response_node
+from agents.effects import audio_effects_node, aaudio_effects_node
 from agents.dispatcher_input import dispatcher_input_node
 
-def build_graph(is_cli: bool = True, checkpointer: Optional[BaseCheckpointSaver] = None):
+def add_node(workflow: StateGraph, name: str, func, afunc=None):
+    """Registers a node with timing/size instrumentation (core/metrics.py) around both implementations."""
+    if afunc is None:
+        workflow.add_node(name, timed_node(name, func))
+    else:
+        workflow.add_node(name, RunnableLambda(timed_node(name, func), afunc=timed_node(name, afunc)))
+
+def build_graph(is_cli: bool = True, checkpointer: Optional[BaseCheckpointSaver] = None, pipelined: bool = False, fan_out: bool = True):
     workflow = StateGraph(PipelineState)
 
-    workflow.add_node("scenario_generator", generate_scenario_node)
-    workflow.add_node("voice_designer", voice_design_node)
-    workflow.add_node("generate_response", generate_response_node)
-    workflow.add_node("tts_generator", tts_node)
-    workflow.add_node("audio_effects", audio_effects_node)
+    # Each node carries a sync and an async implementation: graph.stream() (CLI)
+    # runs the former, graph.astream() (API) awaits the latter on the event loop.
+    add_node(workflow, "scenario_generator", generate_scenario_node, agenerate_scenario_node)
+    add_node(workflow, "voice_designer", voice_design_node, avoice_design_node)
+    if pipelined:
+        # Streams the reply and synthesizes it sentence by sentence in one node
+        add_node(workflow, "generate_response", pipelined_response_node, apipelined_response_node)
+    else:
+        add_node(workflow, "generate_response", generate_response_node, agenerate_response_node)
+        add_node(workflow, "tts_generator", tts_node, atts_node)
+    add_node(workflow, "audio_effects", audio_effects_node, aaudio_effects_node)
 
     if is_cli:
-        workflow.add_node("dispatcher_input", dispatcher_input_node)
+        add_node(workflow, "dispatcher_input", dispatcher_input_node)
 
     workflow.set_entry_point("scenario_generator")
-    workflow.add_edge("scenario_generator", "voice_designer")
-    
-    workflow.add_edge("voice_designer", "generate_response")
-    workflow.add_edge("generate_response", "tts_generator")
-    workflow.add_edge("tts_generator", "audio_effects")
+    if pipelined:
+        # The pipelined node synthesizes as it writes, so it needs the voice first
+        workflow.add_edge("scenario_generator", "voice_designer")
+        workflow.add_edge("voice_designer", "generate_response")
+        workflow.add_edge("generate_response", "audio_effects")
+    elif not fan_out:
+        workflow.add_edge("scenario_generator", "voice_designer")
+        workflow.add_edge("voice_designer", "generate_response")
+        workflow.add_edge("generate_response", "tts_generator")
+        workflow.add_edge("tts_generator", "audio_effects")
+    else:
+        # The reply only needs the persona, so it is written while the voice is
+        # designed. Both run in the same superstep, so tts_generator starts once,
+        # after the slower of the two (voice design is skipped after the first turn).
+        workflow.add_edge("scenario_generator", "voice_designer")
+        workflow.add_edge("scenario_generator", "generate_response")
+        workflow.add_edge("voice_designer", "tts_generator")
+        workflow.add_edge("generate_response", "tts_generator")
+        workflow.add_edge("tts_generator", "audio_effects")
     
     if is_cli:
         workflow.add_edge("audio_effects", "dispatcher_input")
@@ -0,0 +1,217 @@
+"""
+In-process metrics for the turn pipeline, exported in the Prometheus text
+format on /metrics.
+
+Every graph node, the STT step and checkpoint I/O go through `track()`,
+which records duration (by status), bytes in and bytes out as histograms,
+and adds the duration to the current turn's breakdown so the API can return
+it in a Server-Timing header. Checkpoint store size is exported as gauges,
+refreshed when /metrics is scraped. Gemini, ElevenLabs and STT requests made inside
+a step go through `provider_call()`, so a failed step is labelled with the
+provider and its HTTP status (`gemini_429`, `elevenlabs_500`) or
+`<provider>_timeout` rather than a bare "error".
+"""
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DURATION_BUCKETS, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        # label values -> (per-bucket counts, sum, count)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                labels = _format_labels(self.labelnames, key)
+                for bound, bucket_count in zip(self.buckets, counts):
+                    bucket_labels = _format_labels(self.labelnames, key, 'le="%g"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+                inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf_labels} {count}")
+                lines.append(f"{self.name}_sum{labels} {total:.6f}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.value:g}"]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DURATION_BUCKETS, labelnames: Sequence[str] = ()) -> Histogram:
+        metric = Histogram(name, help, buckets, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        metric = Gauge(name, help)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+metrics = MetricsRegistry()
+
+STEP_DURATION = metrics.histogram("crisislink_step_duration_seconds", "Time spent in a pipeline step (graph node, STT, checkpoint I/O).", DURATION_BUCKETS, ("step", "status"))
+STEP_BYTES_IN = metrics.histogram("crisislink_step_bytes_in", "Approximate payload size handed to a pipeline step.", BYTES_BUCKETS, ("step",))
+STEP_BYTES_OUT = metrics.histogram("crisislink_step_bytes_out", "Approximate payload size produced by a pipeline step.", BYTES_BUCKETS, ("step",))
+
+CHECKPOINT_THREADS = metrics.gauge("crisislink_checkpoint_threads", "Threads with graph state in the checkpoint store.")
+CHECKPOINT_COUNT = metrics.gauge("crisislink_checkpoints", "Checkpoints in the checkpoint store (all threads).")
+CHECKPOINT_BYTES = metrics.gauge("crisislink_checkpoint_bytes", "Serialized size of the stored checkpoints and their metadata.")
+
+def record_checkpoint_stats(stats: Dict[str, int]):
+    """Sets the checkpoint gauges from TTLSqliteSaver.stats()."""
+    CHECKPOINT_THREADS.set(stats["threads"])
+    CHECKPOINT_COUNT.set(stats["checkpoints"])
+    CHECKPOINT_BYTES.set(stats["checkpoint_bytes"])
+
+# Per-turn breakdown (step -> seconds) for the Server-Timing header
+_turn_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("turn_timings", default=None)
+
+def start_turn() -> Dict[str, float]:
+    """Starts collecting step timings for the current request; returns the (live) breakdown."""
+    timings: Dict[str, float] = {}
+    _turn_timings.set(timings)
+    return timings
+
+def server_timing(timings: Dict[str, float], total: Optional[float] = None) -> str:
+    """Server-Timing header value; repeated steps (checkpoint I/O) are summed."""
+    entries = [f"{step};dur={seconds * 1000:.1f}" for step, seconds in timings.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+def payload_size(value) -> int:
+    """Rough size of a state value: text and bytes by length, blob references by the audio they stand for."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        if "blob_id" in value and "bytes" in value:
+            return int(value["bytes"])
+        return sum(payload_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(v) for v in value)
+    content = getattr(value, "content", None)
+    return payload_size(content) if content is not None else 0
+
+class _Step:
+    def __init__(self, bytes_in: int):
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self.status = "ok"
+        # Set by provider_call when a provider request fails inside the step
+        self.provider_error: Optional[str] = None
+
+# The step being tracked, so provider calls made inside it can label its status
+_current_step: ContextVar[Optional[_Step]] = ContextVar("current_step", default=None)
+
+@contextmanager
+def track(step: str, bytes_in: int = 0) -> Iterator[_Step]:
+    """Times a step; set `.bytes_out` (and optionally `.status`) on the yielded object."""
+    record = _Step(bytes_in)
+    previous = _current_step.get()
+    _current_step.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        if record.status == "ok":
+            record.status = record.provider_error or "error"
+        raise
+    finally:
+        _current_step.set(previous)
+        elapsed = time.perf_counter() - started
+        STEP_DURATION.observe(elapsed, step=step, status=record.status)
+        STEP_BYTES_IN.observe(record.bytes_in, step=step)
+        STEP_BYTES_OUT.observe(record.bytes_out, step=step)
+        timings = _turn_timings.get()
+        if timings is not None:
+            timings[step] = timings.get(step, 0.0) + elapsed
+
+def provider_status(error: BaseException) -> str:
+    """HTTP status of a failed provider request if the SDK exposes one, else "timeout" or the exception class."""
+    # ElevenLabs ApiError has status_code, google.api_core errors have code, httpx errors carry the response
+    for source in (error, getattr(error, "response", None)):
+        for attribute in ("status_code", "code"):
+            code = getattr(source, attribute, None)
+            if isinstance(code, int):
+                return str(code)
+    if isinstance(error, TimeoutError) or "Timeout" in type(error).__name__:
+        return "timeout"
+    return type(error).__name__
+
+@contextmanager
+def provider_call(provider: str) -> Iterator[None]:
+    """Wraps a provider request; if it fails and the step fails with it, the step's status is `<provider>_<status>`."""
+    try:
+        yield
+    except Exception as e:
+        record = _current_step.get()
+        # The innermost failure is the cause (a TTS error surfacing through the reply stream, say)
+        if record is not None and record.provider_error is None:
+            record.provider_error = f"{provider}_{provider_status(e)}"
+        raise
+
+def timed_node(name: str, fn):
+    """Wraps a sync or async graph node so each run is tracked under `name`."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(state):
+            with track(name, payload_size(state)) as record:
+                update = await fn(state)
+                record.bytes_out = payload_size(update)
+                return update
+    else:
+        @functools.wraps(fn)
+        def wrapper(state):
+            with track(name, payload_size(state)) as record:
+                update = fn(state)
+                record.bytes_out = payload_size(update)
+                return update
+    return wrapper
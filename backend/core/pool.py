@@ -0,0 +1,91 @@
+import json
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    # core.db (SQLModel/SQLAlchemy) is imported when the pool first touches the database
+    from core.db import Scenario
+
+logger = logging.getLogger(__name__)
+
+def scenario_record(scenario: dict, voice_definition: dict, pool_status: Optional[str] = "ready") -> "Scenario":
+    """Scenario row for a generated scenario and its designed voice."""
+    from core.db import Scenario
+
+    return Scenario(
+        voice_id=voice_definition["voice_id"],
+        voice_name=scenario.get("voice_name", "Unknown"),
+        voice_prompt=scenario.get("voice_prompt", ""),
+        victim_persona=scenario.get("victim_persona", ""),
+        description=scenario.get("description", ""),
+        example_dialogue=scenario.get("example_dialogue"),
+        scenario_type=scenario.get("scenario_type"),
+        demographic=scenario.get("demographic"),
+        pool_status=pool_status,
+        spare_voice_ids=json.dumps(voice_definition.get("spare_generated_voice_ids", []))
+    )
+
+class ScenarioPool:
+    """
+    Keeps `target_size` fully prepared scenarios (scenario text + designed voice)
+    in the Scenario table so a new session can start without waiting on Gemini
+    and ElevenLabs voice design.
+    """
+
+    def __init__(self, target_size: int, interval: float = 30.0):
+        self.target_size = target_size
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def prepare_scenario(self) -> "Scenario":
+        from agents.scenario import generate_scenario_node
+        from agents.voice_design import voice_design_node
+
+        scenario = generate_scenario_node({})["scenario"]
+        voice_definition = voice_design_node({"scenario": scenario})["voice_definition"]
+        return scenario_record(scenario, voice_definition)
+
+    def replenish_once(self) -> int:
+        """Tops the pool up to target_size. Returns the number of scenarios added."""
+        from core.db import count_ready_scenarios, upsert_scenario
+        added = 0
+        while not self._stop.is_set() and count_ready_scenarios() < self.target_size:
+            try:
+                scenario = self.prepare_scenario()
+                upsert_scenario(scenario)
+            except Exception as e:
+                logger.error(f"Scenario pool: failed to prepare scenario: {e}")
+                break
+            added += 1
+            logger.info(f"Scenario pool: added {scenario.voice_name} ({scenario.voice_id})")
+        return added
+
+    def claim(self) -> Optional["Scenario"]:
+        from core.db import claim_ready_scenario
+        scenario = claim_ready_scenario()
+        # Refill in the background right away instead of waiting for the next tick
+        self._wake.set()
+        return scenario
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.replenish_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="scenario-pool", daemon=True)
+        self._thread.start()
+        logger.info(f"Scenario pool: replenishing to {self.target_size} ready scenarios")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Connection pool shared by every ElevenLabs call in the process
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("PROVIDER_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("PROVIDER_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "120"))
+)
+HTTP_TIMEOUT = httpx.Timeout(240.0, connect=10.0)
+
+# Worker threads for async Gemini calls over the REST transport (see _use_rest_transport)
+GEMINI_REST_THREADS = int(os.getenv("GEMINI_REST_THREADS", "64"))
+
+def _use_rest_transport(genai):
+    """
+    Makes generate_content_async work over the REST transport, which has no
+    async client: the blocking call (and each step of a stream) runs on a
+    dedicated thread pool instead.
+    """
+    executor = ThreadPoolExecutor(max_workers=GEMINI_REST_THREADS, thread_name_prefix="gemini-rest")
+
+    async def run(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    async def iterate(response):
+        chunks = iter(response)
+        done = object()
+        while (chunk := await run(next, chunks, done)) is not done:
+            yield chunk
+
+    class RestGenerativeModel(genai.GenerativeModel):
+        async def generate_content_async(self, contents, *, stream: bool = False, **kwargs):
+            response = await run(lambda: self.generate_content(contents, stream=stream, **kwargs))
+            return iterate(response) if stream else response
+
+    genai.GenerativeModel = RestGenerativeModel
+
+class ProviderRegistry:
+    """
+    Owns the long-lived Gemini and ElevenLabs clients for the process.
+
+    Clients are created lazily on first use (under a lock, so concurrent first
+    calls get the same instance) and reuse keep-alive connection pools, so a turn
+    no longer pays for client construction or a fresh TLS handshake.
+    `register()` swaps in another client, e.g. stubs for benchmarks.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clients: Dict[str, Any] = {}
+
+    def _get(self, name: str, factory):
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = factory()
+                    self._clients[name] = client
+        return client
+
+    def register(self, name: str, client: Any):
+        with self._lock:
+            self._clients[name] = client
+
+    def reset(self):
+        with self._lock:
+            self._clients.clear()
+
+    def elevenlabs_base_url(self) -> str:
+        return os.getenv("ELEVENLABS_BASE_URL") or "https://api.elevenlabs.io"
+
+    def http_client(self) -> httpx.Client:
+        return self._get("http", lambda: httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT))
+
+    def async_http_client(self) -> httpx.AsyncClient:
+        return self._get("async_http", lambda: httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT))
+
+    def elevenlabs(self):
+        def create():
+            from elevenlabs.client import ElevenLabs
+            return ElevenLabs(
+                api_key=os.getenv("ELEVENLABS_API_KEY"),
+                base_url=self.elevenlabs_base_url(),
+                httpx_client=self.http_client()
+            )
+        return self._get("elevenlabs", create)
+
+    def async_elevenlabs(self):
+        def create():
+            from elevenlabs.client import AsyncElevenLabs
+            return AsyncElevenLabs(
+                api_key=os.getenv("ELEVENLABS_API_KEY"),
+                base_url=self.elevenlabs_base_url(),
+                httpx_client=self.async_http_client()
+            )
+        return self._get("async_elevenlabs", create)
+
+    def genai(self):
+        """The configured google.generativeai module."""
+        def create():
+            import google.generativeai as genai
+            base_url = os.getenv("GEMINI_BASE_URL")
+            if base_url:
+                # e.g. benchmarks/fake_providers.py; only the REST transport speaks plain HTTP
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY") or "local", transport="rest", client_options={"api_endpoint": base_url})
+                _use_rest_transport(genai)
+            else:
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            return genai
+        return self._get("genai", create)
+
+    def gemini_model(self, model_name: str):
+        return self._get(f"gemini:{model_name}", lambda: self.genai().GenerativeModel(model_name))
+
+    def warm_up_elevenlabs(self):
+        self.elevenlabs()
+        try:
+            # Any response will do: this only establishes a pooled TLS connection
+            self.http_client().head(self.elevenlabs_base_url())
+        except Exception as e:
+            logger.warning(f"ElevenLabs warm-up failed: {e}")
+
+    def warm_up_gemini(self):
+        genai = self.genai()
+        try:
+            genai.get_model("models/gemini-2.5-flash")
+        except Exception as e:
+            logger.warning(f"Gemini warm-up failed: {e}")
+
+    def warm_up(self):
+        """Creates the clients and opens their connections ahead of the first turn."""
+        self.warm_up_elevenlabs()
+        self.warm_up_gemini()
+
+    async def awarm_up(self):
+        """warm_up() with both providers in parallel, plus the async pool, which must be opened on the serving event loop."""
+        async def elevenlabs():
+            # The SDK import happens in the thread, so creating the async client below does not block the loop
+            await asyncio.to_thread(self.warm_up_elevenlabs)
+            self.async_elevenlabs()
+            try:
+                await self.async_http_client().head(self.elevenlabs_base_url())
+            except Exception as e:
+                logger.warning(f"ElevenLabs async warm-up failed: {e}")
+
+        await asyncio.gather(elevenlabs(), asyncio.to_thread(self.warm_up_gemini))
+
+providers = ProviderRegistry()
@@ -1,23 +1,17 @@
-import os
-import shutil
-import tempfile
 import io
-import speech_recognition as sr
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydub import AudioSegment
 from pydub.playback import play
-from elevenlabs.client import ElevenLabs
 from dotenv import load_dotenv
+from core.transcription import STT_SAMPLE_RATE, get_stt_engine, pcm_to_wav
+from core.vad import Microphone, VAD_SAMPLE_RATE
 
 # Load env variables (Ensure ELEVENLABS_API_KEY is set in your .env)
 load_dotenv()
 
 app = FastAPI()
 
-# Initialize ElevenLabs Client
-client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
-
 # CORS setup
 app.add_middleware(
     CORSMiddleware,
@@ -27,66 +21,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def transcribe_with_elevenlabs(file_path: str) -> str:
+# ElevenLabs Scribe unless STT_ENGINE selects another engine
+stt_engine = get_stt_engine(default="elevenlabs")
+
+def transcribe_audio(audio: bytes, mime_type: str = "audio/wav") -> str:
     """
-    Sends an audio file to ElevenLabs Scribe model for transcription.
+    Transcribes in-memory audio with the configured STT engine.
     """
-    print(f"[ELEVENLABS] Transcribing {file_path}...")
+    print(f"[STT:{stt_engine.name}] Transcribing {len(audio)} bytes...")
     try:
-        # Open file in binary read mode
-        with open(file_path, "rb") as audio_file:
-            transcription = client.speech_to_text.convert(
-                file=audio_file,
-                model_id="scribe_v1", # The specific STT model
-                tag_audio_events=False,
-                language_code="en",
-                diarize=False
-            )
-            # The transcription object usually returns text directly or has a .text property
-            # Depending on SDK version, it might return a string or an object.
-            return transcription.text
+        return stt_engine.transcribe(audio, mime_type)
             
     except Exception as e:
-        print(f"[ELEVENLABS] Error: {e}")
+        print(f"[STT:{stt_engine.name}] Error: {e}")
         return "(Transcription Failed)"
 
+def decode_upload(audio: bytes, mime_type: str) -> AudioSegment:
+    """The request's only decode; playback and PCM-based STT engines both use it."""
+    audio_format = "wav" if "wav" in mime_type else "mp3"
+    # BytesIO over the upload shares its buffer; pydub pipes it to the decoder without a temp file
+    return AudioSegment.from_file(io.BytesIO(audio), format=audio_format)
+
+# Opened on first use and kept open, so the noise floor is calibrated once
+microphone = Microphone(device_index=0) # Adjust for your hardware
+
 def record_from_mic_and_transcribe():
     """
-    1. Records audio using SpeechRecognition (for silence detection).
-    2. Saves it to a temp WAV file.
-    3. Sends that WAV to ElevenLabs for transcription.
+    1. Records from the mic until the endpointer detects the end of speech.
+    2. Sends the trimmed speech to the STT engine for transcription.
     """
-    recognizer = sr.Recognizer()
-    mic_index = 0 # Adjust for your hardware
-    
-    print(f"\n[SERVER] Opening Microphone (Index {mic_index})...")
+    print("\n[SERVER] LISTENING... Speak now.")
     
     try:
-        with sr.Microphone(device_index=mic_index) as source:
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            print("[SERVER] LISTENING... Speak now.")
-            
-            # Record audio (blocks until silence is detected)
-            audio_data = recognizer.listen(source, timeout=5, phrase_time_limit=10)
-            print("[SERVER] Processing Mic Audio...")
-            
-            # Save raw audio to a temp file for ElevenLabs
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
-                temp_wav.write(audio_data.get_wav_data())
-                temp_wav_path = temp_wav.name
-            
-            # Transcribe using ElevenLabs
-            text = transcribe_with_elevenlabs(temp_wav_path)
-            
-            # Clean up temp file
-            os.remove(temp_wav_path)
-            
-            print(f"[SERVER] MIC DETECTED: {text}")
-            return text
+        pcm = microphone.record_utterance(timeout=5)
+        if pcm is None:
+            print("[SERVER] No speech detected.")
+            return None
+
+        print(f"[SERVER] Processing Mic Audio ({len(pcm) / (VAD_SAMPLE_RATE * 2):.1f}s of speech)...")
+        text = transcribe_audio(pcm_to_wav(pcm, VAD_SAMPLE_RATE))
+        
+        print(f"[SERVER] MIC DETECTED: {text}")
+        return text
 
-    except sr.WaitTimeoutError:
-        print("[SERVER] No speech detected.")
-        return None
     except Exception as e:
         print(f"[SERVER] Mic/Transcribe Error: {e}")
         return None
@@ -94,45 +71,51 @@ def record_from_mic_and_transcribe():
 @app.post("/process-audio")
 async def process_audio(file: UploadFile = File(...)):
     """
-    1. Receives MP3 from Frontend -> Transcribes via ElevenLabs.
+    1. Receives MP3 from Frontend -> Transcribes it.
     2. Plays MP3 on Server Speakers.
-    3. Records User Mic -> Transcribes via ElevenLabs.
+    3. Records User Mic -> Transcribes it.
     4. Returns both texts.
     """
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # --- 1. Save & Transcribe Uploaded MP3 ---
-        mp3_path = os.path.join(temp_dir, "input.mp3")
-        
-        with open(mp3_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        print(f"\n[API] Received file: {file.filename}")
-        
-        # Transcribe the INCOMING audio (from dispatcher/tts)
-        uploaded_text = transcribe_with_elevenlabs(mp3_path)
-        print(f"[API] UPLOADED AUDIO SAID: {uploaded_text}")
+    # --- 1. Read the upload once; everything below works on this buffer ---
+    audio_bytes = await file.read()
+    mime_type = file.content_type or "audio/mpeg"
+    print(f"\n[API] Received file: {file.filename} ({len(audio_bytes)} bytes)")
+
+    try:
+        audio_segment = decode_upload(audio_bytes, mime_type)
+    except Exception as e:
+        print(f"[API] Decode Error: {e}")
+        audio_segment = None
+
+    # Transcribe the INCOMING audio (from dispatcher/tts)
+    if stt_engine.needs_pcm and audio_segment is not None:
+        pcm = audio_segment.set_frame_rate(STT_SAMPLE_RATE).set_channels(1).set_sample_width(2).raw_data
+        uploaded_text = transcribe_audio(pcm_to_wav(pcm, STT_SAMPLE_RATE))
+    else:
+        # Cloud engines take the original MP3 as-is
+        uploaded_text = transcribe_audio(audio_bytes, mime_type)
+    print(f"[API] UPLOADED AUDIO SAID: {uploaded_text}")
 
-        # --- 2. Play Audio ---
-        # Convert to WAV for playback (pydub requirement usually)
+    # --- 2. Play Audio ---
+    if audio_segment is not None:
+        print("[API] Playing audio...")
         try:
-            audio_segment = AudioSegment.from_mp3(mp3_path)
-            print("[API] Playing audio...")
             play(audio_segment) # BLOCKS here until audio finishes
         except Exception as e:
             print(f"[API] Playback Error: {e}")
 
-        # --- 3. Record & Transcribe Response ---
-        # Starts strictly AFTER playback finishes
-        mic_text = record_from_mic_and_transcribe()
+    # --- 3. Record & Transcribe Response ---
+    # Starts strictly AFTER playback finishes
+    mic_text = record_from_mic_and_transcribe()
 
-        if not mic_text:
-            mic_text = "..."
+    if not mic_text:
+        mic_text = "..."
 
-        return {
-            "uploaded_audio_transcript": uploaded_text,
-            "server_mic_transcript": mic_text,
-            "status": "success"
-        }
+    return {
+        "uploaded_audio_transcript": uploaded_text,
+        "server_mic_transcript": mic_text,
+        "status": "success"
+    }
 
 if __name__ == "__main__":
     import uvicorn
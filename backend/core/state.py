@@ -1,11 +1,19 @@
 from typing import TypedDict, List, Optional, Any, Dict, Annotated
 from langchain_core.messages import BaseMessage
-from langgraph.graph.message import add_messages
+
+def add_messages(left, right):
+    """LangGraph's messages reducer, imported on first use so agents can load without langgraph."""
+    from langgraph.graph.message import add_messages as merge_messages
+    return merge_messages(left, right)
 
 class PipelineState(TypedDict):
     scenario: Dict[str, Any]
     voice_definition: Optional[Dict[str, Any]]
     current_text: Optional[str]
     audio_history: List[str]
-    final_audio: Optional[str]
+    # Blob store reference for the latest victim line: {blob_id, bytes, duration_ms, mime}
+    final_audio: Optional[Dict[str, Any]]
     messages: Annotated[List[BaseMessage], add_messages]
+    # Rolling summary of messages[:summarized_count], which are no longer sent verbatim
+    summary: Optional[str]
+    summarized_count: int
@@ -0,0 +1,208 @@
+"""
+Speech-to-text behind one interface, selected per deployment with STT_ENGINE:
+
+- "gemini"      Gemini multimodal transcription (API default)
+- "elevenlabs"  ElevenLabs Scribe (core/server.py default)
+- "google"      speech_recognition's free Google Web Speech endpoint
+- "vosk"        local CPU-only Kaldi model with streaming partials; needs
+                `pip install vosk` and VOSK_MODEL_PATH pointing at an unpacked model
+
+Every engine accepts complete utterances (`transcribe`) and a stream of 16-bit
+mono PCM chunks (`stream`). Engines without native streaming buffer the chunks
+and emit a single final result.
+"""
+import asyncio
+import io
+import json
+import os
+import wave
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator
+
+from core.metrics import provider_call
+from core.providers import providers
+
+STT_SAMPLE_RATE = 16000
+
+@dataclass
+class Transcript:
+    text: str
+    is_final: bool
+
+def pcm_to_wav(pcm: bytes, sample_rate: int = STT_SAMPLE_RATE) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+def to_pcm16(audio: bytes, sample_rate: int = STT_SAMPLE_RATE) -> bytes:
+    """Decodes any container to 16-bit mono PCM at `sample_rate`."""
+    try:
+        with wave.open(io.BytesIO(audio), "rb") as wav:
+            if wav.getnchannels() == 1 and wav.getsampwidth() == 2 and wav.getframerate() == sample_rate:
+                return wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        pass
+
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(io.BytesIO(audio))
+    return segment.set_frame_rate(sample_rate).set_channels(1).set_sample_width(2).raw_data
+
+class STTEngine:
+    name = "base"
+    # Engines that decode to PCM themselves; callers holding decoded audio can hand them WAV directly
+    needs_pcm = False
+
+    def transcribe(self, audio: bytes, mime_type: str = "audio/wav") -> str:
+        raise NotImplementedError
+
+    async def atranscribe(self, audio: bytes, mime_type: str = "audio/wav") -> str:
+        return await asyncio.to_thread(self.transcribe, audio, mime_type)
+
+    def stream(self, chunks: Iterable[bytes], sample_rate: int = STT_SAMPLE_RATE) -> Iterator[Transcript]:
+        pcm = b"".join(chunks)
+        yield Transcript(self.transcribe(pcm_to_wav(pcm, sample_rate), "audio/wav"), is_final=True)
+
+    async def astream(self, chunks: AsyncIterable[bytes], sample_rate: int = STT_SAMPLE_RATE) -> AsyncIterator[Transcript]:
+        pcm = b"".join([chunk async for chunk in chunks])
+        yield Transcript(await self.atranscribe(pcm_to_wav(pcm, sample_rate), "audio/wav"), is_final=True)
+
+class GeminiSTT(STTEngine):
+    name = "gemini"
+    prompt = "Transcribe the following audio accurately. Output ONLY the transcription."
+
+    def __init__(self, model_name: str = "gemini-2.5-flash"):
+        self.model_name = model_name
+
+    def transcribe(self, audio: bytes, mime_type: str = "audio/wav") -> str:
+        model = providers.gemini_model(self.model_name)
+        with provider_call("gemini"):
+            response = model.generate_content([self.prompt, {"mime_type": mime_type, "data": audio}])
+        return response.text.strip()
+
+    async def atranscribe(self, audio: bytes, mime_type: str = "audio/wav") -> str:
+        model = providers.gemini_model(self.model_name)
+        with provider_call("gemini"):
+            response = await model.generate_content_async([self.prompt, {"mime_type": mime_type, "data": audio}])
+        return response.text.strip()
+
+class ElevenLabsSTT(STTEngine):
+    name = "elevenlabs"
+
+    def __init__(self, model_id: str = "scribe_v1"):
+        self.model_id = model_id
+
+    def _request(self, audio: bytes, mime_type: str):
+        return dict(
+            file=("audio", audio, mime_type),
+            model_id=self.model_id,
+            tag_audio_events=False,
+            language_code="en",
+            diarize=False
+        )
+
+    def transcribe(self, audio: bytes, mime_type: str = "audio/wav") -> str:
+        with provider_call("elevenlabs"):
+            return providers.elevenlabs().speech_to_text.convert(**self._request(audio, mime_type)).text
+
+    async def atranscribe(self, audio: bytes, mime_type: str = "audio/wav") -> str:
+        with provider_call("elevenlabs"):
+            transcription = await providers.async_elevenlabs().speech_to_text.convert(**self._request(audio, mime_type))
+        return transcription.text
+
+class GoogleWebSTT(STTEngine):
+    name = "google"
+    needs_pcm = True
+
+    def transcribe(self, audio: bytes, mime_type: str = "audio/wav") -> str:
+        import speech_recognition as sr
+        recognizer = sr.Recognizer()
+        audio_data = sr.AudioData(to_pcm16(audio), STT_SAMPLE_RATE, 2)
+        try:
+            with provider_call("google"):
+                return recognizer.recognize_google(audio_data)
+        except sr.UnknownValueError:
+            return ""
+
+class VoskSTT(STTEngine):
+    """Offline engine; runs entirely on the CPU and emits partial results while audio arrives."""
+    name = "vosk"
+    needs_pcm = True
+
+    def __init__(self, model_path: str = None):
+        try:
+            from vosk import Model, SetLogLevel
+        except ImportError as e:
+            raise RuntimeError("STT_ENGINE=vosk requires the 'vosk' package (pip install vosk)") from e
+        SetLogLevel(-1)
+        model_path = model_path or os.getenv("VOSK_MODEL_PATH")
+        # The model is loaded once and shared by every recognizer
+        self.model = Model(model_path) if model_path else Model(lang="en-us")
+
+    def _recognizer(self, sample_rate: int):
+        from vosk import KaldiRecognizer
+        return KaldiRecognizer(self.model, sample_rate)
+
+    def stream(self, chunks: Iterable[bytes], sample_rate: int = STT_SAMPLE_RATE) -> Iterator[Transcript]:
+        recognizer = self._recognizer(sample_rate)
+        segments = []
+        for chunk in chunks:
+            if recognizer.AcceptWaveform(chunk):
+                text = json.loads(recognizer.Result())["text"]
+                if text:
+                    segments.append(text)
+                    yield Transcript(" ".join(segments), is_final=False)
+            else:
+                partial = json.loads(recognizer.PartialResult())["partial"]
+                if partial:
+                    yield Transcript(" ".join(segments + [partial]), is_final=False)
+        text = json.loads(recognizer.FinalResult())["text"]
+        if text:
+            segments.append(text)
+        yield Transcript(" ".join(segments), is_final=True)
+
+    async def astream(self, chunks: AsyncIterable[bytes], sample_rate: int = STT_SAMPLE_RATE) -> AsyncIterator[Transcript]:
+        recognizer = self._recognizer(sample_rate)
+        segments = []
+        async for chunk in chunks:
+            accepted = await asyncio.to_thread(recognizer.AcceptWaveform, chunk)
+            if accepted:
+                text = json.loads(recognizer.Result())["text"]
+                if text:
+                    segments.append(text)
+                    yield Transcript(" ".join(segments), is_final=False)
+            else:
+                partial = json.loads(recognizer.PartialResult())["partial"]
+                if partial:
+                    yield Transcript(" ".join(segments + [partial]), is_final=False)
+        text = json.loads(recognizer.FinalResult())["text"]
+        if text:
+            segments.append(text)
+        yield Transcript(" ".join(segments), is_final=True)
+
+    def transcribe(self, audio: bytes, mime_type: str = "audio/wav") -> str:
+        pcm = to_pcm16(audio)
+        # 0.25s chunks, as a live stream would deliver them
+        chunk_bytes = STT_SAMPLE_RATE // 4 * 2
+        final = None
+        for final in self.stream(pcm[i:i + chunk_bytes] for i in range(0, len(pcm), chunk_bytes)):
+            pass
+        return final.text if final else ""
+
+STT_ENGINES = {
+    engine.name: engine for engine in (GeminiSTT, ElevenLabsSTT, GoogleWebSTT, VoskSTT)
+}
+
+_instances: Dict[str, STTEngine] = {}
+
+def get_stt_engine(default: str = "gemini") -> STTEngine:
+    """The engine named by STT_ENGINE (or `default`), created once per process."""
+    name = os.getenv("STT_ENGINE", default).lower()
+    if name not in STT_ENGINES:
+        raise ValueError(f"Unknown STT_ENGINE '{name}'. Available: {', '.join(STT_ENGINES)}")
+    if name not in _instances:
+        _instances[name] = STT_ENGINES[name]()
+    return _instances[name]
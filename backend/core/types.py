@@ -2,6 +2,10 @@ from enum import Enum
 from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 
+# Scenario labels the scenario prompt picks from; anything else is stored as "other"
+SCENARIO_TYPES = ("home_invasion", "medical", "fire", "car_crash", "lost_child", "other")
+DEMOGRAPHICS = ("child", "teenager", "adult", "elderly", "tourist", "other")
+
 class AgentInputType(Enum):
     TEXT = "text"
     AUDIO = "audio"
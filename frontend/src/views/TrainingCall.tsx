@@ -45,6 +45,8 @@ interface SessionData {
   protocolScore: number;
 }
 
+// Raw MP3 instead of base64 inside JSON
+const CHAT_HEADERS = { Accept: 'audio/mpeg' };
 
 const DEFAULT_PROTOCOL_STEPS = [
   'Identify emergency type',
@@ -111,12 +113,13 @@ export function TrainingCall({ scenario, onEndCall }: TrainingCallProps) {
 
           const response = await fetch(`http://localhost:8000/api/chat/${threadId}`, {
             method: 'POST',
+            headers: CHAT_HEADERS,
             body: formData,
           });
 
           if (!response.ok) throw new Error('API call failed');
 
-          const data = await response.json();
+          const data = await readChatResponse(response);
           await handleBackendResponse(data);
 
         } catch (err) {
@@ -130,7 +133,15 @@ export function TrainingCall({ scenario, onEndCall }: TrainingCallProps) {
     },
   });
 
-  const handleBackendResponse = async (data: { text: string; audio: string }) => {
+  // The backend answers with the raw MP3 and puts the victim line in X-Victim-Text
+  const readChatResponse = async (response: Response) => {
+    const text = decodeURIComponent(response.headers.get('X-Victim-Text') || '');
+    if (response.status === 204) return { text, audioUrl: null };
+    const audio = await response.blob();
+    return { text, audioUrl: URL.createObjectURL(audio) };
+  };
+
+  const handleBackendResponse = async (data: { text: string; audioUrl: string | null }) => {
     if (data.text) {
       // Assume backend returns Caller's response (Victim)
       // Add to messages
@@ -147,14 +158,22 @@ export function TrainingCall({ scenario, onEndCall }: TrainingCallProps) {
       setEssentialQuestions((prev) => detectAnswerReceived(data.text, prev));
     }
 
-    if (data.audio) {
+    if (data.audioUrl) {
+      const audioUrl = data.audioUrl;
+      // Runs on end, on a media error and when play() is rejected (autoplay policy)
+      const finishPlayback = () => {
+        setIsAudioPlaying(false);
+        URL.revokeObjectURL(audioUrl);
+      };
       try {
-        const audio = new Audio(`data:audio/mp3;base64,${data.audio}`);
+        const audio = new Audio(audioUrl);
         setIsAudioPlaying(true);
-        audio.onended = () => setIsAudioPlaying(false);
+        audio.onended = finishPlayback;
+        audio.onerror = finishPlayback;
         await audio.play();
       } catch (e) {
         console.error("Audio playback error", e);
+        finishPlayback();
       }
     }
   };
@@ -242,10 +261,11 @@ export function TrainingCall({ scenario, onEndCall }: TrainingCallProps) {
       setIsProcessing(true);
       try {
         const response = await fetch(`http://localhost:8000/api/chat/${threadId}`, {
-          method: 'POST'
+          method: 'POST',
+          headers: CHAT_HEADERS,
         });
         if (!response.ok) throw new Error('Failed to start session');
-        const data = await response.json();
+        const data = await readChatResponse(response);
 
         // Initial response from Victim
         await handleBackendResponse(data);
@@ -296,11 +316,12 @@ export function TrainingCall({ scenario, onEndCall }: TrainingCallProps) {
 
       const response = await fetch(`http://localhost:8000/api/chat/${threadId}`, {
         method: 'POST',
+        headers: CHAT_HEADERS,
         body: formData
       });
 
       if (!response.ok) throw new Error("API failed");
-      const data = await response.json();
+      const data = await readChatResponse(response);
       handleBackendResponse(data);
 
     } catch (e) {
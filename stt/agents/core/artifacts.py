@@ -0,0 +1,131 @@
+"""
+In-process store for the audio a session produces (victim lines, mixes,
+phone-processed mixes).
+
+Nodes put encoded audio in and pass the returned handle through the pipeline
+state instead of a fixed filename, so concurrent sessions in one process never
+see each other's files. Handles are "<session>/<turn>/<name>-<n>" and are
+reference counted: the state slot that receives a handle owns one reference,
+and whoever overwrites the slot releases it. Buffers stay in memory until the
+store goes over its budget; the least recently used ones are then written to
+the spill directory and read back from there on demand.
+"""
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+ARTIFACT_MEMORY_BUDGET_MB = float(os.getenv("ARTIFACT_MEMORY_BUDGET_MB", "64"))
+ARTIFACT_SPILL_DIR = os.getenv("ARTIFACT_SPILL_DIR", ".artifacts")
+
+# Used by nodes when the caller did not start the graph with a session_id
+DEFAULT_SESSION = "default"
+
+@dataclass
+class _Artifact:
+    size: int
+    mime: str
+    refs: int = 1
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+class ArtifactStore:
+    def __init__(self, memory_budget_bytes: int = int(ARTIFACT_MEMORY_BUDGET_MB * 1024 * 1024), spill_dir: str = ARTIFACT_SPILL_DIR):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_dir = spill_dir
+        # Insertion order doubles as recency order for spilling
+        self._items: "OrderedDict[str, _Artifact]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self.resident_bytes = 0
+        self.spilled = 0
+
+    def put(self, session_id: str, turn: int, name: str, data: bytes, mime: str = "audio/mpeg") -> str:
+        """Stores `data` and returns its handle, holding one reference."""
+        handle = f"{session_id}/{turn}/{name}-{next(self._sequence)}"
+        with self._lock:
+            self._items[handle] = _Artifact(size=len(data), mime=mime, data=data)
+            self.resident_bytes += len(data)
+            self._spill_locked()
+        return handle
+
+    def get(self, handle: str) -> bytes:
+        with self._lock:
+            artifact = self._items.get(handle)
+            if artifact is None:
+                raise KeyError(f"Unknown or released artifact '{handle}'")
+            if artifact.data is not None:
+                self._items.move_to_end(handle)
+                return artifact.data
+            path = artifact.path
+        with open(path, "rb") as f:
+            return f.read()
+
+    def mime(self, handle: str) -> str:
+        with self._lock:
+            return self._items[handle].mime
+
+    def retain(self, handle: str) -> str:
+        with self._lock:
+            self._items[handle].refs += 1
+        return handle
+
+    def release(self, handle: Optional[str]):
+        if not handle:
+            return
+        with self._lock:
+            artifact = self._items.get(handle)
+            if artifact is None:
+                return
+            artifact.refs -= 1
+            if artifact.refs <= 0:
+                self._drop_locked(handle)
+
+    def release_session(self, session_id: str):
+        """Drops everything a session produced, whatever its reference counts."""
+        prefix = f"{session_id}/"
+        with self._lock:
+            for handle in [h for h in self._items if h.startswith(prefix)]:
+                self._drop_locked(handle)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "artifacts": len(self._items),
+                "resident_bytes": self.resident_bytes,
+                "spilled_bytes": sum(a.size for a in self._items.values() if a.data is None),
+                "spills": self.spilled,
+            }
+
+    def _drop_locked(self, handle: str):
+        artifact = self._items.pop(handle)
+        if artifact.data is not None:
+            self.resident_bytes -= artifact.size
+        elif artifact.path:
+            try:
+                os.remove(artifact.path)
+            except OSError:
+                pass
+
+    def _spill_locked(self):
+        if self.resident_bytes <= self.memory_budget_bytes:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        for handle, artifact in self._items.items():
+            if self.resident_bytes <= self.memory_budget_bytes:
+                break
+            if artifact.data is None:
+                continue
+            path = os.path.join(self.spill_dir, handle.replace("/", "_") + ".bin")
+            with open(path, "wb") as f:
+                f.write(artifact.data)
+            artifact.path, artifact.data = path, None
+            self.resident_bytes -= artifact.size
+            self.spilled += 1
+
+artifacts = ArtifactStore()
+
+def session_of(state) -> str:
+    return state.get("session_id") or DEFAULT_SESSION
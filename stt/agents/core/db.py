@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Optional
 from sqlmodel import Field, Session, SQLModel, create_engine, select
 
@@ -8,6 +9,17 @@ class Scenario(SQLModel, table=True):
     victim_persona: str
     description: Optional[str] = None
 
+class SfxBed(SQLModel, table=True):
+    """A generated ambience loop, stored as float32 PCM in the SFX library directory."""
+    prompt_key: str = Field(primary_key=True)
+    prompt: str
+    path: str
+    sample_rate: int
+    num_samples: int
+    uses: int = 0
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    last_used_at: Optional[datetime] = Field(default=None, index=True)
+
 sqlite_file_name = "database.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
@@ -24,3 +36,22 @@ def upsert_scenario(scenario: Scenario):
 def get_scenario(voice_id: str) -> Optional[Scenario]:
     with Session(engine) as session:
         return session.get(Scenario, voice_id)
+
+
+def get_sfx_bed(prompt_key: str) -> Optional[SfxBed]:
+    with Session(engine) as session:
+        return session.get(SfxBed, prompt_key)
+
+def upsert_sfx_bed(bed: SfxBed):
+    with Session(engine) as session:
+        session.merge(bed)
+        session.commit()
+
+def record_sfx_use(prompt_key: str):
+    with Session(engine) as session:
+        bed = session.get(SfxBed, prompt_key)
+        if bed:
+            bed.uses += 1
+            bed.last_used_at = datetime.now(timezone.utc)
+            session.add(bed)
+            session.commit()
@@ -9,7 +9,9 @@ from agents.tts import tts_node
 from agents.sfx import generate_sfx_node  
 from agents.mixer import mixer_node
 from agents.stt import mic_input_node
-from core.playback import playback_node # Simple node to play the final audio
+from core.playback import StreamingPlayer # Plays the mix as it is encoded
+from core.artifacts import artifacts
+import uuid
 
 from dotenv import load_dotenv
 
@@ -32,26 +34,28 @@ workflow.add_node("generate_sfx", generate_sfx_node) # Creates Background Noise
 workflow.add_node("mic_input", mic_input_node)       # User speaks
 workflow.add_node("generate_response", generate_response_node) # LLM decides what victim says
 workflow.add_node("tts", tts_node)                   # Generates clean voice
-workflow.add_node("mixer", mixer_node)               # Layers Voice + SFX
-workflow.add_node("playback", playback_node)         # Plays the result
+workflow.add_node("mixer", mixer_node)               # Layers Voice + SFX, streams the MP3
 
 
 workflow.set_entry_point("generate_scenario")
 
 
+# Voice design (ElevenLabs) and the ambience bed (SFX) are independent: run
+# them side by side; mic_input starts once, after both have finished
 workflow.add_edge("generate_scenario", "voice_design")
-workflow.add_edge("voice_design", "generate_sfx")
+workflow.add_edge("generate_scenario", "generate_sfx")
+workflow.add_edge("voice_design", "mic_input")
 workflow.add_edge("generate_sfx", "mic_input")
 
 
 workflow.add_edge("mic_input", "generate_response")
 workflow.add_edge("generate_response", "tts")
 workflow.add_edge("tts", "mixer")
-workflow.add_edge("mixer", "playback")
 
 
+# The runner below plays the mix while the mixer encodes it (stream_mode="custom")
 workflow.add_conditional_edges(
-    "playback",
+    "mixer",
     should_continue,
     {
         "mic_input": "mic_input",
@@ -67,16 +71,31 @@ if __name__ == "__main__":
     print("--- Starting CrisisLink Simulator ---")
     
     
+    session_id = uuid.uuid4().hex
     initial_state = PipelineState(
+        session_id=session_id,
         scenario={},
         voice_definition=None,
         current_text=None,
         audio_history=[],
+        voice_audio=None,
+        final_audio=None,
         messages=[]
     )
     
     
-    for output in app.stream(initial_state):
-
-        for key, value in output.items():
-            print(f"Finished Node: {key}")
\ No newline at end of file
+    player = StreamingPlayer()
+    try:
+        for mode, output in app.stream(initial_state, stream_mode=["updates", "custom"]):
+            if mode == "custom":
+                player.write(output["mp3_chunk"])
+                continue
+
+            for key, value in output.items():
+                print(f"Finished Node: {key}")
+                if key == "mixer":
+                    # The next step opens the mic; let the victim finish first
+                    player.finish()
+    finally:
+        player.finish()
+        artifacts.release_session(session_id)
\ No newline at end of file
@@ -0,0 +1,37 @@
+import io
+from typing import Union
+
+import numpy as np
+from pydub import AudioSegment
+
+# Working rate for mixing and stored SFX beds
+PCM_SAMPLE_RATE = 44100
+
+def decode_mono(source: Union[str, bytes], sample_rate: int = PCM_SAMPLE_RATE) -> np.ndarray:
+    """Decodes a file path or encoded bytes to float32 mono samples in [-1, 1]."""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    segment = AudioSegment.from_file(source).set_frame_rate(sample_rate).set_channels(1).set_sample_width(2)
+    return np.frombuffer(segment.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+
+def loudness_db(samples: np.ndarray, sample_rate: int = PCM_SAMPLE_RATE, block_ms: int = 400, gate_db: float = -70.0) -> float:
+    """Mean power over 400 ms blocks, ignoring near-silent blocks (as the BS.1770 absolute gate does)."""
+    block = sample_rate * block_ms // 1000
+    count = len(samples) // block
+    if count == 0:
+        power = np.array([np.mean(samples * samples)]) if len(samples) else np.array([0.0])
+    else:
+        blocks = samples[:count * block].reshape(count, block)
+        power = np.mean(blocks * blocks, axis=1)
+    gated = power[power > 10 ** (gate_db / 10)]
+    if not len(gated):
+        return gate_db
+    return float(10 * np.log10(np.mean(gated)))
+
+def normalize(samples: np.ndarray, target_db: float, sample_rate: int = PCM_SAMPLE_RATE) -> np.ndarray:
+    gain = 10 ** ((target_db - loudness_db(samples, sample_rate)) / 20)
+    peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+    if peak > 0:
+        # Never push peaks into clipping to reach the target
+        gain = min(gain, 0.98 / peak)
+    return samples * np.float32(gain)
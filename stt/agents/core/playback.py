@@ -1,17 +1,46 @@
 # playback.py
+import io
+import subprocess
+from typing import Optional
+
+from core.artifacts import artifacts
 from core.state import PipelineState
 from pydub import AudioSegment
 from pydub.playback import play as pydub_play
-import os
+from pydub.utils import get_player_name
+
+class StreamingPlayer:
+    """
+    Plays MP3 that arrives in pieces (ffplay reading a pipe), so a line starts
+    playing while it is still being encoded. `finish()` waits until it has been heard.
+    """
+
+    def __init__(self):
+        self._player: Optional[subprocess.Popen] = None
+
+    def write(self, mp3_chunk: bytes):
+        if self._player is None:
+            self._player = subprocess.Popen(
+                [get_player_name(), "-nodisp", "-autoexit", "-loglevel", "error", "-probesize", "32", "-i", "pipe:0"],
+                stdin=subprocess.PIPE
+            )
+        self._player.stdin.write(mp3_chunk)
+        self._player.stdin.flush()
+
+    def finish(self):
+        if self._player is not None:
+            self._player.stdin.close()
+            self._player.wait()
+            self._player = None
 
 def playback_node(state: PipelineState):
-    final_audio_path = state.get("final_audio", "")
-    
-    if os.path.exists(final_audio_path):
-        print(f"DEBUG: Playing {final_audio_path}")
-        audio = AudioSegment.from_mp3(final_audio_path)
+    final_audio = state.get("final_audio")
+
+    if final_audio:
+        print(f"DEBUG: Playing {final_audio}")
+        audio = AudioSegment.from_file(io.BytesIO(artifacts.get(final_audio)), format="mp3")
         pydub_play(audio)
     else:
-        print("ERROR: No audio file found to play.")
+        print("ERROR: No audio found to play.")
         
     return {}
\ No newline at end of file
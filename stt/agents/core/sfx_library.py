@@ -0,0 +1,105 @@
+"""
+Persistent library of generated ambience beds ("fire", "traffic", "rain", ...).
+
+Beds are keyed by a normalized form of the SFX prompt, so near-identical
+prompts share one generation. Each bed is stored once, decoded and
+loudness-normalized, as raw float32 PCM and opened with np.memmap: every
+session (and every process) playing the same bed reads the same page-cache
+pages instead of holding its own decoded copy. The index lives in the
+scenario database (SfxBed table).
+"""
+import hashlib
+import os
+import re
+import threading
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from core.db import SfxBed, create_db_and_tables, get_sfx_bed, record_sfx_use, upsert_sfx_bed
+from core.pcm import PCM_SAMPLE_RATE, decode_mono, normalize
+
+SFX_LIBRARY_DIR = os.getenv("SFX_LIBRARY_DIR", ".sfx_library")
+# Stored level; the mixer applies its own gain relative to this
+SFX_LIBRARY_LEVEL_DB = -30.0
+
+# Words that do not change which ambience is generated
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "with", "and", "or", "some", "very",
+    "sound", "sounds", "noise", "noises", "effect", "effects", "ambience", "ambient",
+    "background", "loop", "looping", "audio", "sfx"
+}
+
+def normalize_prompt(prompt: str) -> str:
+    """'Crackling fire in the background' and 'fire, crackling' both map to 'crackling fire'."""
+    words = re.findall(r"[a-z0-9]+", prompt.lower())
+    # Crude singular form: "sirens" and "siren" are the same bed
+    words = {w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words if w not in STOPWORDS}
+    return " ".join(sorted(words))
+
+class SfxLibrary:
+    def __init__(self, directory: str = SFX_LIBRARY_DIR):
+        self.directory = directory
+        self._maps: Dict[str, np.memmap] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._db_ready = False
+
+    def _key_lock(self, prompt_key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(prompt_key, threading.Lock())
+
+    def _open(self, prompt_key: str, path: str) -> np.memmap:
+        with self._lock:
+            bed = self._maps.get(prompt_key)
+            if bed is None:
+                bed = np.memmap(path, dtype=np.float32, mode="r")
+                self._maps[prompt_key] = bed
+            return bed
+
+    def _store(self, prompt_key: str, prompt: str, encoded: bytes) -> SfxBed:
+        samples = normalize(decode_mono(encoded), SFX_LIBRARY_LEVEL_DB).astype(np.float32)
+        name = hashlib.sha256(prompt_key.encode("utf-8")).hexdigest()
+        path = os.path.join(self.directory, f"{name}.f32")
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        samples.tofile(temp_path)
+        # Readers never map a half-written file
+        os.replace(temp_path, path)
+
+        entry = SfxBed(prompt_key=prompt_key, prompt=prompt, path=path, sample_rate=PCM_SAMPLE_RATE, num_samples=len(samples))
+        upsert_sfx_bed(entry)
+        return entry
+
+    def get_or_generate(self, prompt: str, generate: Callable[[str], bytes]) -> Tuple[str, np.memmap]:
+        """Returns (prompt_key, samples). `generate(prompt)` returns encoded audio and only runs on a miss."""
+        if not self._db_ready:
+            create_db_and_tables()
+            self._db_ready = True
+
+        prompt_key = normalize_prompt(prompt) or prompt.strip().lower()
+        with self._key_lock(prompt_key):
+            if prompt_key in self._maps:
+                record_sfx_use(prompt_key)
+                return prompt_key, self._maps[prompt_key]
+
+            entry = get_sfx_bed(prompt_key)
+            if entry is None or not os.path.exists(entry.path):
+                print(f"DEBUG: SFX library miss for '{prompt_key}', generating")
+                entry = self._store(prompt_key, prompt, generate(prompt))
+            else:
+                print(f"DEBUG: SFX library hit for '{prompt_key}'")
+            record_sfx_use(prompt_key)
+            return prompt_key, self._open(prompt_key, entry.path)
+
+    def load(self, prompt_key: str) -> np.memmap:
+        with self._lock:
+            bed = self._maps.get(prompt_key)
+        if bed is not None:
+            return bed
+        entry = get_sfx_bed(prompt_key)
+        if entry is None:
+            raise KeyError(f"No SFX bed for '{prompt_key}'")
+        return self._open(prompt_key, entry.path)
+
+sfx_library = SfxLibrary()
@@ -6,6 +6,11 @@ class PipelineState(TypedDict):
     scenario: Dict[str, Any]
     voice_definition: Optional[Dict[str, Any]]
     current_text: Optional[str]
+    # Audio is passed as artifact store handles (core/artifacts.py), not paths
+    session_id: str
     audio_history: List[str]
+    voice_audio: Optional[str]
     final_audio: Optional[str]
+    # SFX library key of the session's ambience bed
+    sfx_key: Optional[str]
     messages: Annotated[List[BaseMessage], add_messages]
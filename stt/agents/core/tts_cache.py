@@ -0,0 +1,146 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+class TTSCache:
+    """
+    Two-tier cache for synthesized speech, keyed by (voice_id, model_id, text).
+
+    Tier 1 is an in-memory LRU bounded by `memory_bytes`; tier 2 is a
+    content-addressed directory (<dir>/<ab>/<sha256>.mp3) bounded by
+    `disk_bytes`, evicting the least recently used files first.
+    """
+
+    def __init__(self, directory: str, memory_bytes: int = 32 * 1024 * 1024, disk_bytes: int = 512 * 1024 * 1024, enabled: bool = True):
+        self.enabled = enabled
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk_used: Optional[int] = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def key(voice_id: str, model_id: str, text: str) -> str:
+        return hashlib.sha256(f"{voice_id}\0{model_id}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_used -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def get(self, voice_id: str, model_id: str, text: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        key = self.key(voice_id, model_id, text)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.bytes_saved += len(audio)
+                return audio
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            # mtime doubles as the LRU clock for disk eviction
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self.bytes_saved += len(audio)
+            self._remember(key, audio)
+        return audio
+
+    def put(self, voice_id: str, model_id: str, text: str, audio: bytes):
+        if not audio or not self.enabled:
+            return
+        key = self.key(voice_id, model_id, text)
+        with self._lock:
+            self._remember(key, audio)
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = self._scan_disk_usage()
+            else:
+                self._disk_used += len(audio)
+            if self._disk_used > self.disk_bytes:
+                self._evict_disk()
+
+    def _files(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".mp3"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _scan_disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def _evict_disk(self):
+        # Evict down to 90% so we don't rescan the directory on every put
+        target = int(self.disk_bytes * 0.9)
+        files = sorted(self._files(), key=lambda f: f[2])
+        used = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if used <= target:
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except OSError:
+                pass
+        self._disk_used = used
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "memory_bytes": self._memory_used,
+            "memory_entries": len(self._memory)
+        }
+
+tts_cache = TTSCache(
+    os.getenv("TTS_CACHE_DIR", ".tts_cache"),
+    memory_bytes=int(os.getenv("TTS_CACHE_MEMORY_MB", "32")) * 1024 * 1024,
+    disk_bytes=int(os.getenv("TTS_CACHE_DISK_MB", "512")) * 1024 * 1024,
+    enabled=os.getenv("TTS_CACHE", "1") == "1"
+)
@@ -0,0 +1,194 @@
+"""
+Frame-level voice activity detection / endpointing on raw 16-bit mono PCM.
+
+Each 30 ms frame is classified from its RMS energy and zero-crossing rate,
+computed with NumPy for every frame of an incoming chunk at once. The noise
+floor is calibrated from the first frames heard and then follows the
+non-speech frames, so there is no per-turn ambient-noise pass. Leading and
+trailing silence is dropped as the audio streams through, so only speech
+(plus a short pre-roll and tail) reaches STT.
+"""
+import collections
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+# How long the dispatcher must stay quiet before the turn ends
+VAD_END_SILENCE_MS = int(os.getenv("VAD_END_SILENCE_MS", "500"))
+# Speech threshold relative to the noise floor (RMS ratio, 3.0 ~ +10 dB)
+VAD_THRESHOLD_RATIO = float(os.getenv("VAD_THRESHOLD_RATIO", "3.0"))
+
+# Absolute floor so digital silence does not make every click "speech"
+MIN_NOISE_RMS = 50.0
+# Unvoiced consonants (s, f, sh) are quiet but cross zero often
+FRICATIVE_ZCR = 0.25
+# Above this the frame is hiss or clicks rather than speech
+NOISE_ZCR = 0.6
+
+def frame_features(frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """RMS energy and zero-crossing rate for an (n_frames, frame_len) int16 array."""
+    samples = frames.astype(np.float32)
+    energy = np.sqrt(np.mean(samples * samples, axis=1))
+    signs = np.signbit(samples)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+    return energy, zcr
+
+class Endpointer:
+    """
+    Streaming endpointer. `push()` raw PCM in any chunk size; it returns the
+    speech audio to forward and whether the utterance has just ended.
+    """
+
+    def __init__(self, sample_rate: int = VAD_SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS,
+                 end_silence_ms: int = VAD_END_SILENCE_MS, threshold_ratio: float = VAD_THRESHOLD_RATIO,
+                 start_ms: int = 90, pre_roll_ms: int = 150, tail_ms: int = 120,
+                 max_utterance_ms: int = 15000, calibration_ms: int = 300, noise_adapt: float = 0.05):
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_len * 2
+        self.threshold_ratio = threshold_ratio
+        self.noise_adapt = noise_adapt
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_silence_ms // frame_ms)
+        self.tail_frames = tail_ms // frame_ms
+        self.max_frames = max_utterance_ms // frame_ms
+        self.pre_roll_frames = pre_roll_ms // frame_ms
+        self.calibration_frames = max(1, calibration_ms // frame_ms)
+        self.noise_floor: Optional[float] = None
+        self._calibration = []
+        self._partial = b""
+        self.reset()
+
+    def reset(self):
+        """Starts a new utterance; the calibrated noise floor is kept."""
+        self.in_speech = False
+        self.utterance_frames = 0
+        self._pre_roll = collections.deque(maxlen=self.pre_roll_frames + self.start_frames)
+        self._onset = 0
+        self._silence = []
+
+    def calibrate(self, energy: np.ndarray):
+        # A low percentile, so words spoken during calibration barely move it
+        self.noise_floor = max(float(np.percentile(energy, 10)), MIN_NOISE_RMS)
+
+    def _frames(self, pcm: bytes) -> np.ndarray:
+        count = len(pcm) // self.frame_bytes
+        return np.frombuffer(pcm[:count * self.frame_bytes], dtype=np.int16).reshape(count, self.frame_len)
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        energy, zcr = frame_features(frames)
+        if self.noise_floor is None:
+            # The first `calibration_frames` frames heard set the noise floor; until
+            # then nothing is speech (but it is kept in the pre-roll)
+            self._calibration.extend(energy[:self.calibration_frames - len(self._calibration)].tolist())
+            if len(self._calibration) < self.calibration_frames:
+                return np.zeros(len(frames), dtype=bool)
+            self.calibrate(np.array(self._calibration))
+            self._calibration = []
+            # The chunk that completes calibration is then classified in full, so
+            # speech in the same chunk is not lost
+
+        threshold = self.noise_floor * self.threshold_ratio
+        voiced = (energy > threshold) & (zcr < NOISE_ZCR)
+        unvoiced = (energy > threshold / 2) & (zcr > FRICATIVE_ZCR) & (zcr < NOISE_ZCR)
+        speech = voiced | unvoiced
+
+        quiet = energy[~speech]
+        if len(quiet) and not self.in_speech:
+            self.noise_floor = max((1 - self.noise_adapt) * self.noise_floor + self.noise_adapt * float(quiet.mean()), MIN_NOISE_RMS)
+        return speech
+
+    def push(self, pcm: bytes) -> Tuple[bytes, bool]:
+        data = self._partial + pcm
+        frames = self._frames(data)
+        self._partial = data[len(frames) * self.frame_bytes:]
+        if not len(frames):
+            return b"", False
+
+        speech = self.classify(frames)
+        out = []
+        for frame, is_speech in zip(frames, speech):
+            frame = frame.tobytes()
+            if not self.in_speech:
+                self._pre_roll.append(frame)
+                self._onset = self._onset + 1 if is_speech else 0
+                if self._onset >= self.start_frames:
+                    self.in_speech = True
+                    out.extend(self._pre_roll)
+                    self.utterance_frames = len(self._pre_roll)
+                    self._pre_roll.clear()
+                continue
+
+            self.utterance_frames += 1
+            if is_speech:
+                # Speech resumed: the held-back pause belongs to the utterance
+                out.extend(self._silence)
+                self._silence = []
+                out.append(frame)
+            else:
+                self._silence.append(frame)
+
+            if len(self._silence) >= self.end_frames or self.utterance_frames >= self.max_frames:
+                out.extend(self._silence[:self.tail_frames])
+                self.reset()
+                return b"".join(out), True
+
+        return b"".join(out), False
+
+class Microphone:
+    """
+    A PyAudio input stream kept open between turns. It is paused while the
+    victim is speaking so the next turn does not start with stale audio.
+    """
+
+    def __init__(self, device_index: Optional[int] = None, sample_rate: int = VAD_SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS):
+        self.device_index = device_index
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.endpointer = Endpointer(sample_rate, frame_ms)
+        self._audio = None
+        self._stream = None
+
+    def _open(self):
+        import pyaudio
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.frame_len,
+            input_device_index=self.device_index,
+            start=False
+        )
+
+    def record_utterance(self, timeout: float = 5.0) -> Optional[bytes]:
+        """Blocks until the dispatcher has spoken and stopped. Returns trimmed PCM, or None on timeout."""
+        if self._stream is None:
+            self._open()
+        self.endpointer.reset()
+        waiting_frames = int(timeout * self.sample_rate / self.frame_len)
+        speech = []
+
+        self._stream.start_stream()
+        try:
+            while True:
+                audio, ended = self.endpointer.push(self._stream.read(self.frame_len, exception_on_overflow=False))
+                speech.append(audio)
+                if ended:
+                    return b"".join(speech)
+                if not self.endpointer.in_speech:
+                    waiting_frames -= 1
+                    if waiting_frames <= 0:
+                        return None
+        finally:
+            self._stream.stop_stream()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._audio.terminate()
+            self._stream = None
@@ -1,6 +1,27 @@
+import io
+
+from pydub import AudioSegment
+
+from core.artifacts import artifacts, session_of
+from core.dsp import EFFECTS_SAMPLE_RATE, TelephoneLine
 from core.state import PipelineState
 
 def audio_effects_node(state: PipelineState):
-    # TODO: Implement Audio Effects
     print("DEBUG: Applying Audio Effects")
-    return {"final_audio": "mock_audio_with_effects.mp3"}
+    # The mixer's output when there is one, otherwise the clean TTS line
+    source = state.get("final_audio") or state.get("voice_audio")
+    if not source:
+        print("ERROR: No audio found to process.")
+        return {}
+
+    segment = AudioSegment.from_file(io.BytesIO(artifacts.get(source)), format="mp3")
+    segment = segment.set_channels(1).set_frame_rate(EFFECTS_SAMPLE_RATE).set_sample_width(2)
+
+    pcm = TelephoneLine(EFFECTS_SAMPLE_RATE).process_pcm16(segment.raw_data)
+
+    output = io.BytesIO()
+    AudioSegment(pcm, frame_rate=EFFECTS_SAMPLE_RATE, sample_width=2, channels=1).export(output, format="mp3")
+    turn = max(len(state.get("audio_history", [])) - 1, 0)
+    handle = artifacts.put(session_of(state), turn, "phone.mp3", output.getvalue())
+    artifacts.release(state.get("final_audio"))
+    return {"final_audio": handle}
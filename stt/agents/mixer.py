@@ -1,33 +1,165 @@
 # mixer.py
-from core.state import PipelineState
-from pydub import AudioSegment
 import os
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
 
-def mixer_node(state: PipelineState):
-    print("DEBUG: Mixing Audio (Voice + SFX)")
-    
-   
-    if not os.path.exists("temp_voice.mp3"):
-        print("ERROR: No voice file found to mix.")
-        return {}
-        
-    voice_audio = AudioSegment.from_mp3("temp_voice.mp3")
+import numpy as np
+from langgraph.config import get_stream_writer
+from pydub.utils import get_encoder_name
+
+from core.artifacts import DEFAULT_SESSION, artifacts, session_of
+from core.pcm import PCM_SAMPLE_RATE, decode_mono, normalize
+from core.sfx_library import SFX_LIBRARY_LEVEL_DB, sfx_library
+from core.state import PipelineState
+
+MIX_SAMPLE_RATE = PCM_SAMPLE_RATE
+# Output is produced and encoded in chunks of this size
+MIX_CHUNK_MS = 250
+# The background keeps playing briefly after the voice stops
+MIX_TAIL_MS = 500
+# Largest piece of encoder output handed on at once
+ENCODE_READ_BYTES = 4096
+
+# Gated-RMS loudness targets, in dB relative to full scale
+VOICE_TARGET_DB = float(os.getenv("MIX_VOICE_TARGET_DB", "-18"))
+SFX_BELOW_VOICE_DB = float(os.getenv("MIX_SFX_BELOW_VOICE_DB", "12"))
+
+# Per-session playheads kept in memory; each is a few bytes over a shared memmap
+MAX_CACHED_BEDS = 256
+
+class LoopingBed:
+    """
+    Plays a shared SFX library bed in a loop; `position` carries over between turns.
+    The samples are a read-only memory map and are never copied.
+    """
 
-    sfx_audio = AudioSegment.from_mp3("current_sfx.mp3")
+    def __init__(self, samples: np.ndarray, gain_db: float = 0.0):
+        self.samples = samples
+        self.gain = np.float32(10 ** (gain_db / 20))
+        self.position = 0
 
+    def mix_into(self, out: np.ndarray):
+        """Adds the next len(out) samples of the loop to `out`, wrapping by index instead of copying the bed."""
+        if len(self.samples) == 0:
+            # Empty or truncated library file: nothing to loop
+            return
+        filled = 0
+        while filled < len(out):
+            take = min(len(out) - filled, len(self.samples) - self.position)
+            out[filled:filled + take] += self.samples[self.position:self.position + take] * self.gain
+            filled += take
+            self.position = (self.position + take) % len(self.samples)
 
-    if len(sfx_audio) < len(voice_audio):
-        loops_needed = (len(voice_audio) // len(sfx_audio)) + 1
-        sfx_audio = sfx_audio * loops_needed
+# Keyed by (session_id, sfx_key): sessions share the bed's samples but not its playhead
+_beds: "OrderedDict[Tuple[str, str], LoopingBed]" = OrderedDict()
+_beds_lock = threading.Lock()
+
+def get_looping_bed(sfx_key: str, session_id: str = DEFAULT_SESSION) -> LoopingBed:
+    key = (session_id, sfx_key)
+    with _beds_lock:
+        bed = _beds.get(key)
+        if bed is None:
+            bed = LoopingBed(sfx_library.load(sfx_key), VOICE_TARGET_DB - SFX_BELOW_VOICE_DB - SFX_LIBRARY_LEVEL_DB)
+            _beds[key] = bed
+            while len(_beds) > MAX_CACHED_BEDS:
+                _beds.popitem(last=False)
+        else:
+            _beds.move_to_end(key)
+        return bed
+
+def mix_chunks(voice: np.ndarray, bed: Optional[LoopingBed], chunk_ms: int = MIX_CHUNK_MS) -> Iterator[np.ndarray]:
+    """Yields the mix as int16 PCM chunks; later chunks are mixed while earlier ones are encoded."""
+    chunk = MIX_SAMPLE_RATE * chunk_ms // 1000
+    total = len(voice) + MIX_SAMPLE_RATE * MIX_TAIL_MS // 1000
+    for start in range(0, total, chunk):
+        out = np.zeros(min(chunk, total - start), dtype=np.float32)
+        speech = voice[start:start + len(out)]
+        out[:len(speech)] += speech
+        if bed is not None:
+            bed.mix_into(out)
+        np.clip(out, -1.0, 1.0, out=out)
+        yield (out * 32767).astype(np.int16)
+
+def encode_mp3(chunks: Iterator[np.ndarray]) -> Iterator[bytes]:
+    """
+    Yields the MP3 as the encoder produces it. PCM chunks are mixed and fed in
+    on a thread meanwhile, so the start of the line can be played while the
+    rest is still being mixed and encoded.
+    """
+    encoder = subprocess.Popen(
+        # A small probe, or ffmpeg holds back seconds of PCM before encoding any
+        [get_encoder_name(), "-y", "-loglevel", "error", "-probesize", "32",
+         "-f", "s16le", "-ar", str(MIX_SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+         "-b:a", "128k", "-f", "mp3", "-flush_packets", "1", "pipe:1"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE
+    )
+    errors = []
+
+    def feed():
+        try:
+            for chunk in chunks:
+                encoder.stdin.write(chunk.tobytes())
+                encoder.stdin.flush()
+        except BrokenPipeError:
+            # The consumer stopped early and the encoder was killed
+            pass
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                encoder.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    try:
+        while data := encoder.stdout.read1(ENCODE_READ_BYTES):
+            yield data
+        feeder.join()
+        if errors:
+            raise errors[0]
+        if encoder.wait() != 0:
+            raise RuntimeError(f"MP3 encoding failed with exit code {encoder.returncode}")
+    finally:
+        if encoder.poll() is None:
+            encoder.kill()
+        feeder.join()
+        encoder.wait()
+        encoder.stdout.close()
+
+def mixer_node(state: PipelineState):
+    print("DEBUG: Mixing Audio (Voice + SFX)")
+
+    voice_audio = state.get("voice_audio")
+    if not voice_audio:
+        print("ERROR: No voice audio found to mix.")
+        return {}
 
-    sfx_audio = sfx_audio[:len(voice_audio) + 500]
+    session_id = session_of(state)
+    voice = normalize(decode_mono(artifacts.get(voice_audio)), VOICE_TARGET_DB)
 
-    voice_audio = voice_audio + 0  
-    sfx_audio = sfx_audio - 5      
+    # Shared, memory-mapped bed from the SFX library
+    sfx_key = state.get("sfx_key")
+    bed = get_looping_bed(sfx_key, session_id) if sfx_key else None
 
-    mixed_audio = voice_audio.overlay(sfx_audio)
+    # Graphs streamed with stream_mode="custom" get each piece of MP3 as it is encoded
+    try:
+        write = get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run (directly or from a benchmark)
+        write = lambda chunk: None
+    encoded = []
+    for data in encode_mp3(mix_chunks(voice, bed)):
+        encoded.append(data)
+        write({"mp3_chunk": data})
 
-    output_path = "final_mix_dirty.mp3"
-    mixed_audio.export(output_path, format="mp3")
+    # Same turn as the victim line being mixed
+    turn = max(len(state.get("audio_history", [])) - 1, 0)
+    handle = artifacts.put(session_id, turn, "mix.mp3", b"".join(encoded))
+    artifacts.release(state.get("final_audio"))
 
-    return {"final_audio": output_path}
\ No newline at end of file
+    return {"final_audio": handle}
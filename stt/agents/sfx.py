@@ -1,5 +1,6 @@
 # sfx.py
 from core.state import PipelineState
+from core.sfx_library import sfx_library
 from elevenlabs.client import ElevenLabs
 import os
 from dotenv import load_dotenv
@@ -8,20 +9,19 @@ load_dotenv()
 
 elevenlabs = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
 
-def generate_sfx_node(state: PipelineState):
-    scenario_desc = state["scenario"].get("sfx_prompt", "alien sound waves")
-    print(f"DEBUG: Generating SFX for: {scenario_desc}")
-
-    
+def generate_sfx(prompt: str) -> bytes:
     result = elevenlabs.text_to_sound_effects.convert(
-        text=scenario_desc,
+        text=prompt,
         duration_seconds=10, #
         prompt_influence=0.5
     )
+    return b"".join(result)
+
+def generate_sfx_node(state: PipelineState):
+    scenario_desc = state["scenario"].get("sfx_prompt", "alien sound waves")
+    print(f"DEBUG: Generating SFX for: {scenario_desc}")
 
-    audio_bytes = b"".join(result)
-    
-    with open("current_sfx.mp3", "wb") as f:
-        f.write(audio_bytes)
+    # Reuses a stored bed for the same (normalized) prompt; generates only on a miss
+    sfx_key, _ = sfx_library.get_or_generate(scenario_desc, generate_sfx)
 
-    return {"sfx_path": "current_sfx.mp3"}
\ No newline at end of file
+    return {"sfx_key": sfx_key}
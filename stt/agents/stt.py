@@ -1,42 +1,36 @@
 # stt.py
 import speech_recognition as sr
 from core.state import PipelineState
+from core.transcription import get_stt_engine, pcm_to_wav
+from core.vad import Microphone, VAD_SAMPLE_RATE
+
+# Google Web Speech unless STT_ENGINE selects another engine (e.g. "vosk" for offline runs)
+stt_engine = get_stt_engine()
+
+# Opened on first use and kept open, so the noise floor is calibrated once
+microphone = Microphone(device_index=2)
 
 def mic_input_node(state: PipelineState):
-    recognizer = sr.Recognizer()
-    
-    # 'energy_threshold' : controls sensitiyivity
-    # 300 by deafult -> higher = less sensitive ( good for noisy rooms)
-    
     print("\n[LISTENING]... Speak now")
     
     try:
-        with sr.Microphone(device_index=2) as source:
-        
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            
-            audio_data = recognizer.listen(source, timeout=5, phrase_time_limit=10)
-            print("[PROCESSING] Transcribing...")
-
-            text = recognizer.recognize_google(audio_data)
-            print(f"USER SAID: {text}")
-            
-            if not text:
-                return {"current_text": "..."}
+        pcm = microphone.record_utterance(timeout=5)
+        if pcm is None:
+            print("DEBUG: No speech detected (Timeout)")
+            return {"current_text": "..."}
 
-            return {"current_text": text}
-
-    except sr.UnknownValueError:
-        print("DEBUG: Speech was unintelligible (UnknownValueError)")
-        return {"current_text": "..."} 
+        print("[PROCESSING] Transcribing...")
+        text = stt_engine.transcribe(pcm_to_wav(pcm, VAD_SAMPLE_RATE))
+        print(f"USER SAID: {text}")
         
-    except sr.WaitTimeoutError:
-        print("DEBUG: No speech detected (Timeout)")
-        return {"current_text": "..."}
+        if not text:
+            return {"current_text": "..."}
+
+        return {"current_text": text}
         
     except sr.RequestError as e:
         print(f"ERROR: API unavailable: {e}")
         return {"current_text": "Error"}
         
     except KeyboardInterrupt:
-        return None
\ No newline at end of file
+        return None
@@ -1,10 +1,14 @@
 
+from core.artifacts import artifacts, session_of
 from core.state import PipelineState
+from core.tts_cache import tts_cache
 from elevenlabs.client import ElevenLabs
 import os
 
 elevenlabs = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
 
+TTS_MODEL_ID = "eleven_multilingual_v2"
+
 def tts_node(state: PipelineState):
     print("DEBUG: Generating TTS")
     
@@ -21,17 +25,25 @@ def tts_node(state: PipelineState):
         text_to_speak = "..."
 
     try:
-        audio_generator = elevenlabs.text_to_speech.convert(
-            voice_id=voice_id,
-            text=text_to_speak,
-            model_id="eleven_multilingual_v2"
-        )
-        
-        audio_bytes = b"".join(audio_generator)
-        with open("temp_voice.mp3", "wb") as f:
-            f.write(audio_bytes)
-            
-        return {"audio_history": state["audio_history"] + ["temp_voice.mp3"]}
+        # Repeats ("...", fallback lines, replayed openings) come straight from the cache
+        audio_bytes = tts_cache.get(voice_id, TTS_MODEL_ID, text_to_speak)
+        if audio_bytes is None:
+            audio_generator = elevenlabs.text_to_speech.convert(
+                voice_id=voice_id,
+                text=text_to_speak,
+                model_id=TTS_MODEL_ID
+            )
+
+            audio_bytes = b"".join(audio_generator)
+            tts_cache.put(voice_id, TTS_MODEL_ID, text_to_speak, audio_bytes)
+
+        history = state.get("audio_history", [])
+        handle = artifacts.put(session_of(state), len(history), "voice.mp3", audio_bytes)
+        # One reference for the voice_audio slot, one for the history
+        artifacts.retain(handle)
+        artifacts.release(state.get("voice_audio"))
+
+        return {"voice_audio": handle, "audio_history": history + [handle]}
 
     except Exception as e:
         print(f"ERROR: TTS Failed: {e}")
@@ -0,0 +1,95 @@
+"""
+Compares the previous pydub mixer (decode both files, loop the SFX by
+repetition, fixed -5 dB, overlay, export) with the NumPy mixer in agents/mixer.py.
+
+    cd stt && PYTHONPATH=agents python -m benchmarks.mixer --turns 20 --voice-seconds 6
+
+"mix" times only the in-memory mixing; "turn" adds decoding and MP3 encoding
+and needs ffmpeg on PATH. "first audio" is when the first MP3 data is ready
+to play: the end of the turn for pydub, the first encoded chunk for NumPy.
+"""
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import click
+import numpy as np
+from pydub import AudioSegment
+
+from agents import mixer
+
+
+def tone(seconds: float, frequency: float, amplitude: float) -> AudioSegment:
+    t = np.arange(int(mixer.MIX_SAMPLE_RATE * seconds)) / mixer.MIX_SAMPLE_RATE
+    samples = (amplitude * np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16)
+    return AudioSegment(samples.tobytes(), frame_rate=mixer.MIX_SAMPLE_RATE, sample_width=2, channels=1)
+
+
+def pydub_mix(voice_audio: AudioSegment, sfx_audio: AudioSegment) -> AudioSegment:
+    if len(sfx_audio) < len(voice_audio):
+        loops_needed = (len(voice_audio) // len(sfx_audio)) + 1
+        sfx_audio = sfx_audio * loops_needed
+    sfx_audio = sfx_audio[:len(voice_audio) + 500]
+    return voice_audio.overlay(sfx_audio - 5)
+
+
+def numpy_mix(voice: np.ndarray, bed: mixer.LoopingBed) -> bytes:
+    return b"".join(chunk.tobytes() for chunk in mixer.mix_chunks(mixer.normalize(voice, mixer.VOICE_TARGET_DB), bed))
+
+
+def timed(fn, turns: int) -> float:
+    started = time.perf_counter()
+    for _ in range(turns):
+        fn()
+    return (time.perf_counter() - started) / turns * 1000
+
+
+@click.command()
+@click.option("--turns", default=20, help="Turns to average over.")
+@click.option("--voice-seconds", default=6.0, help="Length of each victim line.")
+@click.option("--sfx-seconds", default=10.0, help="Length of the generated SFX loop.")
+def main(turns, voice_seconds, sfx_seconds):
+    voice_segment = tone(voice_seconds, 220, 0.3)
+    sfx_segment = tone(sfx_seconds, 60, 0.2)
+    voice = np.frombuffer(voice_segment.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+    bed = mixer.LoopingBed(mixer.normalize(np.frombuffer(sfx_segment.raw_data, dtype=np.int16).astype(np.float32) / 32768.0, -30))
+
+    click.echo(f"voice {voice_seconds:.1f}s, sfx loop {sfx_seconds:.1f}s, {turns} turns")
+    click.echo(f"mix   pydub {timed(lambda: pydub_mix(voice_segment, sfx_segment), turns):7.2f}ms/turn   "
+               f"numpy {timed(lambda: numpy_mix(voice, bed), turns):7.2f}ms/turn")
+
+    if shutil.which(AudioSegment.converter) is None:
+        click.echo("turn  skipped (ffmpeg not found)")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        voice_path = os.path.join(directory, "temp_voice.mp3")
+        sfx_path = os.path.join(directory, "current_sfx.mp3")
+        voice_segment.export(voice_path, format="mp3")
+        sfx_segment.export(sfx_path, format="mp3")
+        # The NumPy mixer plays a pre-decoded, memory-mapped bed from the SFX library
+        bed_path = os.path.join(directory, "bed.f32")
+        mixer.normalize(mixer.decode_mono(sfx_path), -30).tofile(bed_path)
+        library_bed = mixer.LoopingBed(np.memmap(bed_path, dtype=np.float32, mode="r"))
+
+        def pydub_turn():
+            pydub_mix(AudioSegment.from_mp3(voice_path), AudioSegment.from_mp3(sfx_path)).export(io.BytesIO(), format="mp3")
+
+        first_audio = []
+
+        def numpy_turn():
+            started = time.perf_counter()
+            turn_voice = mixer.normalize(mixer.decode_mono(voice_path), mixer.VOICE_TARGET_DB)
+            for i, _ in enumerate(mixer.encode_mp3(mixer.mix_chunks(turn_voice, library_bed))):
+                if i == 0:
+                    first_audio.append(time.perf_counter() - started)
+
+        pydub_ms = timed(pydub_turn, turns)
+        click.echo(f"turn  pydub {pydub_ms:7.2f}ms/turn   numpy {timed(numpy_turn, turns):7.2f}ms/turn")
+        click.echo(f"first audio pydub {pydub_ms:7.2f}ms   numpy {sum(first_audio) / len(first_audio) * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()